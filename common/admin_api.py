@@ -0,0 +1,233 @@
+"""
+Admin API Module
+
+This module provides an AdminApi class that adds an admin HTTP API to the health server:
+
+- GET /roster: the players currently online
+- GET /players/<id or name>: one player
+- POST /announce {"message": "..."}: announce a message in game
+- POST /kick {"player": "<id or name>"}: kick a player
+
+The health server runs in its own process, so it keeps its own SharedState, updated from
+the player events the log monitor publishes on its event socket. Each time it connects to
+the socket, it asks the server for the full player list with c_listallplayers(), whose
+output the log monitor publishes as a roster event. Reads are answered from the state's
+immutable snapshot, without locks and without waiting for anything else, and the encoded
+roster is reused until the snapshot changes.
+
+Writes are sent as game commands through a GameCommandExecutor on the request's thread, so
+other requests are served while tmux runs. Reads and writes alike require the health server's
+admin token from the DST_ADMIN_TOKEN environment variable as a bearer token, since the roster
+includes player IDs, and are disabled if it is not set.
+"""
+
+import json
+import logging
+import threading
+from dataclasses import asdict
+from typing import Optional, Tuple
+from urllib.parse import unquote
+
+from common.event_stream import (
+    PLAYER_JOIN,
+    PLAYER_LEAVE,
+    PLAYER_RESUME,
+    PLAYER_SPAWN,
+    ROSTER,
+)
+from common.game_commands import GameCommandExecutor
+from common.health_server import HealthServer, Request, Response, json_response
+from common.player import Player
+from common.shared_state import RosterSnapshot, SharedState
+
+logger = logging.getLogger(__name__)
+
+# Longest message accepted by POST /announce
+MAX_ANNOUNCEMENT_LENGTH = 200
+# Characters that would end or escape the Lua string the message is sent in
+_UNSAFE_CHARACTERS = set('"\\\n\r')
+
+
+class AdminApi:
+    """
+    Serves the roster and accepts admin commands on the health server.
+    """
+
+    def __init__(
+        self,
+        server: HealthServer,
+        state: Optional[SharedState] = None,
+        executor: Optional[GameCommandExecutor] = None,
+        refresh_roster: bool = True,
+    ):
+        """
+        Initialize the AdminApi and register its routes with the server.
+
+        Args:
+            server (HealthServer): The server the API is added to.
+            state (Optional[SharedState]): The player state kept up to date from events.
+            executor (Optional[GameCommandExecutor]): Executor for announce and kick commands.
+            refresh_roster (bool): Request the full player list on connecting to the event socket.
+        """
+        self.state = state or SharedState()
+        self.executor = executor or GameCommandExecutor(logger)
+        self.refresh_roster = refresh_roster
+        # The last snapshot served on /roster and its response, replaced together
+        self._roster: Tuple[Optional[RosterSnapshot], Optional[Response]] = (None, None)
+        server.add_route("GET", "/roster", self.handle_roster, private=True)
+        server.add_route("GET", "/players/", self.handle_player, prefix=True, private=True)
+        server.add_route("POST", "/announce", self.handle_announce, private=True)
+        server.add_route("POST", "/kick", self.handle_kick, private=True)
+        server.add_event_listener(self.apply_event)
+        server.add_connect_listener(self.request_roster)
+
+    def apply_event(self, event: dict) -> None:
+        """
+        Update the player state from a player or roster event.
+
+        Args:
+            event (dict): The decoded event.
+        """
+        event_type = event.get("type")
+        data = event.get("data", {})
+        try:
+            if event_type == PLAYER_JOIN:
+                self.state.sync_player_state(
+                    Player(id=data["player_id"], name=data["name"], authenticated=True)
+                )
+            elif event_type == PLAYER_LEAVE:
+                self.state.remove_player(data["player_id"])
+            elif event_type == PLAYER_RESUME:
+                self.state.update_player_event(data["player_id"], "resume")
+            elif event_type == PLAYER_SPAWN:
+                self.state.update_player_event(
+                    data["player_id"], "character_update", data["character"]
+                )
+            elif event_type == ROSTER:
+                self.state.replace_players(
+                    Player(id=player["id"], name=player["name"], character=player["character"])
+                    for player in data["players"]
+                )
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid {event_type} event: {str(e)}")
+
+    def request_roster(self) -> None:
+        """Ask the server for the full player list, if enabled."""
+        if self.refresh_roster:
+            # On its own thread, so the relay keeps reading events while tmux runs
+            threading.Thread(
+                target=self.executor.send_listallplayers_command, name="roster-refresh", daemon=True
+            ).start()
+
+    def find_player(self, key: str) -> Optional[Player]:
+        """
+        Find an online player by ID or name.
+
+        Args:
+            key (str): The player's ID or name.
+
+        Returns:
+            Optional[Player]: A copy of the player, or None if no such player is online.
+        """
+        snapshot = self.state.snapshot
+        return snapshot.players.get(key) or snapshot.by_name.get(key)
+
+    def handle_roster(self, request: Request) -> Response:
+        """
+        Return the players currently online.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            Response: The snapshot version and players as JSON.
+        """
+        snapshot = self.state.snapshot
+        served, response = self._roster
+        if served is not snapshot:
+            response = json_response({
+                "version": snapshot.version,
+                "count": len(snapshot.players),
+                "players": [asdict(player) for player in snapshot.players.values()],
+            })
+            self._roster = (snapshot, response)
+        return response
+
+    def handle_player(self, request: Request) -> Response:
+        """
+        Return one player, looked up by the ID or name at the end of the path.
+
+        Args:
+            request (Request): The request for /players/<id or name>.
+
+        Returns:
+            Response: The player as JSON, or 404 if no such player is online.
+        """
+        player = self.find_player(unquote(request.path[len("/players/"):]))
+        if player is None:
+            return json_response({"error": "player not found"}, 404)
+        return json_response(asdict(player))
+
+    def handle_announce(self, request: Request) -> Response:
+        """
+        Announce a message in game.
+
+        Args:
+            request (Request): The request, with a JSON body {"message": "..."}.
+
+        Returns:
+            Response: 202 once the command was sent, or an error response.
+        """
+        body, error = _decode_body(request)
+        if error:
+            return error
+        message = body.get("message")
+        if not isinstance(message, str) or not message.strip():
+            return json_response({"error": "message is required"}, 400)
+        if len(message) > MAX_ANNOUNCEMENT_LENGTH or _UNSAFE_CHARACTERS.intersection(message):
+            return json_response(
+                {"error": f"message must be at most {MAX_ANNOUNCEMENT_LENGTH} characters without quotes, backslashes or line breaks"},
+                400,
+            )
+        self.executor.send_console_message(message)
+        return json_response({"status": "sent"}, 202)
+
+    def handle_kick(self, request: Request) -> Response:
+        """
+        Kick an online player.
+
+        Args:
+            request (Request): The request, with a JSON body {"player": "<id or name>"}.
+
+        Returns:
+            Response: 202 once the command was sent, or an error response.
+        """
+        body, error = _decode_body(request)
+        if error:
+            return error
+        key = body.get("player")
+        player = self.find_player(key) if isinstance(key, str) else None
+        if player is None:
+            return json_response({"error": "player not found"}, 404)
+        self.executor.kick_player(player.name)
+        return json_response({"status": "sent", "player": asdict(player)}, 202)
+
+
+def _decode_body(request: Request):
+    """
+    Decode a write request's JSON body.
+
+    Args:
+        request (Request): The request.
+
+    Returns:
+        Tuple[dict, Optional[Response]]: The decoded body, and an error response if the
+        request must be rejected.
+    """
+    try:
+        body = json.loads(request.body or b"{}")
+    except ValueError:
+        return {}, json_response({"error": "invalid JSON body"}, 400)
+    if not isinstance(body, dict):
+        return {}, json_response({"error": "JSON body must be an object"}, 400)
+    return body, None
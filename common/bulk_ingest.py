@@ -0,0 +1,200 @@
+"""
+Bulk Ingest Module
+
+This module provides a BulkIngestor class for backfilling from very large archived
+Don't Starve Together (DST) server logs. The log is memory-mapped and split on line
+boundaries into byte ranges. Worker processes search each range for registered keywords
+on the raw bytes and only decode and parse the matching lines. The matches are merged back in log order
+and dispatched to the EventRegistry, so handlers see the same event stream as a
+sequential replay with LogReplayer.
+"""
+
+import logging
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from common.event_registry import EventRegistry
+from common.line_filter import (
+    compile_keywords,
+    decode_line,
+    iter_matching_lines,
+    last_server_time,
+)
+from common.log_record import (
+    LogRecord,
+    ShardClock,
+    parse_server_time,
+    read_last_server_time,
+    strip_timestamp,
+)
+from common.replay import ReplayStats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class ChunkResult(NamedTuple):
+    """
+    The matching lines found in one byte range of a log file.
+
+    Attributes:
+        lines (int): Number of lines in the range.
+        matches (List[Tuple[Optional[int], str]]): Server time and body of each matching line.
+            Lines without a timestamp before the first timestamped line of the range have
+            a server time of None and inherit it from the previous range when merged.
+        last_server_time (Optional[int]): Server time of the last timestamped line in the range.
+    """
+
+    lines: int
+    matches: List[Tuple[Optional[int], str]]
+    last_server_time: Optional[int]
+
+
+def split_ranges(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """
+    Split a file into byte ranges of roughly chunk_size bytes that end on line boundaries.
+
+    Args:
+        path (str): Path to the file.
+        chunk_size (int): Target size of each range in bytes.
+
+    Returns:
+        List[Tuple[int, int]]: Start and end offsets of each range, covering the whole file.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    ranges = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            newline = mm.find(b"\n", min(start + chunk_size, size) - 1)
+            end = size if newline < 0 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def scan_range(path: str, start: int, end: int, keywords: Sequence[str]) -> ChunkResult:
+    """
+    Find, decode and parse the lines in a byte range of a log file that match a keyword.
+
+    This runs in a worker process, so it only takes and returns picklable values.
+
+    Args:
+        path (str): Path to the log file.
+        start (int): Offset of the first byte of the range.
+        end (int): Offset just past the last byte of the range.
+        keywords (Sequence[str]): Keywords that registered handlers listen for.
+
+    Returns:
+        ChunkResult: The matching lines and timestamp bookkeeping for the range.
+    """
+    matches = []
+    pattern = compile_keywords(keywords)
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for line_start, line_end in iter_matching_lines(pattern, mm, start, end):
+            line = decode_line(mm, line_start, line_end)
+            server_time = parse_server_time(line)
+            if server_time is None:
+                server_time = last_server_time(mm, start, line_start)
+            body = strip_timestamp(line)
+            # The raw match may have been in the timestamp prefix only
+            if any(keyword in body for keyword in keywords):
+                matches.append((server_time, body))
+
+        lines = mm[start:end].count(b"\n")
+        if mm[end - 1:end] != b"\n":
+            lines += 1
+        return ChunkResult(lines, matches, last_server_time(mm, start, end))
+
+
+class BulkIngestor:
+    """
+    Backfills an EventRegistry from a large log file using a process pool.
+
+    Parsing and keyword matching run in parallel; dispatch to the handlers stays on the
+    calling thread and in log order, since handlers keep state between lines.
+    """
+
+    def __init__(
+        self,
+        event_registry: EventRegistry,
+        shard: str = "Master",
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """
+        Initialize the BulkIngestor.
+
+        Args:
+            event_registry (EventRegistry): Registry that handles the matching records.
+            shard (str): Name of the shard that wrote the log.
+            workers (Optional[int]): Number of worker processes. Defaults to the CPU count.
+            chunk_size (int): Target size in bytes of the range each task parses.
+        """
+        self.event_registry = event_registry
+        self.shard = shard
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def ingest(self, path: str) -> ReplayStats:
+        """
+        Parse a log file in parallel and dispatch its matching records in order.
+
+        Args:
+            path (str): Path to the log file.
+
+        Returns:
+            ReplayStats: Throughput statistics for the ingest.
+        """
+        started = time.monotonic()
+        keywords = list(self.event_registry.get_handlers())
+        ranges = split_ranges(path, self.chunk_size)
+
+        # Every line was written before the file's last modification, which anchors
+        # the wall-clock estimates the same way LogReplayer does.
+        clock = ShardClock()
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            clock.observe(read_last_server_time(f.fileno(), stat.st_size), stat.st_mtime)
+        stats = ReplayStats(bytes=stat.st_size)
+
+        previous_server_time = None
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # map() yields results in range order as they complete, so dispatch of
+            # earlier ranges overlaps with parsing of later ones.
+            results = executor.map(
+                scan_range,
+                [path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges],
+                [keywords] * len(ranges),
+            )
+            for result in results:
+                clock.observe(result.last_server_time, stat.st_mtime)
+                for server_time, body in result.matches:
+                    if server_time is None:
+                        server_time = previous_server_time
+                    self.event_registry.handle_record(
+                        LogRecord(
+                            server_time, clock.wall_time(server_time), self.shard, body
+                        )
+                    )
+                if result.last_server_time is not None:
+                    previous_server_time = result.last_server_time
+                stats.lines += result.lines
+
+        stats.elapsed = time.monotonic() - started
+        logger.info(
+            f"Ingested {stats.lines} lines from {path} with {self.workers} workers "
+            f"in {stats.elapsed:.2f}s ({stats.lines_per_second:.0f} lines/s, "
+            f"{stats.megabytes_per_second:.1f} MB/s)"
+        )
+        return stats
@@ -4,10 +4,45 @@ Event Registry Module
 This module provides an EventRegistry class for managing event handlers in a log-based system.
 It allows registration and deregistration of handlers for specific event keywords and processes
 log lines to invoke the appropriate handlers.
+
+The handler table is copy-on-write: every change builds a new table and swaps it in with a
+single assignment, so lines being dispatched on another thread always see either the old or
+the new handlers, never a half-updated mix. Handlers can be registered on behalf of an owner,
+usually a handler module, so that all of the owner's handlers can be replaced in one step.
 """
 
 import logging
+import threading
+import time
 import traceback
+from typing import Optional
+
+from common.log_record import LogRecord
+from common.profiling import profiler
+
+
+# The record being dispatched on each thread, by any registry
+_dispatch_state = threading.local()
+
+
+def dispatching_record() -> Optional[LogRecord]:
+    """
+    Return the record being dispatched on the current thread by any EventRegistry.
+
+    :return: The LogRecord being dispatched, or None outside of dispatch
+    """
+    return getattr(_dispatch_state, "record", None)
+
+
+def _handler_name(handler) -> str:
+    """
+    Return a readable name for a handler, used in profiling reports.
+
+    :param handler: A function, bound method or callable object
+    :return: The handler's module and qualified name
+    """
+    name = getattr(handler, "__qualname__", None) or type(handler).__qualname__
+    return f"{handler.__module__}.{name}"
 
 
 class EventRegistry:
@@ -20,19 +55,57 @@ class EventRegistry:
 
     def __init__(self):
         """Initialize the EventRegistry with an empty handler dictionary and a logger."""
-        self._handlers = {}
+        # (keyword -> handlers, handlers that receive records), replaced as a whole
+        self._table = ({}, frozenset())
+        self._owners = {}
+        self._lock = threading.Lock()
+        self.version = 0
         self._logger = logging.getLogger(__name__)
 
-    def register_handler(self, event_keyword, handler):
+    @property
+    def _handlers(self):
+        """The current mapping of keywords to handler lists."""
+        return self._table[0]
+
+    def _copy_table(self):
+        """
+        Return a mutable copy of the handler table for building a new one.
+
+        :return: A (handlers, record_handlers) tuple of a dict of lists and a set
+        """
+        handlers, record_handlers = self._table
+        return (
+            {keyword: list(entries) for keyword, entries in handlers.items()},
+            set(record_handlers),
+        )
+
+    def _install_table(self, handlers, record_handlers):
+        """
+        Swap in a new handler table. Must be called with the lock held.
+
+        :param handlers: The new mapping of keywords to handler lists
+        :param record_handlers: The handlers that receive LogRecords
+        """
+        self._table = (handlers, frozenset(record_handlers))
+        self.version += 1
+
+    def register_handler(self, event_keyword, handler, pass_record=False, owner=None):
         """
         Register a new event handler with the given event keyword.
 
         :param event_keyword: The keyword to match in log lines
         :param handler: The event handler function to be invoked
+        :param pass_record: If True, the handler receives the LogRecord instead of the line
+        :param owner: Optional name of the owner, see replace_handlers()
         """
-        if event_keyword not in self._handlers:
-            self._handlers[event_keyword] = []
-        self._handlers[event_keyword].append(handler)
+        with self._lock:
+            handlers, record_handlers = self._copy_table()
+            handlers.setdefault(event_keyword, []).append(handler)
+            if pass_record:
+                record_handlers.add(handler)
+            if owner is not None:
+                self._owners.setdefault(owner, []).append((event_keyword, handler))
+            self._install_table(handlers, record_handlers)
         self._logger.info(f"Registered handler for keyword: {event_keyword}")
 
     def deregister_handler(self, event_keyword):
@@ -41,9 +114,64 @@ class EventRegistry:
 
         :param event_keyword: The keyword to match in log lines
         """
-        if event_keyword in self._handlers:
-            del self._handlers[event_keyword]
-            self._logger.info(f"Deregistered handlers for keyword: {event_keyword}")
+        with self._lock:
+            if event_keyword not in self._handlers:
+                return
+            handlers, record_handlers = self._copy_table()
+            for handler in handlers.pop(event_keyword):
+                record_handlers.discard(handler)
+            for owner, registrations in self._owners.items():
+                self._owners[owner] = [
+                    entry for entry in registrations if entry[0] != event_keyword
+                ]
+            self._install_table(handlers, record_handlers)
+        self._logger.info(f"Deregistered handlers for keyword: {event_keyword}")
+
+    def replace_handlers(self, owner, staging):
+        """
+        Atomically replace every handler registered by an owner.
+
+        The owner's current handlers are removed and the handlers registered in the staging
+        registry are added in their place, all in a single table swap. Handlers of other
+        owners keep their position. Passing an empty staging registry removes the owner.
+
+        :param owner: The name of the owner, e.g. a handler module name
+        :param staging: An EventRegistry holding the owner's new handlers
+        :return: The number of handlers registered for the owner
+        """
+        staged_handlers, staged_record_handlers = staging._table
+        with self._lock:
+            handlers, record_handlers = self._copy_table()
+            for keyword, handler in self._owners.pop(owner, []):
+                entries = handlers.get(keyword, [])
+                if handler in entries:
+                    entries.remove(handler)
+                if not entries:
+                    handlers.pop(keyword, None)
+                if not any(handler in entries for entries in handlers.values()):
+                    record_handlers.discard(handler)
+            registrations = []
+            for keyword, entries in staged_handlers.items():
+                for handler in entries:
+                    handlers.setdefault(keyword, []).append(handler)
+                    if handler in staged_record_handlers:
+                        record_handlers.add(handler)
+                    registrations.append((keyword, handler))
+            if registrations:
+                self._owners[owner] = registrations
+            self._install_table(handlers, record_handlers)
+        self._logger.info(
+            f"Replaced handlers of {owner}: {len(registrations)} registered"
+        )
+        return len(registrations)
+
+    def owners(self):
+        """
+        Retrieve the names of owners that have registered handlers.
+
+        :return: A list of owner names
+        """
+        return list(self._owners)
 
     def handle_log_line(self, log_line):
         """
@@ -51,16 +179,90 @@ class EventRegistry:
 
         :param log_line: The log line to process
         """
-        for keyword, handlers in self._handlers.items():
-            if keyword in log_line:
-                for handler in handlers:
-                    try:
-                        handler(log_line)
-                    except Exception as e:
-                        self._logger.error(
-                            f"Error handling log line with keyword '{keyword}': {str(e)}"
-                        )
-                        self._logger.debug(traceback.format_exc())
+        self.handle_record(LogRecord(None, None, "", log_line))
+
+    def handle_record(self, record: LogRecord) -> None:
+        """
+        Process a parsed log record and invoke handlers whose keyword is in its body.
+
+        Handlers registered with pass_record receive the record, all others the body.
+
+        :param record: The LogRecord to process
+        """
+        log_line = record.body
+        table, record_handlers = self._table
+        previous = getattr(_dispatch_state, "record", None)
+        _dispatch_state.record = record
+        try:
+            for keyword, handlers in table.items():
+                if keyword in log_line:
+                    self._invoke(keyword, handlers, record_handlers, record)
+        finally:
+            _dispatch_state.record = previous
+
+    def dispatch_to_owner(self, owner, keyword, record: LogRecord) -> None:
+        """
+        Invoke only the handlers an owner currently has registered for a keyword.
+
+        Used by placeholder handlers that load their owner's real handlers on first use
+        and then pass on the record that triggered the load.
+
+        :param owner: The name of the owner
+        :param keyword: The keyword the record matched
+        :param record: The LogRecord to pass on
+        """
+        table, record_handlers = self._table
+        owned = [handler for entry, handler in self._owners.get(owner, []) if entry == keyword]
+        handlers = [handler for handler in table.get(keyword, []) if handler in owned]
+        self._invoke(keyword, handlers, record_handlers, record)
+
+    def _invoke(self, keyword, handlers, record_handlers, record: LogRecord) -> None:
+        """
+        Call handlers for a record, logging rather than raising their errors.
+
+        :param keyword: The keyword the record matched
+        :param handlers: The handlers to call
+        :param record_handlers: The handlers that receive the record instead of its body
+        :param record: The LogRecord being dispatched
+        """
+        profiling = profiler.enabled
+        for handler in handlers:
+            started = time.perf_counter() if profiling else 0.0
+            try:
+                if handler in record_handlers:
+                    handler(record)
+                else:
+                    handler(record.body)
+            except Exception as e:
+                self._logger.error(
+                    f"Error handling log line with keyword '{keyword}': {str(e)}"
+                )
+                self._logger.debug(traceback.format_exc())
+            if profiling:
+                profiler.record(
+                    f"handler:{_handler_name(handler)}", time.perf_counter() - started
+                )
+
+    def current_record(self) -> Optional[LogRecord]:
+        """
+        Return the record being dispatched on the current thread.
+
+        Handlers registered for plain lines can use this to get the timestamp and shard
+        of the line they are handling.
+
+        :return: The LogRecord being dispatched, or None outside of dispatch
+        """
+        return dispatching_record()
+
+    def keywords(self):
+        """
+        Retrieve the keywords that have registered handlers.
+
+        The registry's version attribute changes whenever this set may have changed.
+
+        :return: A list of registered keywords
+        """
+        return list(self._handlers)
 
     def get_handlers(self):
         """
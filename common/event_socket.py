@@ -0,0 +1,435 @@
+"""
+Event Socket Module
+
+This module provides an EventSocketServer class that publishes the events classified by the
+handlers on a Unix domain socket, so other local tools, such as a Discord bridge or a
+dashboard, get live server events without tailing and re-parsing the server log.
+
+The protocol is line based. After connecting, a consumer sends one line with the topics it
+wants, separated by spaces or commas, e.g. "player_* save_complete". Topics are event types
+and may contain shell-style wildcards; an empty line subscribes to everything. The line may
+also contain options:
+
+- buffer=N: buffer at most N events for this consumer (capped by the server's maximum)
+- policy=P: what happens when the buffer is full, one of DROP_POLICIES
+
+From then on, the server writes each matching event as one JSON object per line. If events
+were dropped for a slow consumer, the next line it receives is
+{"type": "dropped", "count": N}.
+
+Events are serialized once per event, whatever the number of consumers, and sent by a single
+background thread using non-blocking sockets, so a stalled consumer never holds up the
+handlers or the other consumers.
+"""
+
+import errno
+import fnmatch
+import json
+import logging
+import os
+import selectors
+import socket
+import stat
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Sequence
+
+from common.event_stream import ServerEvent
+
+logger = logging.getLogger(__name__)
+
+EVENT_SOCKET = os.environ.get("DST_EVENT_SOCKET", "/tmp/dst-log-monitor/events.sock")
+
+DROP_OLDEST = "drop-oldest"
+DROP_NEWEST = "drop-newest"
+DISCONNECT = "disconnect"
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, DISCONNECT)
+
+# Longest subscription line a consumer may send
+MAX_SUBSCRIPTION_BYTES = 4096
+# Bytes handed to send() at once per consumer
+SEND_CHUNK_BYTES = 256 * 1024
+
+
+class _Subscriber:
+    """A connected consumer and the events buffered for it."""
+
+    def __init__(self, sock: socket.socket, max_buffer: int, policy: str):
+        self.sock = sock
+        self.request = b""
+        self.subscribed = False
+        self.topics: Optional[List[str]] = None
+        self.policy = policy
+        self.buffer: Deque[bytes] = deque()
+        self.max_buffer = max_buffer
+        self.unsent = b""
+        self.dropped = 0
+        self.unreported = 0
+        self.closing = False
+        self._matches: Dict[str, bool] = {}
+
+    def subscribe(self, request: str, max_buffer: int) -> None:
+        """
+        Apply a subscription line.
+
+        Args:
+            request (str): The line sent by the consumer.
+            max_buffer (int): Largest buffer a consumer may ask for.
+
+        Raises:
+            ValueError: If an option is invalid.
+        """
+        topics = []
+        for token in request.replace(",", " ").split():
+            if "=" not in token:
+                topics.append(token)
+                continue
+            name, value = token.split("=", 1)
+            if name == "buffer":
+                self.max_buffer = max(1, min(int(value), max_buffer))
+            elif name == "policy" and value in DROP_POLICIES:
+                self.policy = value
+            else:
+                raise ValueError(f"Invalid subscription option: {token}")
+        self.topics = topics if topics and "*" not in topics else None
+        self.subscribed = True
+
+    def wants(self, event_type: str) -> bool:
+        """
+        Check whether the consumer subscribed to an event type.
+
+        Args:
+            event_type (str): The event type.
+
+        Returns:
+            bool: True if one of the consumer's topics matches.
+        """
+        if self.topics is None:
+            return True
+        matches = self._matches.get(event_type)
+        if matches is None:
+            matches = any(fnmatch.fnmatchcase(event_type, topic) for topic in self.topics)
+            self._matches[event_type] = matches
+        return matches
+
+    def offer(self, line: bytes) -> bool:
+        """
+        Buffer an event line, applying the drop policy if the buffer is full.
+
+        Args:
+            line (bytes): The serialized event.
+
+        Returns:
+            bool: True if an event was dropped.
+        """
+        if len(self.buffer) >= self.max_buffer:
+            if self.policy == DISCONNECT:
+                self.closing = True
+                self.buffer.clear()
+                return False
+            self.dropped += 1
+            self.unreported += 1
+            if self.policy == DROP_NEWEST:
+                return True
+            self.buffer.popleft()
+        self.buffer.append(line)
+        return False
+
+
+class EventSocketServer:
+    """
+    Publishes events to consumers connected to a Unix domain socket.
+    """
+
+    def __init__(
+        self,
+        path: str = EVENT_SOCKET,
+        max_buffer: int = 1000,
+        policy: str = DROP_OLDEST,
+    ):
+        """
+        Initialize the EventSocketServer.
+
+        Args:
+            path (str): Path of the Unix domain socket.
+            max_buffer (int): Events buffered per consumer before the drop policy applies.
+            policy (str): Default drop policy for slow consumers, one of DROP_POLICIES.
+
+        Raises:
+            ValueError: If the drop policy is unknown.
+        """
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.path = path
+        self.max_buffer = max_buffer
+        self.policy = policy
+        self.delivered = 0
+        self.dropped = 0
+        self.disconnected = 0
+
+        self._subscribers: Dict[socket.socket, _Subscriber] = {}
+        self._lock = threading.Lock()
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._listener: Optional[socket.socket] = None
+        self._wake_reader: Optional[socket.socket] = None
+        self._wake_writer: Optional[socket.socket] = None
+        self._wake_pending = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def subscribers(self) -> int:
+        """Number of subscribed consumers."""
+        with self._lock:
+            return sum(1 for subscriber in self._subscribers.values() if subscriber.subscribed)
+
+    def __call__(self, event: ServerEvent) -> None:
+        """
+        Buffer an event for every consumer subscribed to its type. Used as an EventPublisher subscriber.
+
+        Args:
+            event (ServerEvent): The event to publish.
+        """
+        line = None
+        with self._lock:
+            for subscriber in self._subscribers.values():
+                if subscriber.subscribed and not subscriber.closing and subscriber.wants(event.type):
+                    if line is None:
+                        line = (event.to_json() + "\n").encode("utf-8")
+                    if subscriber.offer(line):
+                        self.dropped += 1
+            if line is None or self._wake_pending:
+                return
+            self._wake_pending = True
+        self._wake()
+
+    def start(self) -> None:
+        """Bind the socket and start the background thread."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._remove_stale_socket()
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.path)
+        os.chmod(self.path, 0o660)
+        self._listener.listen(64)
+        self._listener.setblocking(False)
+
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ, "listener")
+        self._selector.register(self._wake_reader, selectors.EVENT_READ, "wake")
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="event-socket", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Send what is buffered as far as possible, then close all connections and the socket."""
+        if self._thread is None:
+            return
+        self._running = False
+        self._wake()
+        self._thread.join()
+        self._thread = None
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for subscriber in subscribers:
+            self._flush(subscriber)
+            self._close(subscriber)
+        self._selector.close()
+        for sock in (self._listener, self._wake_reader, self._wake_writer):
+            sock.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _remove_stale_socket(self) -> None:
+        """Remove a socket file left behind by a previous run."""
+        try:
+            if stat.S_ISSOCK(os.stat(self.path).st_mode):
+                os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _wake(self) -> None:
+        """Wake the background thread."""
+        try:
+            self._wake_writer.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _run(self) -> None:
+        """Accept consumers, read their subscriptions and send them events until stopped."""
+        while self._running:
+            for key, mask in self._selector.select(timeout=1.0):
+                if key.data == "listener":
+                    self._accept()
+                elif key.data == "wake":
+                    self._drain_wake()
+                else:
+                    if mask & selectors.EVENT_READ:
+                        self._read(key.data)
+                    if mask & selectors.EVENT_WRITE and key.data.sock in self._subscribers:
+                        self._flush(key.data)
+
+    def _accept(self) -> None:
+        """Accept waiting connections."""
+        while True:
+            try:
+                sock, _ = self._listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(False)
+            subscriber = _Subscriber(sock, self.max_buffer, self.policy)
+            with self._lock:
+                self._subscribers[sock] = subscriber
+            self._selector.register(sock, selectors.EVENT_READ, subscriber)
+
+    def _drain_wake(self) -> None:
+        """Consume wake-up bytes and send buffered events to every consumer."""
+        try:
+            while self._wake_reader.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        with self._lock:
+            self._wake_pending = False
+            subscribers = list(self._subscribers.values())
+        for subscriber in subscribers:
+            self._flush(subscriber)
+
+    def _read(self, subscriber: _Subscriber) -> None:
+        """
+        Read a consumer's subscription line, or notice that it disconnected.
+
+        Args:
+            subscriber (_Subscriber): The consumer the socket belongs to.
+        """
+        try:
+            data = subscriber.sock.recv(MAX_SUBSCRIPTION_BYTES)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._close(subscriber)
+            return
+        if subscriber.subscribed:
+            return
+        subscriber.request += data
+        if b"\n" not in subscriber.request:
+            if len(subscriber.request) > MAX_SUBSCRIPTION_BYTES:
+                logger.warning("Closing event socket consumer: subscription line too long")
+                self._close(subscriber)
+            return
+        request = subscriber.request.split(b"\n", 1)[0].decode("utf-8", errors="replace")
+        try:
+            with self._lock:
+                subscriber.subscribe(request, self.max_buffer)
+        except ValueError as e:
+            logger.warning(f"Closing event socket consumer: {str(e)}")
+            self._close(subscriber)
+            return
+        logger.info(f"Event socket consumer subscribed to: {request.strip() or '*'}")
+
+    def _flush(self, subscriber: _Subscriber) -> None:
+        """
+        Send as much of a consumer's buffer as its socket accepts without blocking.
+
+        Args:
+            subscriber (_Subscriber): The consumer to send to.
+        """
+        while True:
+            if not subscriber.unsent:
+                with self._lock:
+                    closing = subscriber.closing
+                    if not closing:
+                        self._take(subscriber)
+                if closing:
+                    logger.warning("Disconnecting event socket consumer: its buffer was full")
+                    self._close(subscriber)
+                    return
+                if not subscriber.unsent:
+                    self._watch(subscriber, selectors.EVENT_READ)
+                    return
+            try:
+                sent = subscriber.sock.send(subscriber.unsent[:SEND_CHUNK_BYTES])
+            except (BlockingIOError, InterruptedError):
+                self._watch(subscriber, selectors.EVENT_READ | selectors.EVENT_WRITE)
+                return
+            except OSError as e:
+                if e.errno not in (errno.EPIPE, errno.ECONNRESET):
+                    logger.error(f"Error sending events: {str(e)}")
+                self._close(subscriber)
+                return
+            subscriber.unsent = subscriber.unsent[sent:]
+
+    def _take(self, subscriber: _Subscriber) -> None:
+        """
+        Move a consumer's buffered events into its unsent bytes. Called with the lock held.
+
+        Args:
+            subscriber (_Subscriber): The consumer.
+        """
+        lines = []
+        if subscriber.unreported:
+            lines.append(
+                json.dumps({"type": "dropped", "count": subscriber.unreported}).encode() + b"\n"
+            )
+            subscriber.unreported = 0
+        self.delivered += len(subscriber.buffer)
+        lines.extend(subscriber.buffer)
+        subscriber.buffer.clear()
+        subscriber.unsent = b"".join(lines)
+
+    def _watch(self, subscriber: _Subscriber, events: int) -> None:
+        """Change the socket events the selector waits for on a consumer's socket."""
+        try:
+            if self._selector.get_key(subscriber.sock).events != events:
+                self._selector.modify(subscriber.sock, events, subscriber)
+        except (KeyError, ValueError):
+            pass
+
+    def _close(self, subscriber: _Subscriber) -> None:
+        """
+        Disconnect a consumer.
+
+        Args:
+            subscriber (_Subscriber): The consumer to disconnect.
+        """
+        with self._lock:
+            if self._subscribers.pop(subscriber.sock, None) is None:
+                return
+            if subscriber.closing:
+                self.disconnected += 1
+        try:
+            self._selector.unregister(subscriber.sock)
+        except (KeyError, ValueError):
+            pass
+        subscriber.sock.close()
+
+
+def read_events(
+    path: str = EVENT_SOCKET, topics: Sequence[str] = (), timeout: Optional[float] = None
+) -> Iterator[dict]:
+    """
+    Subscribe to the event socket and yield events as they arrive.
+
+    Args:
+        path (str): Path of the Unix domain socket.
+        topics (Sequence[str]): Event types to subscribe to, with optional wildcards. Empty for all.
+        timeout (Optional[float]): Seconds to wait for an event before raising socket.timeout.
+
+    Yields:
+        dict: The decoded events, including "dropped" notices.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall((" ".join(topics) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as stream:
+            for line in stream:
+                yield json.loads(line)
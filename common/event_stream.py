@@ -0,0 +1,152 @@
+"""
+Event Stream Module
+
+This module provides the structured events that handlers publish for everything they learn
+about the server, such as players joining and leaving, saves and shard startup, and an
+EventPublisher that hands them to subscribers like the JSONL event sink.
+
+Events are stamped with the server time, estimated wall-clock time and shard of the log line
+being dispatched when they are published, and marked stale if the line was handled while
+catching up on old log lines.
+"""
+
+import itertools
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from common.event_registry import dispatching_record
+from common.game_commands import side_effects_suppressed
+
+logger = logging.getLogger(__name__)
+
+# Event types
+PLAYER_JOIN = "player_join"
+PLAYER_LEAVE = "player_leave"
+PLAYER_RESUME = "player_resume"
+PLAYER_SPAWN = "player_spawn"
+ROSTER = "roster"
+SAVE_COMPLETE = "save_complete"
+SHARD_UP = "shard_up"
+SERVER_UNPAUSED = "server_unpaused"
+SHARD_IDLE = "shard_idle"
+SHARD_RESUMED = "shard_resumed"
+SPOT_INTERRUPTION = "spot_interruption"
+INTERRUPTION_SAVED = "interruption_saved"
+INCOMPLETE = "incomplete"
+
+
+class ServerEvent(NamedTuple):
+    """
+    A classified server event.
+
+    Attributes:
+        type (str): The event type, e.g. PLAYER_JOIN.
+        sequence (int): Number of the event, increasing by one per published event.
+        time (float): Unix time at which the event happened, estimated from the log line.
+        server_time (Optional[float]): Server uptime in seconds of the log line, if known.
+        shard (str): Name of the shard the event happened on.
+        stale (bool): True if the event was handled while catching up on old log lines.
+        data (Dict[str, Any]): Event-specific fields.
+    """
+
+    type: str
+    sequence: int
+    time: float
+    server_time: Optional[float]
+    shard: str
+    stale: bool
+    data: Dict[str, Any]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the event to a JSON-serializable dictionary.
+
+        Returns:
+            Dict[str, Any]: The event's fields, with data nested under "data".
+        """
+        return self._asdict()
+
+    def to_json(self) -> str:
+        """
+        Serialize the event as a single line of compact JSON.
+
+        Returns:
+            str: The JSON text, without a trailing newline.
+        """
+        return json.dumps(self._asdict(), separators=(",", ":"), ensure_ascii=False)
+
+
+EventCallback = Callable[[ServerEvent], None]
+
+
+class EventPublisher:
+    """
+    Delivers published events to every subscriber.
+
+    Subscribers are called synchronously on the publishing thread, so they should only
+    hand the event off, e.g. to a buffer, and return.
+    """
+
+    def __init__(self):
+        """Initialize the EventPublisher without subscribers."""
+        self._subscribers = ()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        self.published = 0
+
+    def subscribe(self, callback: EventCallback) -> None:
+        """
+        Start delivering events to a callback.
+
+        Args:
+            callback (EventCallback): Called with each published ServerEvent.
+        """
+        with self._lock:
+            self._subscribers = self._subscribers + (callback,)
+
+    def unsubscribe(self, callback: EventCallback) -> None:
+        """
+        Stop delivering events to a callback.
+
+        Args:
+            callback (EventCallback): A previously subscribed callback.
+        """
+        with self._lock:
+            self._subscribers = tuple(
+                subscriber for subscriber in self._subscribers if subscriber != callback
+            )
+
+    def publish(self, event_type: str, **data: Any) -> ServerEvent:
+        """
+        Publish an event for the log line being dispatched.
+
+        Args:
+            event_type (str): The event type, e.g. PLAYER_JOIN.
+            **data: Event-specific fields. They must be JSON-serializable.
+
+        Returns:
+            ServerEvent: The published event.
+        """
+        record = dispatching_record()
+        event = ServerEvent(
+            type=event_type,
+            sequence=next(self._sequence),
+            time=record.wall_time if record and record.wall_time else time.time(),
+            server_time=record.server_time if record else None,
+            shard=record.shard if record else "",
+            stale=side_effects_suppressed() is not None,
+            data=data,
+        )
+        self.published += 1
+        for subscriber in self._subscribers:
+            try:
+                subscriber(event)
+            except Exception as e:
+                logger.error(f"Error delivering {event_type} event: {str(e)}")
+        return event
+
+
+event_publisher = EventPublisher()
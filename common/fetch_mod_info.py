@@ -1,15 +1,36 @@
 """
 Module: fetch_mod_info.py
 Description: Fetches mod information (title and description) from the Steam Workshop and provides a summary.
+
+Mods are looked up in batches of up to 100 with one POST to Steam's
+GetPublishedFileDetails API (DST_WORKSHOP_DETAILS_URL), which returns compact JSON.
+Workshop pages are only scraped for mods the API did not return, or if it is unreachable.
+
+Pages are scraped concurrently by a bounded pool of worker threads sharing one pooled HTTP
+session. All requests go through a global rate limiter, and failed requests are retried
+with exponential backoff and jitter. The Workshop URL can be overridden with the
+DST_WORKSHOP_URL environment variable, for example to point it at a local stand-in.
+
+Fetched information is kept in a persistent cache file (DST_WORKSHOP_CACHE), together with
+the page's ETag and Last-Modified validators. Entries younger than the cache TTL are used
+without any request; older ones are revalidated with a conditional request, which costs a
+304 response without a body if the page has not changed.
 """
 
+import json
+import os
+import random
 import re
+import tempfile
+import threading
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     import requests
     from bs4 import BeautifulSoup
+    from requests.adapters import HTTPAdapter
 except ImportError:
     print(
         "Error: Required libraries 'requests' and 'beautifulsoup4' are not installed."
@@ -17,43 +38,514 @@ except ImportError:
     print("Please install them using: pip install requests beautifulsoup4")
     sys.exit(1)
 
+WORKSHOP_URL = os.environ.get(
+    "DST_WORKSHOP_URL", "https://steamcommunity.com/sharedfiles/filedetails/"
+)
+# Set to an empty string to always scrape the Workshop pages
+DETAILS_URL = os.environ.get(
+    "DST_WORKSHOP_DETAILS_URL",
+    "https://api.steampowered.com/ISteamRemoteStorage/GetPublishedFileDetails/v1/",
+)
+# Mods per GetPublishedFileDetails request
+DETAILS_BATCH_SIZE = 100
+# Concurrent requests, also the size of the session's connection pool
+MAX_WORKERS = 8
+# Requests per second across all workers
+RATE_LIMIT = float(os.environ.get("DST_WORKSHOP_RATE_LIMIT", "4"))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+REQUEST_TIMEOUT = 10
+# Responses worth retrying; other HTTP errors fail immediately
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Result code of a published file that was found
+RESULT_OK = 1
+BBCODE_TAG = re.compile(r"\[/?[a-z0-9*]+(?:=[^\]]*)?\]", re.IGNORECASE)
+FETCH_ERROR = "Error fetching mod information."
+CACHE_PATH = os.environ.get(
+    "DST_WORKSHOP_CACHE",
+    os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+        "dst-server",
+        "workshop.json",
+    ),
+)
+# Seconds a cached entry is used without revalidating it
+CACHE_TTL = float(os.environ.get("DST_WORKSHOP_CACHE_TTL", str(24 * 60 * 60)))
+CACHE_VERSION = 1
+
+
+class RateLimiter:
+    """
+    A thread-safe token bucket limiting the rate of requests across all workers.
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        Initialize the RateLimiter.
+
+        Args:
+            rate (float): Requests allowed per second. 0 or less disables the limit.
+            burst (int): Requests allowed in a burst after being idle.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until a request may be sent."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is the time this caller owes; later callers queue behind it
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class ModInfoCache:
+    """
+    A persistent, thread-safe cache of Workshop information keyed by mod ID.
+
+    The cache file is loaded on first use and written back atomically by save().
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL):
+        """
+        Initialize the ModInfoCache.
+
+        Args:
+            path (str): Path of the cache file. Empty or None keeps the cache in memory only.
+            ttl (float): Seconds an entry is used without revalidating it.
+        """
+        self.path = path
+        self.ttl = ttl
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Load the cache file, once. Must be called with the lock held."""
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+            if data.get("version") == CACHE_VERSION:
+                self._entries = data.get("mods", {})
+        except (IOError, ValueError, AttributeError) as e:
+            print(f"Ignoring unreadable Workshop cache {self.path}: {e}")
+
+    def get(self, mod_id):
+        """
+        Returns the cached entry of a mod.
+
+        Args:
+            mod_id (str): The ID of the mod.
+
+        Returns:
+            dict: The entry with title, description, summary, etag, last_modified and
+                fetched keys, or None if the mod is not cached.
+        """
+        with self._lock:
+            self._load()
+            return self._entries.get(mod_id)
+
+    def is_fresh(self, entry):
+        """
+        Checks whether an entry can be used without revalidating it.
+
+        Args:
+            entry (dict): A cache entry.
+
+        Returns:
+            bool: True if the entry is younger than the TTL.
+        """
+        return time.time() - entry.get("fetched", 0) < self.ttl
+
+    @staticmethod
+    def validators(entry):
+        """
+        Returns the headers making a request for an entry's page conditional.
+
+        Args:
+            entry (dict): A cache entry, or None.
+
+        Returns:
+            dict: If-None-Match and If-Modified-Since headers for the entry's validators.
+        """
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, mod_id, title, description, etag=None, last_modified=None):
+        """
+        Stores the information of a mod.
+
+        Args:
+            mod_id (str): The ID of the mod.
+            title (str): The mod's title.
+            description (str): The mod's description.
+            etag (str): The page's ETag header, if any.
+            last_modified (str): The page's Last-Modified header, if any.
+        """
+        entry = {
+            "title": title,
+            "description": description,
+            "summary": summarize_description(description),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched": time.time(),
+        }
+        with self._lock:
+            self._load()
+            self._entries[mod_id] = entry
+            self._dirty = True
+
+    def touch(self, mod_id):
+        """
+        Marks a mod's entry as just revalidated.
+
+        Args:
+            mod_id (str): The ID of the mod.
+        """
+        with self._lock:
+            self._load()
+            if mod_id in self._entries:
+                self._entries[mod_id] = dict(self._entries[mod_id], fetched=time.time())
+                self._dirty = True
+
+    def save(self):
+        """Write the cache file if entries changed, replacing it atomically."""
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            directory = os.path.dirname(os.path.abspath(self.path))
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".workshop-")
+                with os.fdopen(fd, "w") as file:
+                    json.dump({"version": CACHE_VERSION, "mods": self._entries}, file)
+                os.replace(temp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                print(f"Error writing Workshop cache {self.path}: {e}")
+
+
+rate_limiter = RateLimiter(RATE_LIMIT)
+mod_cache = ModInfoCache()
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns the shared HTTP session, creating it on first use.
+
+    Its connection pool holds MAX_WORKERS connections, so concurrent workers reuse
+    connections instead of opening one per request.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, maximum=BACKOFF_MAX):
+    """
+    Returns the delay before a retry, using exponential backoff with full jitter.
+
+    Args:
+        attempt (int): The number of the failed attempt, starting at 0.
+        base (float): Delay ceiling in seconds after the first attempt.
+        maximum (float): Upper bound of the delay ceiling.
+
+    Returns:
+        float: Seconds to wait.
+    """
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+def _retry_after(response):
+    """Returns the delay requested by a Retry-After header in seconds, or 0."""
+    try:
+        return min(BACKOFF_MAX, float(response.headers.get("Retry-After", 0)))
+    except ValueError:
+        return 0
+
+
+def request_with_retries(
+    method, url, retries=3, session=None, limiter=None, backoff=BACKOFF_BASE, **kwargs
+):
+    """
+    Sends a rate-limited request, retrying connection errors and retryable responses.
+
+    Args:
+        method (str): HTTP method.
+        url (str): URL to request.
+        retries (int): Number of attempts.
+        session (requests.Session): Session to use, the shared session by default.
+        limiter (RateLimiter): Rate limiter to use, the global one by default.
+        backoff (float): Base delay of the exponential backoff in seconds.
+        **kwargs: Passed on to requests.Session.request.
+
+    Returns:
+        requests.Response: The successful response.
+
+    Raises:
+        requests.RequestException: If the last attempt failed.
+    """
+    session = session or get_session()
+    limiter = limiter or rate_limiter
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+    for attempt in range(retries):
+        limiter.acquire()
+        delay = 0
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.RequestException as e:
+            error = e
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                return response
+            error = requests.HTTPError(f"{response.status_code} Error for url: {response.url}", response=response)
+            delay = _retry_after(response)
+        if attempt + 1 >= retries:
+            raise error
+        print(f"Error requesting {url}, attempt {attempt + 1}/{retries}: {error}")
+        time.sleep(max(delay, backoff_delay(attempt, backoff)))
+
+
+def parse_workshop_page(html):
+    """
+    Extracts the title and description from a Steam Workshop page.
+
+    Args:
+        html (str): The page's HTML.
+
+    Returns:
+        tuple: A tuple containing the mod's title and description.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+
+    title_element = soup.find("div", class_="workshopItemTitle")
+    title = title_element.text.strip() if title_element else "No title available."
+
+    description_element = soup.find("div", class_="workshopItemDescription")
+    description = (
+        description_element.text.strip()
+        if description_element
+        else "No description available."
+    )
+
+    return title, description
 
-def fetch_mod_description(mod_id, retries=3):
+
+def fetch_mod_description(
+    mod_id, retries=3, session=None, url=None, backoff=BACKOFF_BASE, cache=None
+):
     """
     Fetches the title and description of a mod from the Steam Workshop.
 
+    A fresh cached entry is returned without a request. A stale one is revalidated with a
+    conditional request, and returned if the request fails.
+
     Args:
         mod_id (str): The ID of the mod to fetch.
         retries (int): Number of times to retry fetching in case of failure.
+        session (requests.Session): Session to use, the shared session by default.
+        url (str): Workshop item page URL, WORKSHOP_URL by default.
+        backoff (float): Base delay of the exponential backoff in seconds.
+        cache (ModInfoCache): Cache to use, the shared cache by default.
 
     Returns:
         tuple: A tuple containing the mod's title and description.
     """
-    url = f"https://steamcommunity.com/sharedfiles/filedetails/?id={mod_id}"
-    for attempt in range(retries):
+    cache = cache or mod_cache
+    entry = cache.get(mod_id)
+    if entry and cache.is_fresh(entry):
+        return entry["title"], entry["description"]
+
+    try:
+        response = request_with_retries(
+            "GET",
+            url or WORKSHOP_URL,
+            retries=retries,
+            session=session,
+            backoff=backoff,
+            params={"id": mod_id},
+            headers=cache.validators(entry),
+        )
+    except requests.RequestException as e:
+        if entry:
+            print(f"Error fetching mod {mod_id}, using cached information: {e}")
+            return entry["title"], entry["description"]
+        print(f"Error fetching mod {mod_id}: {e}")
+        return FETCH_ERROR, FETCH_ERROR
+
+    if response.status_code == 304 and entry:
+        cache.touch(mod_id)
+        return entry["title"], entry["description"]
+
+    title, description = parse_workshop_page(response.text)
+    cache.put(
+        mod_id,
+        title,
+        description,
+        response.headers.get("ETag"),
+        response.headers.get("Last-Modified"),
+    )
+    return title, description
+
+
+def strip_bbcode(text):
+    """
+    Removes BBCode markup, as used in Workshop descriptions returned by the API.
+
+    Args:
+        text (str): The text with BBCode tags.
+
+    Returns:
+        str: The text without tags.
+    """
+    return BBCODE_TAG.sub("", text)
+
+
+def fetch_published_file_details(
+    mod_ids, url=None, retries=3, session=None, backoff=BACKOFF_BASE
+):
+    """
+    Fetches the details of several mods with one GetPublishedFileDetails request.
+
+    Args:
+        mod_ids (list): IDs of the mods to fetch.
+        url (str): GetPublishedFileDetails URL, DETAILS_URL by default.
+        retries (int): Number of attempts.
+        session (requests.Session): Session to use, the shared session by default.
+        backoff (float): Base delay of the exponential backoff in seconds.
+
+    Returns:
+        dict: Mod IDs mapped to their details, for the mods that were found.
+
+    Raises:
+        requests.RequestException: If the request failed.
+        ValueError: If the response is not valid details JSON.
+    """
+    data = {"itemcount": len(mod_ids)}
+    for index, mod_id in enumerate(mod_ids):
+        data[f"publishedfileids[{index}]"] = mod_id
+    response = request_with_retries(
+        "POST", url or DETAILS_URL, retries=retries, session=session, backoff=backoff, data=data
+    )
+    try:
+        details = response.json()["response"].get("publishedfiledetails", [])
+        return {
+            str(item["publishedfileid"]): item
+            for item in details
+            if item.get("result") == RESULT_OK
+        }
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Unexpected published file details: {e}")
+
+
+def _fetch_details_batches(mod_ids, cache, url, **kwargs):
+    """
+    Fetches mods from the GetPublishedFileDetails API in batches and caches them.
+
+    Returns:
+        dict: Mod IDs mapped to (title, description) tuples, for the mods that were found.
+    """
+    results = {}
+    for start in range(0, len(mod_ids), DETAILS_BATCH_SIZE):
+        batch = mod_ids[start:start + DETAILS_BATCH_SIZE]
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            title_element = soup.find("div", class_="workshopItemTitle")
-            title = (
-                title_element.text.strip() if title_element else "No title available."
-            )
-
-            description_element = soup.find("div", class_="workshopItemDescription")
-            description = (
-                description_element.text.strip()
-                if description_element
-                else "No description available."
-            )
-
-            return title, description
-        except requests.RequestException as e:
-            print(f"Error fetching mod {mod_id}, attempt {attempt + 1}/{retries}: {e}")
-            time.sleep(2)
+            details = fetch_published_file_details(batch, url=url, **kwargs)
+        except (requests.RequestException, ValueError) as e:
+            print(f"Error fetching details of {len(batch)} mods, scraping their pages: {e}")
+            continue
+        for mod_id, item in details.items():
+            title = item.get("title") or "No title available."
+            description = strip_bbcode(item.get("description") or "").strip()
+            description = description or "No description available."
+            cache.put(mod_id, title, description)
+            results[mod_id] = (title, description)
+    return results
 
-    return "Error fetching mod information.", "Error fetching mod information."
+
+def fetch_mod_descriptions(
+    mod_ids,
+    max_workers=MAX_WORKERS,
+    cache=None,
+    details_url=None,
+    **kwargs,
+):
+    """
+    Fetches the titles and descriptions of several mods.
+
+    Fresh cached entries are used as they are. The other mods are fetched in batches from
+    the GetPublishedFileDetails API, and the pages of any mods it did not return are scraped
+    concurrently.
+
+    Args:
+        mod_ids (list): IDs of the mods to fetch.
+        max_workers (int): Maximum number of concurrent page requests.
+        cache (ModInfoCache): Cache to use, the shared cache by default. It is saved once
+            all mods are fetched.
+        details_url (str): GetPublishedFileDetails URL, DETAILS_URL by default. An empty
+            string scrapes all pages.
+        **kwargs: retries, session and backoff, passed on to both backends, and url,
+            passed on to fetch_mod_description.
+
+    Returns:
+        dict: Mod IDs mapped to (title, description) tuples, in the order of mod_ids.
+    """
+    mod_ids = list(dict.fromkeys(mod_ids))
+    if not mod_ids:
+        return {}
+    cache = cache or mod_cache
+    details_url = DETAILS_URL if details_url is None else details_url
+    results = {}
+    for mod_id in mod_ids:
+        entry = cache.get(mod_id)
+        if entry and cache.is_fresh(entry):
+            results[mod_id] = (entry["title"], entry["description"])
+
+    try:
+        pending = [mod_id for mod_id in mod_ids if mod_id not in results]
+        if pending and details_url:
+            batch_kwargs = {key: value for key, value in kwargs.items() if key != "url"}
+            results.update(_fetch_details_batches(pending, cache, details_url, **batch_kwargs))
+            pending = [mod_id for mod_id in pending if mod_id not in results]
+        if pending:
+            workers = max(1, min(max_workers, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="workshop") as executor:
+                scraped = executor.map(
+                    lambda mod_id: fetch_mod_description(mod_id, cache=cache, **kwargs), pending
+                )
+                results.update(zip(pending, scraped))
+    finally:
+        cache.save()
+    return {mod_id: results[mod_id] for mod_id in mod_ids}
 
 
 def summarize_description(description, max_length=100):
@@ -92,12 +584,10 @@ def main():
         print("Usage: python fetch_mod_info.py <mod_id1> <mod_id2> ...")
         sys.exit(1)
 
-    mod_ids = sys.argv[1:]
-    for mod_id in mod_ids:
-        title, description = fetch_mod_description(mod_id)
+    mods = fetch_mod_descriptions(sys.argv[1:])
+    for title, description in mods.values():
         summary = summarize_description(description)
         print(f"Title: {title}\nSummary: {summary}\n")
-        time.sleep(2)
 
 
 if __name__ == "__main__":
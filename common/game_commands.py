@@ -4,14 +4,133 @@ Game Commands Module
 This module provides a GameCommandExecutor class for executing various game commands
 on a Don't Starve Together (DST) dedicated server running in a tmux session.
 It uses subprocess to send commands to the tmux session.
+
+Commands can be suppressed for the current thread with the suppress_side_effects()
+context manager, which the ingest pipeline uses while replaying stale log lines.
+Commands are delivered through a process-wide command sink, which can be switched from
+tmux to a RecordingCommandSink when replaying archived logs.
 """
 
 import subprocess
 import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, TextIO
 
 # Set up logger for this module
 logger = logging.getLogger(__name__)
 
+# Per-thread reason for suppressing game commands (None when commands are allowed)
+_dispatch_state = threading.local()
+
+
+@contextmanager
+def suppress_side_effects(reason: str = "suppressed") -> Iterator[None]:
+    """
+    Suppress game commands issued from the current thread.
+
+    Handlers invoked inside this context still update shared state, but any
+    command sent through a GameCommandExecutor is skipped and logged instead.
+
+    Args:
+        reason (str): Why commands are suppressed, included in the skip log message.
+    """
+    previous = getattr(_dispatch_state, "reason", None)
+    _dispatch_state.reason = reason
+    try:
+        yield
+    finally:
+        _dispatch_state.reason = previous
+
+
+def side_effects_suppressed() -> Optional[str]:
+    """
+    Return the reason game commands are suppressed on the current thread.
+
+    Returns:
+        Optional[str]: The suppression reason, or None if commands are allowed.
+    """
+    return getattr(_dispatch_state, "reason", None)
+
+
+class TmuxCommandSink:
+    """Delivers game commands to the DST dedicated server tmux session."""
+
+    def send(self, command: str) -> None:
+        """
+        Send a command to the tmux session.
+
+        Args:
+            command (str): The command to run in the tmux session.
+
+        Raises:
+            subprocess.CalledProcessError: If the command execution fails.
+            FileNotFoundError: If tmux is not installed or not found in PATH.
+        """
+        subprocess.run(
+            ["tmux", "send-keys", "-t", "DST-dedicated", command, "Enter"],
+            check=True,
+        )
+
+
+class RecordingCommandSink:
+    """
+    Records game commands instead of running them.
+
+    Used when replaying archived logs so handlers can run without touching a live server.
+    """
+
+    def __init__(self, output: Optional[TextIO] = None):
+        """
+        Initialize the RecordingCommandSink.
+
+        Args:
+            output (Optional[TextIO]): Stream that each recorded command is written to, one per line.
+        """
+        self.commands: List[str] = []
+        self.output = output
+
+    def send(self, command: str) -> None:
+        """
+        Record a command.
+
+        Args:
+            command (str): The command that would have been run.
+        """
+        self.commands.append(command)
+        if self.output is not None:
+            self.output.write(command + "\n")
+
+    def close(self) -> None:
+        """Close the stream that recorded commands are written to, if any."""
+        if self.output is not None:
+            self.output.close()
+            self.output = None
+
+
+_command_sink = TmuxCommandSink()
+
+
+def set_command_sink(sink) -> None:
+    """
+    Replace the sink that every GameCommandExecutor delivers commands to.
+
+    Args:
+        sink: An object with a send(command) method, e.g. TmuxCommandSink or RecordingCommandSink.
+    """
+    global _command_sink
+    _command_sink = sink
+
+
+def get_command_sink():
+    """
+    Return the sink that game commands are currently delivered to.
+
+    Returns:
+        The active command sink.
+    """
+    return _command_sink
+
 
 class GameCommandExecutor:
     """
@@ -31,6 +150,9 @@ class GameCommandExecutor:
         """
         Run a command in the DST dedicated server tmux session.
 
+        The command is delivered through the active command sink, which is tmux
+        unless another sink was installed with set_command_sink().
+
         Args:
             command (str): The command to run in the tmux session.
 
@@ -39,11 +161,13 @@ class GameCommandExecutor:
             FileNotFoundError: If tmux is not installed or not found in PATH.
             Exception: For any other unexpected errors.
         """
+        reason = side_effects_suppressed()
+        if reason:
+            self.logger.debug("Skipped command (%s): %s", reason, command)
+            return
+
         try:
-            subprocess.run(
-                ["tmux", "send-keys", "-t", "DST-dedicated", command, "Enter"],
-                check=True,
-            )
+            _command_sink.send(command)
             self.logger.info(f"Ran command: {command}")
         except subprocess.CalledProcessError as e:
             self.logger.error(
@@ -72,6 +196,21 @@ class GameCommandExecutor:
         """
         self._run_tmux_command(f'TheNet:Kick("{player_name}")')
 
+    def set_server_paused(self, paused):
+        """
+        Pause or unpause the server's simulation.
+
+        Args:
+            paused (bool): True to pause the server, False to unpause it.
+        """
+        self._run_tmux_command(f"TheNet:SetServerPaused({'true' if paused else 'false'})")
+
+    def save_game(self):
+        """
+        Save the world with the c_save() command.
+        """
+        self._run_tmux_command("c_save()")
+
     def send_listallplayers_command(self):
         """
         Send the c_listallplayers() command to the DST server via tmux.
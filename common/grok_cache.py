@@ -0,0 +1,180 @@
+"""
+Grok Cache Module
+
+This module provides a CachedGrok class, a drop-in replacement for pygrok.Grok for the
+fixed patterns used by the handlers. Creating a pygrok.Grok reads and parses pygrok's
+whole pattern library every time, which made importing the handlers slow on a cold start.
+
+CachedGrok expands its pattern only when it is first used, and keeps the expanded regular
+expression in memory and in a small JSON file, so later starts compile it directly
+without importing pygrok at all.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# File the expanded patterns are kept in between runs
+GROK_CACHE_FILE = os.environ.get(
+    "DST_GROK_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "dst-log-monitor", "grok.json"),
+)
+
+_TYPE_PATTERN = re.compile(r"%{\w+:(\w+):(int|float)}")
+
+_lock = threading.Lock()
+_expansions: Optional[Dict[str, str]] = None
+
+
+def _cache_key(pattern: str, custom_patterns: Dict[str, str]) -> str:
+    """
+    Return the key under which the expansion of a pattern is cached.
+
+    Args:
+        pattern (str): The grok pattern.
+        custom_patterns (Dict[str, str]): Custom pattern definitions used by the pattern.
+
+    Returns:
+        str: A hex digest identifying the pattern and its custom definitions.
+    """
+    data = json.dumps([pattern, sorted(custom_patterns.items())])
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _load_cache() -> Dict[str, str]:
+    """
+    Load the cached pattern expansions from disk once.
+
+    Returns:
+        Dict[str, str]: Expanded regular expressions keyed by cache key.
+    """
+    global _expansions
+    if _expansions is None:
+        try:
+            with open(GROK_CACHE_FILE, "r") as f:
+                _expansions = json.load(f)
+        except (OSError, ValueError):
+            _expansions = {}
+    return _expansions
+
+
+def _save_cache(expansions: Dict[str, str]) -> None:
+    """
+    Write the pattern expansions to disk, replacing the file atomically.
+
+    Failing to write the cache only costs time on the next start, so errors are logged
+    and otherwise ignored.
+
+    Args:
+        expansions (Dict[str, str]): Expanded regular expressions keyed by cache key.
+    """
+    directory = os.path.dirname(GROK_CACHE_FILE)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(expansions, f)
+        os.replace(temp_path, GROK_CACHE_FILE)
+    except OSError as e:
+        logger.debug(f"Could not write grok cache {GROK_CACHE_FILE}: {str(e)}")
+
+
+def expand_pattern(pattern: str, custom_patterns: Optional[Dict[str, str]] = None) -> str:
+    """
+    Expand a grok pattern into a regular expression, using the cache if possible.
+
+    Args:
+        pattern (str): The grok pattern.
+        custom_patterns (Optional[Dict[str, str]]): Custom pattern definitions.
+
+    Returns:
+        str: The expanded regular expression.
+    """
+    custom_patterns = custom_patterns or {}
+    key = _cache_key(pattern, custom_patterns)
+    with _lock:
+        expansions = _load_cache()
+        regex = expansions.get(key)
+        if regex is None:
+            from pygrok import Grok
+
+            regex = Grok(pattern, custom_patterns=custom_patterns).regex_obj.pattern
+            expansions[key] = regex
+            _save_cache(expansions)
+    return regex
+
+
+def _compile(regex: str):
+    """
+    Compile an expanded pattern, preferring the standard library.
+
+    pygrok's library uses atomic groups, which the re module supports from Python 3.11.
+    On older versions the regex module that pygrok depends on is used instead.
+
+    Args:
+        regex (str): The expanded regular expression.
+
+    Returns:
+        A compiled pattern object.
+    """
+    try:
+        return re.compile(regex)
+    except re.error:
+        import regex as regex_module
+
+        return regex_module.compile(regex)
+
+
+class CachedGrok:
+    """
+    Matches log lines against a grok pattern like pygrok.Grok.
+
+    The pattern is expanded and compiled on the first call to match().
+    """
+
+    def __init__(self, pattern: str, custom_patterns: Optional[Dict[str, str]] = None):
+        """
+        Initialize the CachedGrok.
+
+        Args:
+            pattern (str): The grok pattern, e.g. "%{WORD:player_id}".
+            custom_patterns (Optional[Dict[str, str]]): Custom pattern definitions.
+        """
+        self.pattern = pattern
+        self.custom_patterns = dict(custom_patterns or {})
+        self.type_mapper = dict(_TYPE_PATTERN.findall(pattern))
+        self._regex_obj = None
+
+    @property
+    def regex_obj(self):
+        """The compiled regular expression, compiled on first use."""
+        if self._regex_obj is None:
+            self._regex_obj = _compile(expand_pattern(self.pattern, self.custom_patterns))
+        return self._regex_obj
+
+    def match(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Search text for the pattern.
+
+        Args:
+            text (str): The text to search.
+
+        Returns:
+            Optional[Dict[str, Any]]: The named fields of the first match, or None if the
+            pattern does not match. Fields typed int or float are converted.
+        """
+        match_obj = self.regex_obj.search(text)
+        if match_obj is None:
+            return None
+        matches = match_obj.groupdict()
+        for key, kind in self.type_mapper.items():
+            if matches.get(key) is not None:
+                matches[key] = int(matches[key]) if kind == "int" else float(matches[key])
+        return matches
@@ -3,10 +3,14 @@ Grouped Events Module
 
 This module provides a GroupedEventHandler class for handling multi-line events in log files.
 It allows for the grouping of related log lines based on start and end patterns,
-and performs a final action on the collected group of lines.
+and performs a final action on the collected group of lines. Groups that have not ended when
+the log monitor shuts down are published as INCOMPLETE events instead.
 """
 
 import logging
+import weakref
+
+from common.event_stream import INCOMPLETE, event_publisher
 
 # Set up logger for this module
 logger = logging.getLogger(__name__)
@@ -20,6 +24,9 @@ class GroupedEventHandler:
     and performs a specified action on the collected group of lines.
     """
 
+    # Live instances, so the memory monitor can measure their collected lines
+    instances = weakref.WeakSet()
+
     def __init__(self, start_pattern, end_pattern, final_action):
         """
         Initialize the GroupedEventHandler.
@@ -35,6 +42,7 @@ class GroupedEventHandler:
         self.in_event = False
         self.event_lines = []
         self.logger = logging.getLogger(__name__)
+        GroupedEventHandler.instances.add(self)
 
     def handle_event_line(self, line):
         """
@@ -52,19 +60,19 @@ class GroupedEventHandler:
 
         # Try matching the start of the event
         if not self.in_event and self.start_pattern in line:
-            self.logger.debug(f"Detected start of event: {line}")
+            self.logger.debug("Detected start of event: %s", line)
             self.in_event = True
             self.event_lines = [line]
 
         # Try matching the end of the event
         elif self.in_event and self.end_pattern in line:
-            self.logger.debug(f"Detected end of event: {line}")
+            self.logger.debug("Detected end of event: %s", line)
             self.event_lines.append(line)
             self.finalize_event()
 
         # Collect lines within the event if in_event is True
         elif self.in_event:
-            self.logger.debug(f"Collecting line for event: {line}")
+            self.logger.debug("Collecting line for event: %s", line)
             self.event_lines.append(line)
 
     def finalize_event(self):
@@ -75,7 +83,7 @@ class GroupedEventHandler:
         function with the collected event lines, then resets the event state.
         """
         if self.event_lines:
-            self.logger.debug(f"Finalizing event with lines: {self.event_lines}")
+            self.logger.debug("Finalizing event with lines: %s", self.event_lines)
             self.final_action(self.event_lines)
         else:
             self.logger.warning("Attempted to finalize event with no collected lines.")
@@ -83,6 +91,38 @@ class GroupedEventHandler:
         self.in_event = False
         self.event_lines = []
 
+    def abandon(self):
+        """
+        Give up on a partially collected event without finalizing it.
+
+        Used when the log monitor shuts down before the event's end pattern was logged. The event
+        did not happen as far as the log shows, so the final action is not called. Instead, a
+        warning is logged and an INCOMPLETE event is published with the lines collected so far.
+
+        Returns:
+            int: The number of lines that were collected for the event.
+        """
+        lines = list(self.event_lines) if self.in_event else []
+        self.in_event = False
+        self.event_lines = []
+        if lines:
+            self.logger.warning(
+                f"Event starting with {self.start_pattern!r} did not end before shutdown, "
+                f"dropping its {len(lines)} lines"
+            )
+            event_publisher.publish(INCOMPLETE, start_pattern=self.start_pattern, lines=lines)
+        return len(lines)
+
+    @classmethod
+    def abandon_incomplete(cls):
+        """
+        Give up on the partially collected events of all live instances.
+
+        Returns:
+            int: The number of events that were abandoned.
+        """
+        return sum(1 for handler in list(cls.instances) if handler.abandon())
+
 
 # Add a debug log at the module level
 logger.debug("GroupedEventHandler module loaded")
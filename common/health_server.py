@@ -0,0 +1,847 @@
+"""
+Health Server Module
+
+This module provides the HealthServer class behind health_check.py. It answers the
+Kubernetes health probes on /health, reports the player list and shard status from the log
+monitor's shared-memory roster snapshot on /status, and streams live server events to HTTP
+clients as server-sent events on /events.
+
+Requests are answered by the standard library's ThreadingHTTPServer, one thread per connection.
+At most max_connections connections are served at once; further ones are answered with 503 and a
+Retry-After header right away, so a flood of clients cannot start an unbounded number of threads
+or delay the health probes behind a queue. Events are relayed from the log monitor's event
+socket (see common.event_socket) by a background thread into a ring buffer of recent events.
+Once an /events response has started, its connection is handed to the EventStreamer, a single
+thread that writes that one buffer to every client over non-blocking sockets, so hundreds of
+open streams cost no more threads than one. A slow viewer only falls behind on its own
+connection; it never holds up the log monitor or the other viewers.
+
+Each event is sent with its sequence number as the SSE event ID. A client reconnecting with
+a Last-Event-ID header, or a last_event_id query parameter, first receives the events it
+missed, as far as they are still in the ring buffer. Clients can restrict the stream to some
+event types with a types query parameter, e.g. /events?types=player_*,save_complete.
+
+The port is exposed outside the cluster, so the event stream and /status, which include
+player IDs, require the admin token from the DST_ADMIN_TOKEN environment variable as a bearer
+token. It is disabled if no token is set. Other modules can register routes with the same
+requirement.
+"""
+
+import fnmatch
+import hmac
+import json
+import logging
+import os
+import selectors
+import socket
+import subprocess
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from common.event_socket import EVENT_SOCKET
+from common.roster_snapshot import ROSTER_SNAPSHOT, RosterSnapshotReader
+
+logger = logging.getLogger(__name__)
+
+PORT = 8080
+ADMIN_TOKEN = os.environ.get("DST_ADMIN_TOKEN", "")
+SERVER_PROCESS = "dontstarve_dedicated_server_nullrenderer"
+# Number of recent events kept for clients resuming the stream
+EVENT_HISTORY = 1000
+# Seconds between keep-alive comments on idle event streams
+KEEPALIVE_INTERVAL = 15.0
+# Seconds between attempts to connect to the event socket
+RECONNECT_INTERVAL = 1.0
+# Seconds a connection may wait for the client before it is closed
+CONNECTION_TIMEOUT = 60.0
+# Seconds between checks for a shutdown request while serving
+POLL_INTERVAL = 0.1
+# Largest request body accepted
+MAX_REQUEST_BYTES = 64 * 1024
+# Connections served at once, each on its own thread; open event streams do not count
+MAX_CONNECTIONS = 64
+
+
+class Request(NamedTuple):
+    """
+    A parsed HTTP request.
+
+    Attributes:
+        method (str): The request method, e.g. "GET".
+        path (str): The request path without the query string.
+        query (Dict[str, str]): The query parameters, the last value winning.
+        headers (Dict[str, str]): The headers, with lowercase names.
+        body (bytes): The request body.
+    """
+
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    body: bytes
+
+
+class Response(NamedTuple):
+    """
+    An HTTP response.
+
+    Attributes:
+        status (int): The status code.
+        body (bytes): The response body.
+        content_type (str): The Content-Type of the body.
+    """
+
+    status: int
+    body: bytes = b""
+    content_type: str = "text/plain"
+
+
+Route = Callable[[Request], Response]
+
+
+def json_response(data, status: int = 200) -> Response:
+    """
+    Create a JSON response.
+
+    Args:
+        data: The JSON-serializable response data.
+        status (int): The status code.
+
+    Returns:
+        Response: The response.
+    """
+    return Response(status, json.dumps(data).encode("utf-8"), "application/json")
+
+
+class EventHistory:
+    """
+    A ring buffer of recent events that every event stream reads from.
+    """
+
+    def __init__(self, size: int = EVENT_HISTORY):
+        """
+        Initialize the EventHistory.
+
+        Args:
+            size (int): Number of recent events kept.
+        """
+        self.events: Deque[Tuple[int, str, bytes]] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    @property
+    def last_id(self) -> int:
+        """ID of the newest event, or 0 if there is none."""
+        with self._lock:
+            return self.events[-1][0] if self.events else 0
+
+    def add(self, event: dict) -> None:
+        """
+        Add an event.
+
+        Args:
+            event (dict): The decoded event, with at least "sequence" and "type".
+        """
+        event_id = event["sequence"]
+        message = f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        with self._lock:
+            if self.events and event_id <= self.events[-1][0]:
+                # The log monitor restarted and numbers its events from 1 again
+                self.events.clear()
+            self.events.append((event_id, event["type"], message.encode("utf-8")))
+
+    def since(self, last_id: int) -> List[Tuple[int, str, bytes]]:
+        """
+        Return the buffered events after an event ID.
+
+        If the ID is newer than any buffered event, the event numbering was reset and all
+        buffered events are returned.
+
+        Args:
+            last_id (int): ID of the last event the client has seen.
+
+        Returns:
+            List[Tuple[int, str, bytes]]: The ID, type and SSE message of each newer event.
+        """
+        with self._lock:
+            if not self.events or last_id > self.events[-1][0] or self.events[0][0] > last_id:
+                return list(self.events)
+            newer = []
+            for event in reversed(self.events):
+                if event[0] <= last_id:
+                    break
+                newer.append(event)
+        newer.reverse()
+        return newer
+
+
+class _EventStream:
+    """An /events client served by the EventStreamer."""
+
+    def __init__(self, sock: socket.socket, last_id: int, selector: "_TypeSelector"):
+        self.sock = sock
+        self.last_id = last_id
+        self.selector = selector
+        self.buffer = b""
+        self.last_write = time.monotonic()
+
+
+class EventStreamer:
+    """
+    Writes the events in an EventHistory to every /events client from a single thread.
+
+    The client sockets are non-blocking and multiplexed with one selector, so an open stream
+    costs a socket and a buffer rather than a thread. A client is only given newer events once it
+    has taken the previous ones, so a slow viewer falls behind on its own connection, skipping
+    the events that left the ring buffer meanwhile, without holding up the others.
+    """
+
+    def __init__(self, history: EventHistory):
+        """
+        Initialize the EventStreamer.
+
+        Args:
+            history (EventHistory): The events to stream.
+        """
+        self.history = history
+        self._selector = selectors.DefaultSelector()
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+        self._selector.register(self._wake_reader, selectors.EVENT_READ)
+        self._streams: Dict[socket.socket, _EventStream] = {}
+        self._added: List[_EventStream] = []
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def count(self) -> int:
+        """Number of open streams."""
+        with self._lock:
+            return len(self._streams) + len(self._added)
+
+    def start(self) -> None:
+        """Start the streamer thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="event-streamer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the streamer thread and close every stream."""
+        with self._lock:
+            self._running = False
+        self.wake()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for stream in list(self._streams.values()) + self._added:
+            self._close(stream)
+        self._added = []
+        self._selector.close()
+        self._wake_reader.close()
+        self._wake_writer.close()
+
+    def add(self, sock: socket.socket, last_id: int, selector: "_TypeSelector") -> None:
+        """
+        Take over a client connection whose response head has been sent.
+
+        Args:
+            sock (socket.socket): The client's socket. The streamer closes it.
+            last_id (int): ID of the last event the client has seen.
+            selector (_TypeSelector): The event types the client wants.
+        """
+        sock.setblocking(False)
+        with self._lock:
+            if not self._running:
+                sock.close()
+                return
+            self._added.append(_EventStream(sock, last_id, selector))
+        self.wake()
+
+    def wake(self) -> None:
+        """Make the streamer thread check for new events and streams."""
+        try:
+            self._wake_writer.send(b"\0")
+        except OSError:
+            # A wake-up is already pending, or the streamer stopped
+            pass
+
+    def _run(self) -> None:
+        """Write events to the streams as they arrive and the clients take them, until stopped."""
+        while True:
+            with self._lock:
+                if not self._running:
+                    return
+                added, self._added = self._added, []
+            for stream in added:
+                self._streams[stream.sock] = stream
+                self._selector.register(stream.sock, selectors.EVENT_READ, stream)
+            self._fill()
+            for key, mask in self._selector.select(self._timeout()):
+                if key.fileobj is self._wake_reader:
+                    self._drain_wake()
+                elif mask & selectors.EVENT_READ:
+                    self._read(key.data)
+
+    def _fill(self) -> None:
+        """Buffer newer events or a keep-alive for each stream that took its last write, and send."""
+        now = time.monotonic()
+        newer: Dict[int, List[Tuple[int, str, bytes]]] = {}
+        for stream in list(self._streams.values()):
+            if not stream.buffer:
+                if stream.last_id not in newer:
+                    newer[stream.last_id] = self.history.since(stream.last_id)
+                events = newer[stream.last_id]
+                if events:
+                    stream.last_id = events[-1][0]
+                    wants = stream.selector.wants
+                    stream.buffer = b"".join(message for _, kind, message in events if wants(kind))
+                if not stream.buffer and now - stream.last_write >= KEEPALIVE_INTERVAL:
+                    stream.buffer = b": keep-alive\n\n"
+            if stream.buffer:
+                self._send(stream, now)
+
+    def _send(self, stream: _EventStream, now: float) -> None:
+        """Send as much of a stream's buffer as the socket takes, and wait for it to take more."""
+        try:
+            sent = stream.sock.send(stream.buffer)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            # The client disconnected
+            self._close(stream)
+            return
+        if sent:
+            stream.buffer = stream.buffer[sent:]
+            stream.last_write = now
+        events = selectors.EVENT_READ
+        if stream.buffer:
+            events |= selectors.EVENT_WRITE
+        self._selector.modify(stream.sock, events, stream)
+
+    def _read(self, stream: _EventStream) -> None:
+        """Discard what a client sends, closing its stream when it disconnects."""
+        try:
+            data = stream.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._close(stream)
+
+    def _timeout(self) -> Optional[float]:
+        """Seconds until the next keep-alive is due, or None if there are no streams."""
+        if not self._streams:
+            return None
+        oldest = min(stream.last_write for stream in self._streams.values())
+        return max(oldest + KEEPALIVE_INTERVAL - time.monotonic(), 0)
+
+    def _drain_wake(self) -> None:
+        """Consume the pending wake-ups."""
+        try:
+            while self._wake_reader.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _close(self, stream: _EventStream) -> None:
+        """Stop serving a stream and close its connection."""
+        if self._streams.pop(stream.sock, None) is not None:
+            self._selector.unregister(stream.sock)
+        stream.sock.close()
+
+
+class HealthServer:
+    """
+    Answers health probes and streams server events over HTTP.
+    """
+
+    def __init__(
+        self,
+        port: int = PORT,
+        host: str = "",
+        event_socket: Optional[str] = EVENT_SOCKET,
+        history: int = EVENT_HISTORY,
+        process_name: str = SERVER_PROCESS,
+        roster_snapshot: Optional[str] = ROSTER_SNAPSHOT,
+        token: str = ADMIN_TOKEN,
+        max_connections: int = MAX_CONNECTIONS,
+    ):
+        """
+        Initialize the HealthServer.
+
+        Args:
+            port (int): TCP port to listen on, 0 for any free port.
+            host (str): Address to listen on, "" for all.
+            event_socket (Optional[str]): Path of the log monitor's event socket, None to stream nothing.
+            history (int): Number of recent events kept for resuming clients.
+            process_name (str): Process that must be running for the server to be healthy.
+            roster_snapshot (Optional[str]): Path of the log monitor's roster snapshot, None to serve no status.
+            token (str): Bearer token required for the event stream and private routes, "" to disable them.
+            max_connections (int): Connections served at once, further ones get 503.
+        """
+        self.port = port
+        self.host = host
+        self.event_socket = event_socket
+        self.history_size = history
+        self.process_name = process_name
+        self.roster_reader = RosterSnapshotReader(roster_snapshot) if roster_snapshot else None
+        self.token = token
+        self.max_connections = max_connections
+        self.history: Optional[EventHistory] = None
+        self.routes: Dict[Tuple[str, str], Route] = {}
+        self.prefix_routes: List[Tuple[str, str, Route]] = []
+        self.event_listeners: List[Callable[[dict], None]] = []
+        self.connect_listeners: List[Callable[[], None]] = []
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._relay: Optional[threading.Thread] = None
+        self._relay_socket: Optional[socket.socket] = None
+        self._streamer: Optional[EventStreamer] = None
+        self._stopped = threading.Event()
+        self.add_route("GET", "/", self.handle_health)
+        self.add_route("GET", "/health", self.handle_health)
+        self.add_route("GET", "/status", self.handle_status, private=True)
+
+    @property
+    def streams(self) -> int:
+        """Number of open event streams."""
+        return self._streamer.count if self._streamer is not None else 0
+
+    def add_route(
+        self, method: str, path: str, handler: Route, prefix: bool = False, private: bool = False
+    ) -> None:
+        """
+        Register a request handler.
+
+        Args:
+            method (str): The request method.
+            path (str): The exact request path, or the path prefix if prefix is set.
+            handler (Route): Function returning the Response for a Request.
+            prefix (bool): Handle all paths starting with path, e.g. "/players/".
+            private (bool): Require the admin token, see authorize().
+        """
+        if private:
+            handler = self._private(handler)
+        if prefix:
+            self.prefix_routes.append((method, path, handler))
+        else:
+            self.routes[(method, path)] = handler
+
+    def add_event_listener(self, callback: Callable[[dict], None]) -> None:
+        """
+        Call a function with every event relayed from the event socket.
+
+        Args:
+            callback (Callable[[dict], None]): Called on the relay thread with each decoded event.
+        """
+        self.event_listeners.append(callback)
+
+    def add_connect_listener(self, callback: Callable[[], None]) -> None:
+        """
+        Call a function each time the connection to the event socket is established.
+
+        Args:
+            callback (Callable[[], None]): Called on the relay thread after connecting.
+        """
+        self.connect_listeners.append(callback)
+
+    def start(self) -> None:
+        """Start listening and relaying events on background threads."""
+        self._listen()
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, args=(POLL_INTERVAL,), name="health-server", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop listening and relaying events, and end open event streams."""
+        self._stopped.set()
+        if self._streamer is not None:
+            self._streamer.stop()
+            self._streamer = None
+        if self._httpd is not None:
+            if self._thread is not None:
+                self._httpd.shutdown()
+                self._thread.join()
+                self._thread = None
+            self._httpd.server_close()
+            self._httpd = None
+        relay_socket = self._relay_socket
+        if relay_socket is not None:
+            try:
+                relay_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._relay is not None:
+            self._relay.join()
+            self._relay = None
+
+    def serve_forever(self) -> None:
+        """Serve requests on the calling thread until interrupted."""
+        self._listen()
+        try:
+            self._httpd.serve_forever(POLL_INTERVAL)
+        finally:
+            self.stop()
+
+    def authorize(self, request: Request) -> Optional[Response]:
+        """
+        Check that a request carries the admin token as a bearer token.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            Optional[Response]: An error response if the request must be rejected, else None.
+        """
+        if not self.token:
+            return json_response({"error": "admin token not configured"}, 403)
+        supplied = request.headers.get("authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {self.token}".encode()):
+            return json_response({"error": "unauthorized"}, 401)
+        return None
+
+    def handle_health(self, request: Request) -> Response:
+        """
+        Report whether the DST server process is running.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            Response: 200 if the server process is running, 500 otherwise.
+        """
+        result = subprocess.run(
+            ["pgrep", "-f", self.process_name],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        if result.returncode == 0:
+            return Response(200, b"OK")
+        return Response(500, b"DST server not running")
+
+    def handle_status(self, request: Request) -> Response:
+        """
+        Report the player list and shard status from the log monitor's roster snapshot.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            Response: The snapshot as JSON, or 503 if the log monitor has not written one.
+        """
+        status = self.roster_reader.read() if self.roster_reader else None
+        if status is None:
+            return json_response({"error": "roster snapshot not available"}, 503)
+        return json_response(status.to_dict())
+
+    def handle(self, handler: BaseHTTPRequestHandler) -> None:
+        """
+        Answer a request received by the HTTP server.
+
+        Args:
+            handler (BaseHTTPRequestHandler): The handler of the request's connection.
+        """
+        request, error = _read_request(handler)
+        if error:
+            handler.close_connection = True
+            _respond(handler, error)
+        elif request.method == "GET" and request.path == "/events":
+            self._stream_events(request, handler)
+        else:
+            _respond(handler, self._route(request))
+
+    def _listen(self) -> None:
+        """Open the listening socket and start relaying events."""
+        self.history = EventHistory(self.history_size)
+        self._streamer = EventStreamer(self.history)
+        self._streamer.start()
+        self._stopped.clear()
+        self._httpd = _HTTPServer((self.host, self.port), self, self.max_connections)
+        self.port = self._httpd.server_address[1]
+        if self.event_socket:
+            self._relay = threading.Thread(target=self._relay_events, name="event-relay", daemon=True)
+            self._relay.start()
+        logger.info(f"Serving health check at port {self.port}")
+
+    def _relay_events(self) -> None:
+        """Read events from the event socket into the history, reconnecting as needed."""
+        connected = None
+        while not self._stopped.is_set():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.event_socket)
+            except OSError as e:
+                sock.close()
+                if connected is not False:
+                    logger.warning(f"Waiting for event socket {self.event_socket}: {str(e)}")
+                connected = False
+                self._stopped.wait(RECONNECT_INTERVAL)
+                continue
+            connected = True
+            self._relay_socket = sock
+            logger.info(f"Relaying events from {self.event_socket}")
+            try:
+                if self._stopped.is_set():
+                    return
+                sock.sendall(b"buffer=100000\n")
+                self._notify(self.connect_listeners)
+                with sock.makefile("rb") as stream:
+                    for line in stream:
+                        self._relay_event(json.loads(line))
+            except (OSError, ValueError) as e:
+                if not self._stopped.is_set():
+                    logger.warning(f"Event socket connection lost: {str(e)}")
+            finally:
+                self._relay_socket = None
+                sock.close()
+            self._stopped.wait(RECONNECT_INTERVAL)
+
+    def _relay_event(self, event: dict) -> None:
+        """Add a relayed event to the history and pass it to the event listeners."""
+        if event.get("type") == "dropped":
+            logger.warning(f"{event['count']} events were dropped before reaching the health server")
+            return
+        self.history.add(event)
+        self._streamer.wake()
+        self._notify(self.event_listeners, event)
+
+    def _notify(self, listeners, *args) -> None:
+        """Call listeners, logging their errors."""
+        for listener in listeners:
+            try:
+                listener(*args)
+            except Exception as e:
+                logger.error(f"Error in event listener: {str(e)}")
+
+    def _private(self, handler: Route) -> Route:
+        """Wrap a request handler so it is only called for requests with the admin token."""
+
+        def private_handler(request: Request) -> Response:
+            return self.authorize(request) or handler(request)
+
+        return private_handler
+
+    def _route(self, request: Request) -> Response:
+        """
+        Find and call the handler for a request.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            Response: The handler's response, or an error response.
+        """
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            for method, prefix, prefix_handler in self.prefix_routes:
+                if method == request.method and request.path.startswith(prefix):
+                    handler = prefix_handler
+                    break
+        if handler is None:
+            if any(path == request.path for _, path in self.routes) or any(
+                request.path.startswith(prefix) for _, prefix, _ in self.prefix_routes
+            ):
+                return Response(405, b"Method Not Allowed")
+            return Response(404, b"Not Found")
+        try:
+            return handler(request)
+        except Exception as e:
+            logger.error(f"Error handling {request.method} {request.path}: {str(e)}")
+            return Response(500, b"Internal Server Error")
+
+    def _stream_events(self, request: Request, handler: BaseHTTPRequestHandler) -> None:
+        """
+        Start streaming events to a client and hand its connection to the event streamer.
+
+        Args:
+            request (Request): The /events request.
+            handler (BaseHTTPRequestHandler): The handler of the request's connection.
+        """
+        handler.close_connection = True
+        error = self.authorize(request)
+        if error:
+            _respond(handler, error)
+            return
+        streamer = self._streamer
+        if not self.event_socket or streamer is None:
+            _respond(handler, Response(503, b"Event stream not available"))
+            return
+        last_id = _last_event_id(request)
+        # Without a Last-Event-ID, the stream starts with the next event
+        if last_id is None:
+            last_id = self.history.last_id
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.wfile.write(b"retry: 3000\n\n")
+        handler.server.detach(handler.connection)
+        streamer.add(handler.connection, last_id, _TypeSelector(request.query.get("types", "")))
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Passes each request to the HealthServer, keeping connections alive between them."""
+
+    protocol_version = "HTTP/1.1"
+    timeout = CONNECTION_TIMEOUT
+    # The head and body are written separately; with Nagle's algorithm, the body of a response on
+    # a kept-alive connection waits for the client's delayed ACK, about 40 ms
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self.server.health.handle(self)
+
+    do_POST = do_GET
+
+    def version_string(self) -> str:
+        # Leave the Python version out of the Server header
+        return "DSTHealth"
+
+    def log_message(self, format, *args) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    """A ThreadingHTTPServer that knows the HealthServer it serves and bounds its threads."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], health: HealthServer, max_connections: int):
+        self.health = health
+        self._detached: Set[socket.socket] = set()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        super().__init__(address, _RequestHandler)
+
+    def process_request(self, request: socket.socket, client_address) -> None:
+        """Serve a connection on a new thread, or reject it if max_connections are served."""
+        if not self._slots.acquire(blocking=False):
+            logger.debug(f"Rejecting {client_address[0]}, all connections are in use")
+            try:
+                request.sendall(_BUSY_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def process_request_thread(self, request: socket.socket, client_address) -> None:
+        """Serve a connection and free its slot."""
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+    def detach(self, request: socket.socket) -> None:
+        """Leave a connection open when its request handler returns, e.g. for the event streamer."""
+        self._detached.add(request)
+
+    def shutdown_request(self, request: socket.socket) -> None:
+        """Close a connection whose request handler returned, unless it was detached."""
+        if request in self._detached:
+            self._detached.discard(request)
+            return
+        super().shutdown_request(request)
+
+
+_BUSY_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 11\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"Server busy"
+)
+
+
+def _read_request(handler: BaseHTTPRequestHandler) -> Tuple[Optional[Request], Optional[Response]]:
+    """
+    Read the body of a request whose request line and headers the HTTP server has parsed.
+
+    Args:
+        handler (BaseHTTPRequestHandler): The handler of the request's connection.
+
+    Returns:
+        Tuple[Optional[Request], Optional[Response]]: The request, or an error response if it
+        must be rejected.
+    """
+    headers = {name.lower(): value for name, value in handler.headers.items()}
+    if "transfer-encoding" in headers:
+        return None, Response(411, b"Request bodies must have a Content-Length")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        return None, Response(400, b"Invalid Content-Length")
+    if length < 0:
+        return None, Response(400, b"Invalid Content-Length")
+    if length > MAX_REQUEST_BYTES:
+        return None, Response(413, b"Request body too large")
+    body = handler.rfile.read(length) if length else b""
+    url = urlsplit(handler.path)
+    query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+    return Request(handler.command, url.path, query, headers, body), None
+
+
+def _respond(handler: BaseHTTPRequestHandler, response: Response) -> None:
+    """
+    Write a response.
+
+    Args:
+        handler (BaseHTTPRequestHandler): The handler of the request's connection.
+        response (Response): The response to write.
+    """
+    handler.send_response(response.status)
+    handler.send_header("Content-Type", response.content_type)
+    handler.send_header("Content-Length", str(len(response.body)))
+    if handler.close_connection:
+        handler.send_header("Connection", "close")
+    handler.end_headers()
+    handler.wfile.write(response.body)
+
+
+def _last_event_id(request: Request) -> Optional[int]:
+    """
+    Return the ID of the last event a resuming client has seen.
+
+    Args:
+        request (Request): The /events request.
+
+    Returns:
+        Optional[int]: The ID from the Last-Event-ID header or last_event_id parameter, if valid.
+    """
+    value = request.headers.get("last-event-id") or request.query.get("last_event_id")
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+class _TypeSelector:
+    """Matches event types against the patterns of a types query parameter."""
+
+    def __init__(self, types: str):
+        self.patterns = [pattern for pattern in types.split(",") if pattern]
+        self._matches: Dict[str, bool] = {}
+
+    def wants(self, event_type: str) -> bool:
+        """Check whether an event type matches one of the patterns, or there are none."""
+        if not self.patterns:
+            return True
+        wanted = self._matches.get(event_type)
+        if wanted is None:
+            wanted = any(fnmatch.fnmatchcase(event_type, pattern) for pattern in self.patterns)
+            self._matches[event_type] = wanted
+        return wanted
@@ -0,0 +1,362 @@
+"""
+Hot Reload Module
+
+This module provides a HandlerReloader class that loads the handler modules, and can watch
+the handlers directory and re-import modules whose source changed without restarting the
+log monitor.
+
+With lazy loading, a module is not imported at startup. Instead its source is scanned for
+the keywords it registers and a placeholder handler is registered for each; the module
+and its dependencies are imported the first time one of its keywords is seen, and the
+line that triggered the import is passed on to the module's real handlers.
+
+Each handler module's register_* functions are run against a staging EventRegistry and the
+result replaces the module's previous handlers in a single atomic swap, so lines already
+queued for dispatch are handled by either the old or the new handlers and none are lost.
+If a changed module fails to import or register, its previous handlers stay in place.
+
+Only the handler modules themselves are reloaded. Modules in common, such as the
+SharedState singleton, keep their state. State held inside a handler module, e.g. a
+GroupedEventHandler's pending events, starts over when that module is reloaded.
+"""
+
+import ast
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from common.event_registry import EventRegistry
+from common.log_record import LogRecord
+from common.startup import startup_report
+
+logger = logging.getLogger(__name__)
+
+
+def register_module(event_registry: EventRegistry, module) -> int:
+    """
+    Register all handlers of a module, replacing any it registered before.
+
+    Every function of the module whose name starts with 'register_' is called with a
+    staging registry. Only if all of them succeed are the module's handlers swapped in.
+
+    Args:
+        event_registry (EventRegistry): Registry for event handlers.
+        module: The imported handler module.
+
+    Returns:
+        int: The number of handlers registered for the module.
+
+    Raises:
+        Exception: Whatever a register function raised. The registry is left unchanged.
+    """
+    staging = EventRegistry()
+    for name in dir(module):
+        if name.startswith("register_"):
+            getattr(module, name)(staging)
+            logger.info(f"Registered handler: {name} from {module.__name__}")
+    return event_registry.replace_handlers(module.__name__, staging)
+
+
+def _string_constants(tree: ast.Module) -> Dict[str, str]:
+    """
+    Collect the module-level names assigned a string literal.
+
+    Args:
+        tree (ast.Module): The parsed module.
+
+    Returns:
+        Dict[str, str]: The string value of each such name.
+    """
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant):
+            if isinstance(node.value.value, str):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        constants[target.id] = node.value.value
+    return constants
+
+
+def scan_keywords(path: str) -> Optional[List[str]]:
+    """
+    Find the keywords a handler module registers without importing it.
+
+    Keywords must be string literals or module-level string constants passed as the
+    first argument of register_handler().
+
+    Args:
+        path (str): Path of the handler module's source file.
+
+    Returns:
+        Optional[List[str]]: The keywords, or None if the module registers no handlers,
+        cannot be parsed, or registers a keyword that is only known at runtime.
+    """
+    try:
+        with open(path, "r") as f:
+            tree = ast.parse(f.read(), path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    constants = _string_constants(tree)
+    keywords = []
+    for node in ast.walk(tree):
+        if not (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "register_handler"
+        ):
+            continue
+        argument = node.args[0] if node.args else None
+        if isinstance(argument, ast.Constant) and isinstance(argument.value, str):
+            keywords.append(argument.value)
+        elif isinstance(argument, ast.Name) and argument.id in constants:
+            keywords.append(constants[argument.id])
+        else:
+            return None
+    return keywords or None
+
+
+class LazyHandler:
+    """
+    Placeholder registered for a keyword of a handler module that is not imported yet.
+    """
+
+    def __init__(self, reloader: "HandlerReloader", module_name: str, keyword: str):
+        """
+        Initialize the LazyHandler.
+
+        Args:
+            reloader (HandlerReloader): The loader that imports the module.
+            module_name (str): Name of the handler module.
+            keyword (str): The keyword this placeholder is registered for.
+        """
+        self.reloader = reloader
+        self.module_name = module_name
+        self.keyword = keyword
+
+    def __call__(self, record: LogRecord) -> None:
+        """
+        Import the module and pass the record on to its handlers for this keyword.
+
+        Args:
+            record (LogRecord): The record that matched the keyword.
+        """
+        self.reloader.load_deferred(self.module_name, self.keyword)
+        self.reloader.event_registry.dispatch_to_owner(
+            self.module_name, self.keyword, record
+        )
+
+
+class HandlerReloader:
+    """
+    Loads handler modules from a package directory and reloads them when they change.
+
+    Changes are detected by polling the size and modification time of each module file,
+    which is cheap for the handful of files in the handlers directory.
+    """
+
+    def __init__(
+        self,
+        event_registry: EventRegistry,
+        directory: str,
+        package: str = "handlers",
+        interval: float = 1.0,
+        lazy: bool = False,
+    ):
+        """
+        Initialize the HandlerReloader.
+
+        Args:
+            event_registry (EventRegistry): Registry the handlers are registered in.
+            directory (str): Directory containing the handler modules.
+            package (str): Package name under which the modules are imported.
+            interval (float): Seconds between checks for changed modules.
+            lazy (bool): Import modules on the first line matching one of their keywords.
+        """
+        self.event_registry = event_registry
+        self.directory = directory
+        self.package = package
+        self.interval = interval
+        self.lazy = lazy
+        self.reloads = 0
+        self.failures = 0
+        self._status: Dict[str, Tuple[int, int]] = {}
+        self._deferred = set()
+        self._load_lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Return the size and modification time of each handler module file.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: File status keyed by module name.
+        """
+        status = {}
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".py") and entry.name != "__init__.py":
+                stat = entry.stat()
+                module_name = f"{self.package}.{entry.name[:-3]}"
+                status[module_name] = (stat.st_size, stat.st_mtime_ns)
+        return status
+
+    def _path(self, module_name: str) -> str:
+        """Return the source file of a handler module."""
+        return os.path.join(self.directory, module_name.rsplit(".", 1)[-1] + ".py")
+
+    def _import(self, module_name: str) -> bool:
+        """
+        Import or reload a handler module and swap in its handlers.
+
+        Args:
+            module_name (str): Fully qualified name of the module.
+
+        Returns:
+            bool: True if the module's handlers were replaced.
+        """
+        try:
+            module = sys.modules.get(module_name)
+            if module is None:
+                module = importlib.import_module(module_name)
+            else:
+                module = importlib.reload(module)
+            register_module(self.event_registry, module)
+            return True
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Error loading handler {module_name}: {str(e)}")
+            return False
+
+    def _defer(self, module_name: str) -> bool:
+        """
+        Register placeholders for a handler module instead of importing it.
+
+        Args:
+            module_name (str): Fully qualified name of the module.
+
+        Returns:
+            bool: True if placeholders were registered, False if the module must be imported.
+        """
+        keywords = scan_keywords(self._path(module_name))
+        if keywords is None:
+            return False
+        staging = EventRegistry()
+        for keyword in dict.fromkeys(keywords):
+            staging.register_handler(
+                keyword, LazyHandler(self, module_name, keyword), pass_record=True
+            )
+        self.event_registry.replace_handlers(module_name, staging)
+        self._deferred.add(module_name)
+        return True
+
+    def _load(self, module_name: str) -> bool:
+        """
+        Load a handler module, deferring its import if lazy loading is enabled.
+
+        Args:
+            module_name (str): Fully qualified name of the module.
+
+        Returns:
+            bool: True if the module's handlers or placeholders were registered.
+        """
+        with self._load_lock:
+            start = time.perf_counter()
+            self._deferred.discard(module_name)
+            if self.lazy and module_name not in sys.modules and self._defer(module_name):
+                action = "deferred"
+                loaded = True
+            else:
+                action = "imported"
+                loaded = self._import(module_name)
+            startup_report.add_module(module_name, action, time.perf_counter() - start)
+            return loaded
+
+    def load_deferred(self, module_name: str, keyword: str) -> None:
+        """
+        Import a deferred handler module, unless that already happened.
+
+        If the import fails, the module's placeholders are removed so the failure is
+        not repeated for every matching line.
+
+        Args:
+            module_name (str): Fully qualified name of the module.
+            keyword (str): The keyword whose first match triggered the import.
+        """
+        with self._load_lock:
+            if module_name not in self._deferred:
+                return
+            self._deferred.discard(module_name)
+            start = time.perf_counter()
+            if not self._import(module_name):
+                self.event_registry.replace_handlers(module_name, EventRegistry())
+            elapsed = time.perf_counter() - start
+            startup_report.add_module(module_name, "on demand", elapsed)
+            logger.info(
+                f"Loaded handler module {module_name} on first '{keyword}' "
+                f"in {elapsed * 1000:.1f} ms"
+            )
+
+    def load_all(self) -> None:
+        """Import every handler module, or defer it if lazy, and register its handlers."""
+        logger.info(f"Searching for handlers in: {self.directory}")
+        self._status = self._scan()
+        for module_name in sorted(self._status):
+            self._load(module_name)
+
+    def check(self) -> int:
+        """
+        Reload the handler modules that were added or changed since the last check.
+
+        Handlers of modules whose file was removed are deregistered.
+
+        Returns:
+            int: The number of modules reloaded or removed.
+        """
+        current = self._scan()
+        changed = sorted(
+            name for name, status in current.items() if self._status.get(name) != status
+        )
+        removed = sorted(set(self._status) - set(current))
+        self._status = current
+        if not changed and not removed:
+            return 0
+
+        importlib.invalidate_caches()
+        for module_name in changed:
+            logger.info(f"Reloading handler module {module_name}")
+            if self._load(module_name):
+                self.reloads += 1
+        for module_name in removed:
+            logger.info(f"Handler module {module_name} was removed")
+            with self._load_lock:
+                self._deferred.discard(module_name)
+                self.event_registry.replace_handlers(module_name, EventRegistry())
+                sys.modules.pop(module_name, None)
+        return len(changed) + len(removed)
+
+    def start(self) -> None:
+        """Start checking for changed modules on a background thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="handler-reloader", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop checking for changed modules."""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        """Check for changed modules every interval until stopped."""
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except OSError as e:
+                logger.error(f"Error checking handlers for changes: {str(e)}")
@@ -0,0 +1,343 @@
+"""
+Idle Manager Module
+
+This module provides an IdleManager that tracks how long a shard has been without players
+and saves resources while it is empty. It follows the player list of shared_state through
+the events published by the handlers, and once the shard has been empty for the configured
+number of seconds it escalates through these stages:
+
+- paused: the simulation is paused with TheNet:SetServerPaused(true)
+- low_power: an optional command is run, e.g. to lower the pod's CPU request
+- scale_down: an optional command is run, e.g. to scale the shard's deployment to zero
+
+Every stage publishes a SHARD_IDLE event, so other tools can act on it as well. When a player
+authenticates, the manager resumes the shard while handling that event, unpausing it and
+running an optional resume command, and publishes SHARD_IDLE with the stage "active". The
+time until the server logs that it unpaused is published as the resume latency in a
+SHARD_RESUMED event. Idle time and resume latency are also available from metrics().
+"""
+
+import logging
+import os
+import shlex
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from common.event_stream import (
+    PLAYER_JOIN,
+    PLAYER_LEAVE,
+    PLAYER_RESUME,
+    PLAYER_SPAWN,
+    ROSTER,
+    SERVER_UNPAUSED,
+    SHARD_IDLE,
+    SHARD_RESUMED,
+    EventPublisher,
+    ServerEvent,
+    event_publisher,
+)
+from common.game_commands import GameCommandExecutor, side_effects_suppressed
+from common.shared_state import SharedState, shared_state
+
+logger = logging.getLogger(__name__)
+
+# Idle stages, in the order they are reached
+IDLE_ACTIVE = "active"
+IDLE_EMPTY = "empty"
+IDLE_PAUSED = "paused"
+IDLE_LOW_POWER = "low_power"
+IDLE_SCALE_DOWN = "scale_down"
+
+# Events after which the player list may have changed
+ROSTER_EVENTS = frozenset((PLAYER_JOIN, PLAYER_LEAVE, PLAYER_RESUME, PLAYER_SPAWN, ROSTER))
+# Seconds an idle or resume command may run before it is killed
+HOOK_TIMEOUT = 60
+# Resume latencies kept for metrics
+LATENCY_HISTORY = 100
+
+
+class IdleManager:
+    """
+    Tracks the time a shard is without players and pauses, powers down or scales it down.
+
+    Used as an EventPublisher subscriber. Stages are reached on a background thread, which
+    starts once the log monitor has caught up with the log, so a player list reconstructed
+    from old log lines never triggers anything.
+    """
+
+    def __init__(
+        self,
+        shard: str = "",
+        state: SharedState = shared_state,
+        executor: Optional[GameCommandExecutor] = None,
+        pause_after: float = 120,
+        low_power_after: float = 600,
+        scale_down_after: float = 1800,
+        low_power_command: Optional[str] = None,
+        scale_down_command: Optional[str] = None,
+        resume_command: Optional[str] = None,
+        publisher: EventPublisher = event_publisher,
+    ):
+        """
+        Initialize the IdleManager.
+
+        Args:
+            shard (str): Name of the shard to manage. Events of other shards are ignored.
+            state (SharedState): The player state whose snapshot tells whether the shard is empty.
+            executor (Optional[GameCommandExecutor]): Executor used to pause and unpause the server.
+            pause_after (float): Seconds without players before the server is paused (0 disables).
+            low_power_after (float): Seconds without players before low power mode (0 disables).
+            scale_down_after (float): Seconds without players before scale-down is signalled (0 disables).
+            low_power_command (Optional[str]): Command run on entering low power mode.
+            scale_down_command (Optional[str]): Command run when scale-down is signalled.
+            resume_command (Optional[str]): Command run when a player returns after low power mode or scale-down.
+            publisher (EventPublisher): Publisher the idle events are published on.
+        """
+        self.shard = shard
+        self.state = state
+        self.executor = executor or GameCommandExecutor()
+        self.publisher = publisher
+        self.stages: List[Tuple[float, str]] = sorted(
+            (after, stage)
+            for after, stage in (
+                (pause_after, IDLE_PAUSED),
+                (low_power_after, IDLE_LOW_POWER),
+                (scale_down_after, IDLE_SCALE_DOWN),
+            )
+            if after > 0
+        )
+        self.commands: Dict[str, Optional[str]] = {
+            IDLE_LOW_POWER: low_power_command,
+            IDLE_SCALE_DOWN: scale_down_command,
+            IDLE_ACTIVE: resume_command,
+        }
+        self.empty_since: Optional[float] = time.time()
+        self.reached: List[str] = []
+        self.idle_seconds_total = 0.0
+        self.pauses = 0
+        self.resumes = 0
+        self.resume_latencies: Deque[float] = deque(maxlen=LATENCY_HISTORY)
+        self._resumed_at: Optional[float] = None
+        self._started = False
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def stage(self) -> str:
+        """The shard's current idle stage."""
+        if self.empty_since is None:
+            return IDLE_ACTIVE
+        return self.reached[-1] if self.reached else IDLE_EMPTY
+
+    def __call__(self, event: ServerEvent) -> None:
+        """
+        Follow the player list and unpause events of the shard. Used as an EventPublisher subscriber.
+
+        Args:
+            event (ServerEvent): The published event.
+        """
+        if event.shard and event.shard != self.shard:
+            return
+        if event.type in ROSTER_EVENTS:
+            self.update(event.time)
+        elif event.type == SERVER_UNPAUSED:
+            self._unpaused(event.time)
+
+    def update(self, at: Optional[float] = None) -> None:
+        """
+        Update the idle state from the current player list.
+
+        Args:
+            at (Optional[float]): Unix time of the change, the current time if not given.
+        """
+        at = time.time() if at is None else at
+        players = len(self.state.snapshot.players)
+        with self._condition:
+            if players and self.empty_since is not None:
+                self._resume(at)
+            elif not players and self.empty_since is None:
+                self.empty_since = at
+                self.reached = []
+                self._announce(IDLE_EMPTY, at)
+                self._condition.notify()
+
+    def start(self) -> None:
+        """Start reaching idle stages on a background thread, using the current player list."""
+        self.update()
+        with self._condition:
+            self._started = True
+        self._thread = threading.Thread(target=self._run, name="idle-manager", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and log the idle metrics."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+            logger.info(f"Idle metrics: {self.metrics()}")
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Return the idle time and resume latency metrics.
+
+        Returns:
+            Dict[str, Any]: The current stage, seconds idle now and in total, pauses, resumes,
+            and the last and highest resume latency in seconds, None if none was measured.
+        """
+        with self._condition:
+            idle = time.time() - self.empty_since if self.empty_since is not None else 0.0
+            latencies = self.resume_latencies
+            return {
+                "stage": self.stage,
+                "idle_seconds": max(idle, 0.0),
+                "idle_seconds_total": self.idle_seconds_total + max(idle, 0.0),
+                "pauses": self.pauses,
+                "resumes": self.resumes,
+                "last_resume_latency": latencies[-1] if latencies else None,
+                "max_resume_latency": max(latencies) if latencies else None,
+            }
+
+    def _run(self) -> None:
+        """Reach each idle stage when it is due, until stopped."""
+        with self._condition:
+            while not self._stopped:
+                due = self._next_stage()
+                if due is None:
+                    self._condition.wait()
+                    continue
+                at, stage = due
+                delay = at - time.time()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                self._enter(stage, time.time())
+
+    def _next_stage(self) -> Optional[Tuple[float, str]]:
+        """
+        Find the next idle stage and when it is due.
+
+        Returns:
+            Optional[Tuple[float, str]]: Unix time and name of the stage, or None if there is none.
+        """
+        if self.empty_since is None or not self._started:
+            return None
+        for after, stage in self.stages:
+            if stage not in self.reached:
+                return self.empty_since + after, stage
+        return None
+
+    def _enter(self, stage: str, at: float) -> None:
+        """
+        Enter an idle stage. Called with the lock held, so a player joining waits until the stage is entered.
+
+        Args:
+            stage (str): The stage to enter.
+            at (float): Unix time at which the stage is entered.
+        """
+        self.reached.append(stage)
+        logger.info(f"Shard {self.shard} has been empty for {at - self.empty_since:.0f}s, entering {stage}")
+        if stage == IDLE_PAUSED:
+            self.pauses += 1
+            self.executor.set_server_paused(True)
+        self._run_command(stage, at - self.empty_since)
+        self._announce(stage, at)
+
+    def _resume(self, at: float) -> None:
+        """
+        Resume the shard after a player joined. Called with the lock held.
+
+        Args:
+            at (float): Unix time at which the player joined.
+        """
+        idle = max(at - self.empty_since, 0.0)
+        reached = self.reached
+        self.idle_seconds_total += idle
+        self.empty_since = None
+        self.reached = []
+        if not self._started:
+            return
+        self.resumes += 1
+        self._resumed_at = at
+        logger.info(f"Player joined shard {self.shard} after {idle:.0f}s without players")
+        if IDLE_PAUSED in reached:
+            self.executor.set_server_paused(False)
+        if IDLE_LOW_POWER in reached or IDLE_SCALE_DOWN in reached:
+            self._run_command(IDLE_ACTIVE, idle)
+        self.publisher.publish(SHARD_IDLE, shard=self.shard, stage=IDLE_ACTIVE, idle_since=0.0, idle_seconds=idle)
+
+    def _unpaused(self, at: float) -> None:
+        """
+        Measure the resume latency when the server unpaused after a player joined.
+
+        Args:
+            at (float): Unix time at which the server unpaused.
+        """
+        with self._condition:
+            if self._resumed_at is None:
+                return
+            latency = max(at - self._resumed_at, 0.0)
+            self._resumed_at = None
+            self.resume_latencies.append(latency)
+        logger.info(f"Shard {self.shard} resumed {latency:.2f}s after a player joined")
+        self.publisher.publish(SHARD_RESUMED, shard=self.shard, resume_latency=latency)
+
+    def _announce(self, stage: str, at: float) -> None:
+        """
+        Publish an idle stage, once the background thread has started.
+
+        Args:
+            stage (str): The stage entered.
+            at (float): Unix time at which the stage was entered.
+        """
+        if self._started:
+            self.publisher.publish(
+                SHARD_IDLE,
+                shard=self.shard,
+                stage=stage,
+                idle_since=self.empty_since,
+                idle_seconds=max(at - self.empty_since, 0.0),
+            )
+
+    def _run_command(self, stage: str, idle_seconds: float) -> None:
+        """
+        Run the command configured for a stage on a separate thread, so a slow command does
+        not delay handling log lines.
+
+        Args:
+            stage (str): The stage whose command is run.
+            idle_seconds (float): Seconds the shard has been or was without players.
+        """
+        command = self.commands.get(stage)
+        if not command or side_effects_suppressed():
+            return
+        env = dict(
+            os.environ,
+            DST_IDLE_SHARD=self.shard,
+            DST_IDLE_STAGE=stage,
+            DST_IDLE_SECONDS=f"{idle_seconds:.0f}",
+        )
+        threading.Thread(
+            target=_run_hook, args=(stage, shlex.split(command), env), name=f"idle-{stage}", daemon=True
+        ).start()
+
+
+def _run_hook(stage: str, args: List[str], env: Dict[str, str]) -> None:
+    """
+    Run an idle stage command and log its failure.
+
+    Args:
+        stage (str): The stage the command belongs to.
+        args (List[str]): The command and its arguments.
+        env (Dict[str, str]): The command's environment.
+    """
+    try:
+        subprocess.run(args, env=env, check=True, timeout=HOOK_TIMEOUT, stdin=subprocess.DEVNULL)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.error(f"Command for idle stage {stage} failed: {str(e)}")
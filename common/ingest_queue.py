@@ -0,0 +1,271 @@
+"""
+Ingest Queue Module
+
+This module provides an IngestQueue class that sits between the log tail reader and the
+EventRegistry. The reader enqueues parsed LogRecord objects, and a dispatch thread hands
+them to the registry in order.
+
+The queue is bounded and applies a configurable backpressure policy when the reader
+outruns the handlers. Records whose server timestamp lags the newest line seen by more
+than a threshold are still dispatched, so shared state stays correct, but game commands
+issued while handling them are suppressed.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from common.event_registry import EventRegistry
+from common.game_commands import suppress_side_effects
+from common.log_record import LogRecord
+from common.profiling import profiler
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_BLOCK = "block"
+BACKPRESSURE_DROP_OLDEST = "drop-oldest"
+BACKPRESSURE_DROP_NEWEST = "drop-newest"
+BACKPRESSURE_POLICIES = (
+    BACKPRESSURE_BLOCK,
+    BACKPRESSURE_DROP_OLDEST,
+    BACKPRESSURE_DROP_NEWEST,
+)
+
+
+class IngestQueue:
+    """
+    A bounded queue that dispatches log records to an EventRegistry on a worker thread.
+
+    The queue tracks the newest server timestamp it has been told about (the log head)
+    and treats records older than stale_after seconds relative to that head as stale.
+    """
+
+    def __init__(
+        self,
+        event_registry: EventRegistry,
+        maxsize: int = 10000,
+        backpressure: str = BACKPRESSURE_BLOCK,
+        stale_after: Optional[float] = None,
+    ):
+        """
+        Initialize the IngestQueue.
+
+        Args:
+            event_registry (EventRegistry): Registry that handles dispatched records.
+            maxsize (int): Maximum number of queued records.
+            backpressure (str): One of BACKPRESSURE_POLICIES, applied when the queue is full.
+            stale_after (Optional[float]): Age in seconds after which side effects are skipped.
+                None or 0 disables shedding.
+
+        Raises:
+            ValueError: If maxsize is not positive or the backpressure policy is unknown.
+        """
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {backpressure}")
+
+        self.event_registry = event_registry
+        self.maxsize = maxsize
+        self.backpressure = backpressure
+        self.stale_after = stale_after or None
+
+        self.head_server_time: Optional[float] = None
+        self.enqueued = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.shed = 0
+
+        self._items: Deque[LogRecord] = deque()
+        self._unfinished = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._worker: Optional[threading.Thread] = None
+        self._shedding = False
+
+    def start(self) -> None:
+        """Start the dispatch worker thread."""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._worker = threading.Thread(
+            target=self._run, name="ingest-dispatch", daemon=True
+        )
+        self._worker.start()
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stop the dispatch worker after it has drained the queued records.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait for the worker to finish.
+
+        Returns:
+            bool: True if the worker exited, False if it is still dispatching a record.
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._worker:
+            self._worker.join(timeout)
+            if self._worker.is_alive():
+                return False
+            self._worker = None
+        return True
+
+    def advance_head(self, server_time: Optional[float]) -> None:
+        """
+        Record that the log contains a line with the given server timestamp.
+
+        Args:
+            server_time (Optional[float]): Server uptime in seconds of a known log line.
+        """
+        if server_time is None:
+            return
+        with self._condition:
+            if self.head_server_time is None or server_time > self.head_server_time:
+                self.head_server_time = server_time
+
+    def reset_head(self) -> None:
+        """Forget the log head, e.g. after the shard restarted with a new log file."""
+        with self._condition:
+            self.head_server_time = None
+
+    def put(self, record: LogRecord) -> bool:
+        """
+        Enqueue a parsed log record for dispatch.
+
+        Args:
+            record (LogRecord): The record to dispatch.
+
+        Returns:
+            bool: True if the record was queued, False if it was dropped.
+        """
+        server_time = record.server_time
+        with self._condition:
+            if server_time is not None and (
+                self.head_server_time is None or server_time > self.head_server_time
+            ):
+                self.head_server_time = server_time
+
+            if len(self._items) >= self.maxsize:
+                if self.backpressure == BACKPRESSURE_DROP_NEWEST:
+                    self._count_drop()
+                    return False
+                if self.backpressure == BACKPRESSURE_DROP_OLDEST:
+                    self._items.popleft()
+                    self._unfinished -= 1
+                    self._count_drop()
+                else:
+                    while len(self._items) >= self.maxsize and self._running:
+                        self._condition.wait()
+
+            self._items.append(record)
+            self._unfinished += 1
+            self.enqueued += 1
+            self._condition.notify_all()
+            return True
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued record has been dispatched.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait.
+
+        Returns:
+            bool: True if the queue drained, False if the timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._unfinished:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    @property
+    def items(self) -> Deque[LogRecord]:
+        """The records waiting to be dispatched. For inspection only, do not modify."""
+        return self._items
+
+    def qsize(self) -> int:
+        """Return the number of records waiting to be dispatched."""
+        with self._condition:
+            return len(self._items)
+
+    def is_stale(self, server_time: Optional[float]) -> bool:
+        """
+        Check whether a record logged at server_time is older than the staleness threshold.
+
+        Args:
+            server_time (Optional[float]): Server uptime in seconds of the record.
+
+        Returns:
+            bool: True if side effects for the record should be skipped.
+        """
+        if not self.stale_after or server_time is None or self.head_server_time is None:
+            return False
+        return self.head_server_time - server_time > self.stale_after
+
+    def _count_drop(self) -> None:
+        """Count a dropped line and log the first drop of each burst."""
+        self.dropped += 1
+        if self.dropped == 1 or self.dropped % 1000 == 0:
+            logger.warning(
+                f"Ingest queue full ({self.maxsize} lines), dropped {self.dropped} lines so far"
+            )
+
+    def _run(self) -> None:
+        """Dispatch queued records until stopped and drained."""
+        while True:
+            with self._condition:
+                while not self._items and self._running:
+                    self._condition.wait()
+                if not self._items:
+                    return
+                record = self._items.popleft()
+                self._condition.notify_all()
+
+            try:
+                self._dispatch(record)
+            finally:
+                with self._condition:
+                    self._unfinished -= 1
+                    self._condition.notify_all()
+
+    def _dispatch(self, record: LogRecord) -> None:
+        """
+        Dispatch a single record, suppressing side effects if it is stale.
+
+        Args:
+            record (LogRecord): The record to dispatch.
+        """
+        profiler.sync_thread()
+        started = time.perf_counter() if profiler.enabled else None
+        stale = self.is_stale(record.server_time)
+        if stale != self._shedding:
+            self._shedding = stale
+            if stale:
+                logger.warning(
+                    f"Ingest is lagging more than {self.stale_after}s behind the log, "
+                    "skipping side effects for stale events"
+                )
+            else:
+                logger.info(
+                    f"Ingest caught up with the log, {self.shed} stale events were shed"
+                )
+
+        if stale:
+            self.shed += 1
+            with suppress_side_effects("stale event"):
+                self.event_registry.handle_record(record)
+        else:
+            self.event_registry.handle_record(record)
+        self.dispatched += 1
+        if started is not None:
+            profiler.record("handler", time.perf_counter() - started)
@@ -0,0 +1,252 @@
+"""
+JSONL Sink Module
+
+This module provides a JsonlEventSink class that writes published ServerEvents to a file,
+one JSON object per line, for downstream analytics.
+
+Events are buffered in memory and written by a background thread in batches, when either
+max_batch events are pending or flush_interval seconds have passed since the first of
+them. How often the file is fsynced is configurable:
+
+- "batch": after every batch written, so at most one batch can be lost in a crash
+- "interval": at most once every fsync_interval seconds, and no later than fsync_interval
+  seconds after a write, even if no further events arrive
+- "never": leave it to the operating system
+
+When the file would grow past max_bytes, it is rotated to events.jsonl.1, the previous
+events.jsonl.1 to events.jsonl.2, and so on, keeping at most backups old files.
+
+Events that could not be written because of an error are counted in dropped, like those
+dropped when more than max_pending are buffered.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from common.event_stream import ServerEvent
+
+logger = logging.getLogger(__name__)
+
+FSYNC_BATCH = "batch"
+FSYNC_INTERVAL = "interval"
+FSYNC_NEVER = "never"
+FSYNC_POLICIES = (FSYNC_BATCH, FSYNC_INTERVAL, FSYNC_NEVER)
+
+
+class JsonlEventSink:
+    """
+    Writes events as JSON lines to a size-rotated file from a background thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_batch: int = 256,
+        flush_interval: float = 1.0,
+        fsync: str = FSYNC_INTERVAL,
+        fsync_interval: float = 5.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        backups: int = 5,
+        max_pending: int = 100000,
+    ):
+        """
+        Initialize the JsonlEventSink.
+
+        Args:
+            path (str): File the events are written to. Its directory is created if needed.
+            max_batch (int): Write as soon as this many events are pending.
+            flush_interval (float): Write pending events at the latest this many seconds after the first.
+            fsync (str): One of FSYNC_POLICIES.
+            fsync_interval (float): Minimum seconds between fsyncs with the "interval" policy.
+            max_bytes (int): Rotate the file before it grows past this size, 0 to never rotate.
+            backups (int): Number of rotated files kept.
+            max_pending (int): Events buffered before the oldest are dropped.
+
+        Raises:
+            ValueError: If the fsync policy is unknown.
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.path = path
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+
+        self._pending: Deque[str] = deque(maxlen=max_pending)
+        self._first_pending_at: Optional[float] = None
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._size = 0
+        self._last_fsync = 0.0
+        self._unsynced = False
+
+    def __call__(self, event: ServerEvent) -> None:
+        """
+        Buffer an event for writing. Used as an EventPublisher subscriber.
+
+        Args:
+            event (ServerEvent): The event to write.
+        """
+        line = event.to_json() + "\n"
+        with self._condition:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending.append(line)
+            # The writer waits without a deadline while nothing is pending
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._condition.notify()
+
+    def start(self) -> None:
+        """Open the file and start the writer thread."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._open()
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="jsonl-sink", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write every pending event, fsync and close the file."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._write_batch(self._take_pending())
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def _open(self) -> None:
+        """Open the event file for appending."""
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+
+    def _take_pending(self):
+        """Remove and return all pending lines."""
+        with self._condition:
+            lines = list(self._pending)
+            self._pending.clear()
+            self._first_pending_at = None
+        return lines
+
+    def _next_deadline(self) -> Optional[float]:
+        """
+        Return when the writer thread has work due. Called with the lock held.
+
+        Returns:
+            Optional[float]: Monotonic time at which pending events are to be written or
+            written events fsynced, or None if nothing is due.
+        """
+        if len(self._pending) >= self.max_batch:
+            return time.monotonic()
+        deadlines = []
+        if self._first_pending_at is not None:
+            deadlines.append(self._first_pending_at + self.flush_interval)
+        if self._unsynced:
+            deadlines.append(self._last_fsync + self.fsync_interval)
+        return min(deadlines) if deadlines else None
+
+    def _run(self) -> None:
+        """Write batches and fsync written events when due, until stopped."""
+        while True:
+            with self._condition:
+                while self._running:
+                    deadline = self._next_deadline()
+                    if deadline is None:
+                        self._condition.wait()
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if not self._running:
+                    return
+            lines = self._take_pending()
+            written = self.written
+            try:
+                self._write_batch(lines)
+                if self._unsynced and time.monotonic() - self._last_fsync >= self.fsync_interval:
+                    self._sync()
+            except OSError as e:
+                lost = len(lines) - (self.written - written)
+                with self._condition:
+                    self.dropped += lost
+                logger.error(f"Error writing events to {self.path}, dropped {lost}: {str(e)}")
+
+    def _write_batch(self, lines) -> None:
+        """
+        Write a batch of lines, rotating the file whenever the next line would grow it too large.
+
+        Args:
+            lines: The JSON lines to write, each ending in a newline.
+        """
+        if not lines:
+            return
+        chunk = []
+        chunk_size = 0
+        for line in lines:
+            data = line.encode("utf-8")
+            if self.max_bytes and self._size + chunk_size + len(data) > self.max_bytes:
+                if chunk:
+                    self._file.write(b"".join(chunk))
+                    self._size += chunk_size
+                    chunk = []
+                    chunk_size = 0
+                if self._size:
+                    self._rotate()
+            chunk.append(data)
+            chunk_size += len(data)
+        self._file.write(b"".join(chunk))
+        self._file.flush()
+        self._size += chunk_size
+        self.written += len(lines)
+        self.batches += 1
+        if self.fsync == FSYNC_BATCH:
+            self._sync()
+        elif self.fsync == FSYNC_INTERVAL:
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._sync()
+            else:
+                # Synced by the writer thread once the interval has passed
+                self._unsynced = True
+
+    def _sync(self) -> None:
+        """Flush the file to disk, unless the policy is "never"."""
+        if self.fsync != FSYNC_NEVER:
+            os.fsync(self._file.fileno())
+            self._last_fsync = time.monotonic()
+            self._unsynced = False
+
+    def _rotate(self) -> None:
+        """Move the current file to the first backup and start a new one."""
+        self._sync()
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+        self._open()
@@ -0,0 +1,161 @@
+"""
+Line Filter Module
+
+This module provides a KeywordPrefilter class that finds the log lines containing a
+registered keyword directly in a raw bytes buffer. Most DST server log lines match no
+handler, so the buffer is searched once with a compiled bytes pattern and only the
+matching lines are sliced out through a memoryview and decoded. Decoding uses a
+tolerant error handler, so player names that are not valid UTF-8 cannot break ingest.
+"""
+
+import re
+from typing import Iterable, Iterator, Optional, Tuple
+
+from common.event_registry import EventRegistry
+from common.log_record import parse_server_time
+
+# Matched lines are decoded with this error handler
+DECODE_ERRORS = "replace"
+
+# Matches nothing, used while no handlers are registered
+_NO_MATCH = re.compile(b"(?!)")
+
+
+def decode_line(buffer, start: int, end: int) -> str:
+    """
+    Decode one line of a bytes buffer without copying it first.
+
+    Args:
+        buffer: A bytes-like object holding raw log data.
+        start (int): Offset of the first byte of the line.
+        end (int): Offset just past the last byte of the line.
+
+    Returns:
+        str: The decoded line with surrounding whitespace removed.
+    """
+    return str(memoryview(buffer)[start:end], "utf-8", DECODE_ERRORS).strip()
+
+
+def last_server_time(buffer, start: int, end: int) -> Optional[int]:
+    """
+    Find the timestamp of the last timestamped line in a range of a bytes buffer.
+
+    Lines are examined from the end of the range backwards, so this is cheap when the
+    range ends with a timestamped line, which is almost always the case for DST logs.
+
+    Args:
+        buffer: A bytes-like object with find/rfind, e.g. bytes or mmap.
+        start (int): Offset of the start of the range.
+        end (int): Offset just past the end of the range.
+
+    Returns:
+        Optional[int]: The uptime in seconds of the last timestamped line, or None if none was found.
+    """
+    line_end = end
+    while line_end > start:
+        line_start = buffer.rfind(b"\n", start, line_end - 1) + 1
+        if line_start < start:
+            line_start = start
+        if buffer[line_start:line_start + 1] == b"[":
+            server_time = parse_server_time(decode_line(buffer, line_start, line_end))
+            if server_time is not None:
+                return server_time
+        line_end = line_start
+    return None
+
+
+def compile_keywords(keywords: Iterable[str]):
+    """
+    Compile keywords into a single bytes pattern matching any of them.
+
+    Args:
+        keywords (Iterable[str]): Keywords to match.
+
+    Returns:
+        A compiled bytes regular expression.
+    """
+    encoded = sorted(
+        (keyword.encode("utf-8") for keyword in keywords if keyword),
+        key=len,
+        reverse=True,
+    )
+    if not encoded:
+        return _NO_MATCH
+    return re.compile(b"|".join(re.escape(keyword) for keyword in encoded))
+
+
+def iter_matching_lines(
+    pattern, buffer, start: int = 0, end: Optional[int] = None
+) -> Iterator[Tuple[int, int]]:
+    """
+    Yield the byte ranges of lines in a buffer that match a compiled bytes pattern.
+
+    Args:
+        pattern: Compiled bytes pattern, see compile_keywords().
+        buffer: A bytes-like object with find/rfind, e.g. bytes or mmap.
+        start (int): Offset at which a line starts and the search begins.
+        end (Optional[int]): Offset just past the last line to search. Defaults to the buffer length.
+
+    Yields:
+        Tuple[int, int]: Start and end offsets of each matching line, excluding the newline.
+    """
+    if end is None:
+        end = len(buffer)
+    search = pattern.search
+    position = start
+    while position < end:
+        match = search(buffer, position, end)
+        if match is None:
+            return
+        line_start = buffer.rfind(b"\n", position, match.start()) + 1
+        if line_start < position:
+            line_start = position
+        line_end = buffer.find(b"\n", match.end(), end)
+        if line_end < 0:
+            line_end = end
+        yield line_start, line_end
+        position = line_end + 1
+
+
+class KeywordPrefilter:
+    """
+    Finds lines in raw log data that contain any keyword registered in an EventRegistry.
+
+    The compiled pattern is rebuilt whenever the registry's handlers change.
+    """
+
+    def __init__(self, event_registry: EventRegistry):
+        """
+        Initialize the KeywordPrefilter.
+
+        Args:
+            event_registry (EventRegistry): Registry whose keywords are matched.
+        """
+        self.event_registry = event_registry
+        self._version = None
+        self._pattern = _NO_MATCH
+
+    @property
+    def pattern(self):
+        """The compiled bytes pattern matching any registered keyword."""
+        version = self.event_registry.version
+        if version != self._version:
+            self._pattern = compile_keywords(self.event_registry.keywords())
+            self._version = version
+        return self._pattern
+
+    def matching_lines(
+        self, buffer, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        Yield the byte ranges of lines in a buffer that contain a registered keyword.
+
+        Args:
+            buffer: A bytes-like object with find/rfind, e.g. bytes or mmap.
+            start (int): Offset at which a line starts and the search begins.
+            end (Optional[int]): Offset just past the last line to search. Defaults to the buffer length.
+
+        Yields:
+            Tuple[int, int]: Start and end offsets of each matching line, excluding the newline.
+        """
+        return iter_matching_lines(self.pattern, buffer, start, end)
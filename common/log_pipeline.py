@@ -0,0 +1,228 @@
+"""
+Log Pipeline Module
+
+This module moves the monitor's own logging off the threads that call the logger. Log
+records are put on a bounded in-memory queue by a QueueHandler and formatted and written
+by a QueueListener on a background thread, so a slow stderr or a burst of debug output no
+longer stalls the dispatch thread.
+
+Messages are formatted on the writer thread as well, as long as their arguments are
+immutable. Callers on the hot path should log with %-style arguments, e.g.
+logger.debug("Collecting line: %s", line), so nothing is formatted at all when the
+level is disabled.
+
+A DuplicateFilter on the writer suppresses messages repeated within a time window; the
+next time such a message is written, it says how often it was repeated in the meantime.
+"""
+
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Record arguments of these types can safely be formatted later on the writer thread
+_IMMUTABLE_TYPES = (str, int, float, bool, bytes, type(None))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+_lock = threading.Lock()
+
+
+class DuplicateFilter(logging.Filter):
+    """
+    Suppresses log messages that repeat within a time window.
+
+    The first occurrence of a message is passed through. Repeats within window seconds
+    are dropped and counted; the next occurrence after the window is passed through with
+    the number of suppressed repeats appended.
+    """
+
+    def __init__(self, window: float = 10.0, clock=time.monotonic):
+        """
+        Initialize the DuplicateFilter.
+
+        Args:
+            window (float): Seconds during which repeats of a message are suppressed.
+            clock: Function returning the current time in seconds.
+        """
+        super().__init__()
+        self.window = window
+        self.clock = clock
+        self.suppressed = 0
+        self._seen: Dict[Tuple[str, int, str], Tuple[float, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Decide whether a record is written.
+
+        Args:
+            record (logging.LogRecord): The record to check.
+
+        Returns:
+            bool: False if the record repeats a message seen within the window.
+        """
+        message = record.getMessage()
+        key = (record.name, record.levelno, message)
+        now = self.clock()
+        seen = self._seen.get(key)
+        if seen is not None and now - seen[0] < self.window:
+            self._seen[key] = (seen[0], seen[1] + 1)
+            self.suppressed += 1
+            return False
+
+        if seen is not None and seen[1]:
+            record.msg = f"{message} (repeated {seen[1]} more times)"
+            record.args = None
+        self._seen[key] = (now, 0)
+        if len(self._seen) > 10000:
+            self._expire(now)
+        return True
+
+    def _expire(self, now: float) -> None:
+        """Forget messages whose window has passed."""
+        self._seen = {
+            key: seen for key, seen in self._seen.items() if now - seen[0] < self.window
+        }
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler that drops records instead of blocking when the queue is full, and
+    defers formatting to the writer thread where that is safe.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        """
+        Initialize the DroppingQueueHandler.
+
+        Args:
+            log_queue (queue.Queue): The bounded queue records are put on.
+        """
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Prepare a record for the queue.
+
+        Records whose arguments could change before the writer formats them are
+        formatted now; all others are passed on unformatted.
+
+        Args:
+            record (logging.LogRecord): The record to prepare.
+
+        Returns:
+            logging.LogRecord: The record to enqueue.
+        """
+        args = record.args
+        if args and not (
+            isinstance(args, tuple) and all(isinstance(arg, _IMMUTABLE_TYPES) for arg in args)
+        ):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            # Traceback objects keep whole stack frames alive, so render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Put a record on the queue, dropping it if the queue is full.
+
+        Args:
+            record (logging.LogRecord): The record to enqueue.
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(
+    level: int = logging.INFO,
+    queue_size: int = 10000,
+    duplicate_window: float = 10.0,
+    stream=None,
+) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a background writer thread.
+
+    Calling this again replaces the previous configuration.
+
+    Args:
+        level (int): Level of the root logger.
+        queue_size (int): Records buffered before further records are dropped.
+        duplicate_window (float): Seconds during which repeated messages are suppressed, 0 to disable.
+        stream: Stream the records are written to. Defaults to stderr.
+
+    Returns:
+        logging.handlers.QueueListener: The running listener.
+    """
+    global _listener, _queue_handler
+    stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+    if duplicate_window > 0:
+        output.addFilter(DuplicateFilter(duplicate_window))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    with _lock:
+        _queue_handler = DroppingQueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(
+            log_queue, output, respect_handler_level=True
+        )
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+        _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """
+    Write out every queued record and stop the background writer.
+
+    Records logged afterwards are written directly to stderr.
+    """
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is None:
+            return
+        root = logging.getLogger()
+        root.removeHandler(_queue_handler)
+        _listener.stop()
+        fallback = logging.StreamHandler(sys.stderr)
+        fallback.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(fallback)
+        if _queue_handler.dropped:
+            root.warning(f"{_queue_handler.dropped} log records were dropped, the log queue was full")
+        _listener = None
+        _queue_handler = None
+
+
+def logging_stats() -> Dict[str, int]:
+    """
+    Return counters of the background log writer.
+
+    Returns:
+        Dict[str, int]: Records dropped because the queue was full, and repeated messages suppressed.
+    """
+    stats = {"dropped": 0, "suppressed": 0}
+    with _lock:
+        if _queue_handler is not None:
+            stats["dropped"] = _queue_handler.dropped
+        if _listener is not None:
+            for handler in _listener.handlers:
+                for log_filter in handler.filters:
+                    if isinstance(log_filter, DuplicateFilter):
+                        stats["suppressed"] += log_filter.suppressed
+    return stats
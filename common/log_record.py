@@ -0,0 +1,206 @@
+"""
+Log Record Module
+
+This module turns raw Don't Starve Together (DST) server log lines into small structured
+records. DST prefixes every line with the shard uptime, e.g. "[01:23:45]: Spawn request: ...".
+The parser keeps that timestamp as monotonic server time, estimates the wall-clock time
+of the line from an anchor at shard start, and strips the prefix to get the message body
+that handlers match keywords against.
+"""
+
+import os
+import time
+from typing import NamedTuple, Optional
+
+# Bytes read from the end of a log file to find its newest timestamp
+TAIL_PROBE_BYTES = 4096
+
+
+class LogRecord(NamedTuple):
+    """
+    A parsed DST server log line.
+
+    Attributes:
+        server_time (Optional[float]): Shard uptime in seconds when the line was logged.
+            Lines without a timestamp inherit the previous line's time.
+        wall_time (Optional[float]): Estimated Unix time when the line was logged.
+        shard (str): Name of the shard that wrote the line, e.g. "Master" or "Caves".
+        body (str): The message with the timestamp prefix removed.
+    """
+
+    server_time: Optional[float]
+    wall_time: Optional[float]
+    shard: str
+    body: str
+
+
+def parse_server_time(line: str) -> Optional[int]:
+    """
+    Parse the uptime timestamp at the start of a DST log line.
+
+    This avoids regular expressions since it runs for every line in the log.
+
+    Args:
+        line (str): The raw log line.
+
+    Returns:
+        Optional[int]: The shard uptime in seconds, or None if the line has no timestamp.
+
+    Example:
+        >>> parse_server_time("[01:02:03]: Server Unpaused")
+        3723
+    """
+    if not line.startswith("["):
+        return None
+    end = line.find("]:", 6, 16)
+    if end < 0:
+        return None
+    parts = line[1:end].split(":")
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        return None
+    hours, minutes, seconds = parts
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def read_last_server_time(fileno: int, size: int) -> Optional[int]:
+    """
+    Find the newest timestamp in a log file by reading only its last few kilobytes.
+
+    Args:
+        fileno (int): File descriptor of the open log file.
+        size (int): Size of the file in bytes.
+
+    Returns:
+        Optional[int]: The uptime in seconds of the last timestamped line, or None if none was found.
+    """
+    offset = max(0, size - TAIL_PROBE_BYTES)
+    tail = os.pread(fileno, size - offset, offset)
+    for line in reversed(tail.decode("utf-8", "replace").splitlines()):
+        server_time = parse_server_time(line)
+        if server_time is not None:
+            return server_time
+    return None
+
+
+def strip_timestamp(line: str) -> str:
+    """
+    Strip the timestamp prefix from a log line.
+
+    Args:
+        line (str): The raw log line.
+
+    Returns:
+        str: The message body of the line.
+    """
+    return line.split("]:", 1)[-1].strip()
+
+
+class ShardClock:
+    """
+    Estimates wall-clock time for a shard's uptime timestamps.
+
+    The clock keeps an anchor, the Unix time at which the shard's uptime was zero.
+    Each observation of a line's uptime together with a Unix time at or after which it
+    was logged bounds the anchor from above, so the smallest bound seen is kept.
+    """
+
+    def __init__(self):
+        """Initialize the ShardClock without an anchor."""
+        self.anchor: Optional[float] = None
+
+    def observe(self, server_time: Optional[float], wall_time: float) -> None:
+        """
+        Record that a line with the given uptime had been logged by wall_time.
+
+        Args:
+            server_time (Optional[float]): Shard uptime in seconds of the line.
+            wall_time (float): A Unix time at or after which the line was written.
+        """
+        if server_time is None:
+            return
+        candidate = wall_time - server_time
+        if self.anchor is None or candidate < self.anchor:
+            self.anchor = candidate
+
+    def wall_time(self, server_time: Optional[float]) -> Optional[float]:
+        """
+        Estimate the Unix time for a shard uptime.
+
+        Args:
+            server_time (Optional[float]): Shard uptime in seconds.
+
+        Returns:
+            Optional[float]: The estimated Unix time, or None if it cannot be estimated yet.
+        """
+        if server_time is None or self.anchor is None:
+            return None
+        return self.anchor + server_time
+
+    def reset(self) -> None:
+        """Forget the anchor, e.g. after the shard restarted with a new log file."""
+        self.anchor = None
+
+
+class LogLineParser:
+    """
+    Parses consecutive lines of one shard's log into LogRecord objects.
+
+    The parser is stateful: lines without a timestamp (such as multi-line output)
+    inherit the server time of the previous timestamped line.
+    """
+
+    def __init__(self, shard: str, clock: Optional[ShardClock] = None):
+        """
+        Initialize the LogLineParser.
+
+        Args:
+            shard (str): Name of the shard whose log is parsed.
+            clock (Optional[ShardClock]): Clock used to estimate wall-clock times.
+        """
+        self.shard = shard
+        self.clock = clock or ShardClock()
+        self.last_server_time: Optional[int] = None
+
+    def parse(self, line: str, observed_at: Optional[float] = None) -> LogRecord:
+        """
+        Parse a raw log line into a LogRecord.
+
+        Args:
+            line (str): The raw log line.
+            observed_at (Optional[float]): Unix time at which the line was read. Defaults to now.
+
+        Returns:
+            LogRecord: The structured record for the line.
+        """
+        server_time = parse_server_time(line)
+        if server_time is None:
+            server_time = self.last_server_time
+        else:
+            self.last_server_time = server_time
+            self.clock.observe(
+                server_time, time.time() if observed_at is None else observed_at
+            )
+        return LogRecord(
+            server_time,
+            self.clock.wall_time(server_time),
+            self.shard,
+            strip_timestamp(line),
+        )
+
+    def advance(self, server_time: Optional[int], observed_at: Optional[float] = None) -> None:
+        """
+        Account for a timestamped line that was skipped without being parsed.
+
+        Args:
+            server_time (Optional[int]): Uptime in seconds of the skipped line.
+            observed_at (Optional[float]): Unix time at which the line was read. Defaults to now.
+        """
+        if server_time is None:
+            return
+        self.last_server_time = server_time
+        self.clock.observe(server_time, time.time() if observed_at is None else observed_at)
+
+    def reset(self) -> None:
+        """Reset the parser for a new log file of the same shard."""
+        self.last_server_time = None
+        self.clock.reset()
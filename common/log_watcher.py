@@ -0,0 +1,261 @@
+"""
+Log Watcher Module
+
+This module provides event sources that tell the log monitor when the server log changed.
+InotifyLogWatcher watches the log file's inode itself rather than its directory, so save
+files, session files and mod configs written next to the log no longer wake the monitor.
+Bursts of modify notifications are merged into a single callback. Where inotify is not
+available, PollingLogWatcher checks the file with an adaptive polling interval instead.
+
+The callback receives a flag that is True when the file was moved or deleted, e.g. when
+the shard restarts with a new log, so the reader can start over from the beginning.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_MOVE_SELF = 0x00000800
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_MOVE_SELF | IN_DELETE_SELF
+ROTATION_MASK = IN_MOVE_SELF | IN_DELETE_SELF | IN_IGNORED
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+ChangeCallback = Callable[[bool], None]
+
+
+def _load_libc():
+    """
+    Load the C library if it provides inotify.
+
+    Returns:
+        The ctypes library handle, or None if inotify is unavailable.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    return libc
+
+
+class InotifyLogWatcher:
+    """
+    Watches a single log file with inotify on a background thread.
+
+    After the first notification of a burst, the watcher waits coalesce_delay seconds
+    and drains every pending notification, then calls the callback once.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        on_change: ChangeCallback,
+        coalesce_delay: float = 0.05,
+    ):
+        """
+        Initialize the InotifyLogWatcher.
+
+        Args:
+            path (str): Path of the log file to watch.
+            on_change (ChangeCallback): Called with rotated=True/False after each burst of changes.
+            coalesce_delay (float): Seconds to wait for further notifications before calling back.
+
+        Raises:
+            OSError: If inotify is not available on this system.
+        """
+        self._libc = _load_libc()
+        if self._libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.path = path
+        self.on_change = on_change
+        self.coalesce_delay = coalesce_delay
+        self.notifications = 0
+        self.wakeups = 0
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._wd = -1
+        self._stopped = threading.Event()
+        self._wake_read, self._wake_write = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start watching and report the current contents of the file once."""
+        self._add_watch()
+        self._thread = threading.Thread(
+            target=self._run, name="log-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching and release the inotify descriptor."""
+        self._stopped.set()
+        os.write(self._wake_write, b"x")
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._fd, self._wake_read, self._wake_write):
+            os.close(fd)
+
+    def _add_watch(self) -> None:
+        """Watch the log file, waiting for it to exist if it was rotated away."""
+        while not self._stopped.is_set():
+            self._wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(self.path), WATCH_MASK
+            )
+            if self._wd >= 0:
+                return
+            error = ctypes.get_errno()
+            if error != errno.ENOENT:
+                raise OSError(error, os.strerror(error))
+            self._stopped.wait(0.5)
+
+    def _drain(self) -> int:
+        """
+        Read every pending notification.
+
+        Returns:
+            int: The combined mask of the notifications read.
+        """
+        mask = 0
+        while True:
+            try:
+                data = os.read(self._fd, 4096)
+            except BlockingIOError:
+                return mask
+            offset = 0
+            while offset < len(data):
+                _, event_mask, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+                mask |= event_mask
+                self.notifications += 1
+                offset += _EVENT_HEADER.size + name_length
+
+    def _run(self) -> None:
+        """Wait for notifications and call back once per burst until stopped."""
+        poller = select.poll()
+        poller.register(self._fd, select.POLLIN)
+        poller.register(self._wake_read, select.POLLIN)
+
+        self.on_change(False)
+        while not self._stopped.is_set():
+            poller.poll()
+            if self._stopped.wait(self.coalesce_delay):
+                return
+            mask = self._drain()
+            rotated = bool(mask & ROTATION_MASK)
+            if rotated:
+                logger.info(f"Log file was moved or deleted, re-watching {self.path}")
+                self._libc.inotify_rm_watch(self._fd, self._wd)
+                self._drain()
+                self._add_watch()
+            self.wakeups += 1
+            self.on_change(rotated)
+
+
+class PollingLogWatcher:
+    """
+    Watches a single log file by polling its status on a background thread.
+
+    The polling interval starts at min_interval after a change and grows up to
+    max_interval while the file stays unchanged.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        on_change: ChangeCallback,
+        min_interval: float = 0.1,
+        max_interval: float = 2.0,
+    ):
+        """
+        Initialize the PollingLogWatcher.
+
+        Args:
+            path (str): Path of the log file to watch.
+            on_change (ChangeCallback): Called with rotated=True/False after each detected change.
+            min_interval (float): Polling interval in seconds right after a change.
+            max_interval (float): Longest polling interval in seconds while the file is idle.
+        """
+        self.path = path
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.wakeups = 0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start polling and report the current contents of the file once."""
+        self._thread = threading.Thread(
+            target=self._run, name="log-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _status(self):
+        """Return the identity and size of the log file, or None if it is missing."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _run(self) -> None:
+        """Poll the file and call back on changes until stopped."""
+        last = self._status()
+        interval = self.min_interval
+        self.on_change(False)
+        while not self._stopped.wait(interval):
+            current = self._status()
+            if current == last:
+                interval = min(interval * 1.5, self.max_interval)
+                continue
+            rotated = current is None or last is None or current[0] != last[0]
+            last = current
+            interval = self.min_interval
+            if current is not None:
+                self.wakeups += 1
+                self.on_change(rotated)
+
+
+def create_log_watcher(path: str, on_change: ChangeCallback, **kwargs):
+    """
+    Create the best available watcher for a log file.
+
+    Args:
+        path (str): Path of the log file to watch.
+        on_change (ChangeCallback): Called with rotated=True/False after each change.
+        **kwargs: Passed to PollingLogWatcher if inotify is unavailable.
+
+    Returns:
+        An InotifyLogWatcher, or a PollingLogWatcher if inotify is unavailable.
+    """
+    try:
+        return InotifyLogWatcher(path, on_change)
+    except OSError as e:
+        logger.warning(f"inotify unavailable ({e}), falling back to polling")
+        return PollingLogWatcher(path, on_change, **kwargs)
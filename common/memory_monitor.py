@@ -0,0 +1,376 @@
+"""
+Memory Monitor Module
+
+This module provides a MemoryMonitor class that watches the memory use of the log monitor,
+which runs for weeks in the same pod as the game server. It reports:
+
+- the resident set size (RSS) of the process, and the pod's cgroup usage and limit
+- the number of items and approximate size of long-lived structures, such as the players
+  in shared_state and the lines collected by GroupedEventHandler instances
+- the top allocating source lines from tracemalloc, while tracing is enabled
+
+A background thread samples these at a fixed interval and logs a warning when RSS has grown
+past a threshold since startup, or a structure has grown past a size that suggests a leak.
+"""
+
+import gc
+import logging
+import os
+import sys
+import threading
+import tracemalloc
+import types
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from common.grouped_events import GroupedEventHandler
+from common.shared_state import shared_state
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# cgroup v2 and v1 files holding the pod's memory usage and limit
+CGROUP_FILES = (
+    ("/sys/fs/cgroup/memory.current", "/sys/fs/cgroup/memory.max"),
+    (
+        "/sys/fs/cgroup/memory/memory.usage_in_bytes",
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+    ),
+)
+
+# Objects that are measured without following their references
+_OPAQUE_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.CodeType,
+    types.FrameType,
+    threading.Thread,
+    logging.Logger,
+)
+
+
+def read_rss() -> int:
+    """
+    Return the resident set size of this process.
+
+    Returns:
+        int: The RSS in bytes, or 0 if it cannot be determined.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def read_cgroup_memory() -> Optional[tuple]:
+    """
+    Return the memory usage and limit of the cgroup this process runs in.
+
+    Returns:
+        Optional[tuple]: (usage, limit) in bytes, limit None if unlimited, or None if the
+        cgroup files are not available.
+    """
+    for usage_path, limit_path in CGROUP_FILES:
+        try:
+            with open(usage_path, "r") as f:
+                usage = int(f.read())
+            with open(limit_path, "r") as f:
+                limit = f.read().strip()
+        except (OSError, ValueError):
+            continue
+        return usage, None if limit == "max" or int(limit) >= 2**62 else int(limit)
+    return None
+
+
+def deep_size(obj: Any, max_objects: int = 100000) -> int:
+    """
+    Estimate the memory used by an object and the objects it contains.
+
+    Containers and the attributes of plain instances are followed; functions, classes,
+    modules and threads are counted without following their references.
+
+    Args:
+        obj (Any): The object to measure.
+        max_objects (int): Stop after visiting this many objects.
+
+    Returns:
+        int: The approximate size in bytes.
+    """
+    seen = set()
+    pending = [obj]
+    total = 0
+    while pending and len(seen) < max_objects:
+        current = pending.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, (str, bytes, int, float, bool)) or current is None:
+            continue
+        if isinstance(current, _OPAQUE_TYPES):
+            continue
+        if isinstance(current, dict):
+            for key, value in list(current.items()):
+                pending.append(key)
+                pending.append(value)
+        elif isinstance(current, (list, tuple, set, frozenset, deque)):
+            pending.extend(list(current))
+        elif hasattr(current, "__dict__"):
+            pending.append(current.__dict__)
+    return total
+
+
+def _grouped_event_lines() -> List[str]:
+    """Return the lines held by all live GroupedEventHandler instances."""
+    return [
+        line
+        for handler in list(GroupedEventHandler.instances)
+        for line in handler.event_lines
+    ]
+
+
+@dataclass
+class StructureStats:
+    """
+    Size of one monitored structure at the time of a sample.
+
+    Attributes:
+        items (int): Number of items in the structure.
+        size (int): Approximate size in bytes, including the items.
+    """
+
+    items: int
+    size: int
+
+
+@dataclass
+class MemorySample:
+    """
+    Memory use of the process at one point in time.
+
+    Attributes:
+        rss (int): Resident set size in bytes.
+        structures (Dict[str, StructureStats]): Size of each monitored structure.
+    """
+
+    rss: int
+    structures: Dict[str, StructureStats] = field(default_factory=dict)
+
+
+class MemoryMonitor:
+    """
+    Samples process memory and monitored structures, and warns about growth.
+    """
+
+    def __init__(
+        self,
+        interval: float = 300,
+        rss_growth_warning: int = 512 * MB,
+        structure_warning: int = 10000,
+    ):
+        """
+        Initialize the MemoryMonitor with probes for the shared player state.
+
+        Args:
+            interval (float): Seconds between samples taken by the background thread.
+            rss_growth_warning (int): Warn each time RSS grows by this many more bytes since startup.
+            structure_warning (int): Warn when a structure holds this many items, and again each
+                time it doubles.
+        """
+        self.interval = interval
+        self.rss_growth_warning = rss_growth_warning
+        self.structure_warning = structure_warning
+        self.baseline: Optional[MemorySample] = None
+        self.last_sample: Optional[MemorySample] = None
+        self.warnings = 0
+        self._probes: Dict[str, Callable[[], Any]] = {}
+        self._rss_warned_at = 0
+        self._structure_warned_at: Dict[str, int] = {}
+        self._tracemalloc_snapshot = None
+        self._toggled_tracing = False
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.add_probe("shared_state.players", lambda: shared_state.players)
+        self.add_probe(
+            "shared_state.recent_authentications",
+            lambda: shared_state.recent_authentications,
+        )
+        self.add_probe("grouped_events.event_lines", _grouped_event_lines)
+
+    def add_probe(self, name: str, getter: Callable[[], Any]) -> None:
+        """
+        Monitor a structure.
+
+        Args:
+            name (str): Name of the structure in reports.
+            getter (Callable[[], Any]): Returns the structure, which should support len().
+        """
+        self._probes[name] = getter
+
+    def sample(self) -> MemorySample:
+        """
+        Measure RSS and every monitored structure.
+
+        Returns:
+            MemorySample: The measurements.
+        """
+        sample = MemorySample(rss=read_rss())
+        for name, getter in list(self._probes.items()):
+            try:
+                structure = getter()
+                sample.structures[name] = StructureStats(
+                    items=len(structure), size=deep_size(structure)
+                )
+            except Exception as e:
+                logger.debug(f"Could not measure {name}: {str(e)}")
+        if self.baseline is None:
+            self.baseline = sample
+        self.last_sample = sample
+        return sample
+
+    def check(self) -> List[str]:
+        """
+        Take a sample and log a warning for any growth past the thresholds.
+
+        Returns:
+            List[str]: The warnings logged.
+        """
+        sample = self.sample()
+        warnings = []
+
+        growth = sample.rss - self.baseline.rss
+        if self.rss_growth_warning and growth >= self._rss_warned_at + self.rss_growth_warning:
+            self._rss_warned_at = growth - growth % self.rss_growth_warning
+            warnings.append(
+                f"RSS grew by {growth / MB:.1f} MB since startup to {sample.rss / MB:.1f} MB"
+            )
+
+        for name, stats in sample.structures.items():
+            warned_at = self._structure_warned_at.get(name, self.structure_warning // 2)
+            if self.structure_warning and stats.items >= max(warned_at * 2, self.structure_warning):
+                self._structure_warned_at[name] = stats.items
+                warnings.append(
+                    f"{name} holds {stats.items} items ({stats.size / MB:.1f} MB)"
+                )
+
+        for warning in warnings:
+            logger.warning(f"Memory growth: {warning}")
+        self.warnings += len(warnings)
+        return warnings
+
+    def start_tracing(self, frames: int = 1) -> None:
+        """
+        Start tracing allocations with tracemalloc, unless already tracing.
+
+        Args:
+            frames (int): Number of stack frames recorded per allocation.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info(f"Tracing allocations with tracemalloc ({frames} frames)")
+
+    def stop_tracing(self) -> None:
+        """Stop tracing allocations and forget the previous snapshot."""
+        self._toggled_tracing = False
+        self._tracemalloc_snapshot = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("Stopped tracing allocations with tracemalloc")
+
+    def toggle_tracing(self) -> bool:
+        """
+        Start tracing allocations, or stop tracing that was started by this method.
+
+        Tracing started with start_tracing, e.g. from startup, is left on.
+
+        Returns:
+            bool: Whether allocations are being traced now.
+        """
+        if self._toggled_tracing:
+            self.stop_tracing()
+        elif not tracemalloc.is_tracing():
+            self.start_tracing()
+            self._toggled_tracing = True
+        return tracemalloc.is_tracing()
+
+    def top_allocators(self, limit: int = 10) -> List[str]:
+        """
+        Return the source lines that allocated the most memory still in use.
+
+        Each line also shows how much its allocations grew since the previous call.
+
+        Args:
+            limit (int): Number of source lines to return.
+
+        Returns:
+            List[str]: One description per source line, empty if tracemalloc is not tracing.
+        """
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        if self._tracemalloc_snapshot is not None:
+            statistics = snapshot.compare_to(self._tracemalloc_snapshot, "lineno")
+        else:
+            statistics = snapshot.statistics("lineno")
+        self._tracemalloc_snapshot = snapshot
+        return [str(statistic) for statistic in statistics[:limit]]
+
+    def report(self, limit: int = 10) -> str:
+        """
+        Take a sample and format a full memory report.
+
+        Args:
+            limit (int): Number of top allocating source lines to include.
+
+        Returns:
+            str: A multi-line report.
+        """
+        sample = self.sample()
+        lines = [
+            f"Memory report: RSS {sample.rss / MB:.1f} MB "
+            f"({(sample.rss - self.baseline.rss) / MB:+.1f} MB since startup), "
+            f"{len(gc.get_objects())} tracked objects"
+        ]
+        cgroup = read_cgroup_memory()
+        if cgroup is not None:
+            usage, limit_bytes = cgroup
+            limit_text = f"{limit_bytes / MB:.0f} MB" if limit_bytes else "no limit"
+            lines.append(f"  pod memory: {usage / MB:.1f} MB of {limit_text}")
+        for name, stats in sorted(sample.structures.items()):
+            lines.append(f"  {name:<40} {stats.items:>8} items {stats.size / 1024:>10.1f} KB")
+        allocators = self.top_allocators(limit)
+        if allocators:
+            lines.append("  top allocators:")
+            lines.extend(f"    {allocator}" for allocator in allocators)
+        else:
+            lines.append("  tracemalloc is not tracing, no allocator statistics")
+        return "\n".join(lines)
+
+    def start(self) -> None:
+        """Start sampling on a background thread."""
+        self.sample()
+        self._thread = threading.Thread(
+            target=self._run, name="memory-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        """Sample every interval until stopped."""
+        while not self._stopped.wait(self.interval):
+            self.check()
@@ -0,0 +1,688 @@
+"""
+Mod Cache Module
+
+This module keeps downloaded Workshop mods in a cache on the data volume, so a server
+starting on a fresh node can seed its mod directory instead of downloading every mod again.
+
+Each mod is stored under <cache>/<mod_id>/<version>/, where the version is taken from the
+mod's modinfo.lua, together with a manifest listing the SHA-256 digest of every file and
+the Workshop time the mod was last updated. A current file in <cache>/<mod_id>/ names the
+version to seed. Versions are written to a temporary directory and renamed into place, so
+a crash never leaves a partial version behind, and they are verified against their
+manifest before being seeded. Verifying hashes every file, so a ModCache remembers the result
+per version and both steps of a start share one.
+
+Steam only treats a mod in the UGC directory as installed if the directory's Workshop
+manifest, appworkshop_322330.acf, lists it; otherwise the shards download it again. When a
+mod is cached, its entry in the manifest next to its source (written by steamcmd, or by the
+shards for mods copied from the UGC directory) is kept in the cache manifest, and seeding
+writes the entries of the seeded mods into the UGC directory's manifest.
+
+Two steps run before the shards start, in one process (see entry.sh):
+
+- prefetch: for every mod in the mods setup file (common.mod_manager.get_installed_mods)
+  that is missing from the cache or was updated on the Workshop since it was cached, copy
+  it from a local mod directory or download it with steamcmd, and store it in the cache.
+- seed: copy the cached version of every mod into the server's mod directory, skipping
+  mods that already hold that version, and list them in the Workshop manifest.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from common.mod_manager import get_installed_mods
+except ImportError:
+    from mod_manager import get_installed_mods
+
+logger = logging.getLogger(__name__)
+
+# The Workshop app of Don't Starve Together
+WORKSHOP_APP_ID = "322330"
+MOD_CACHE_DIR = os.environ.get(
+    "DST_MOD_CACHE", "/home/steam/.klei/DoNotStarveTogether/mod_cache"
+)
+# The shards are started with -ugc_directory pointing here
+UGC_DIRECTORY = os.environ.get("DST_UGC_DIRECTORY", "/home/steam/dst-dedicated/ugc_mods")
+STEAMCMD = os.path.join(os.environ.get("STEAMCMDDIR", "/home/steam/steamcmd"), "steamcmd.sh")
+MANIFEST = "manifest.json"
+CURRENT = "current"
+# Marker written into seeded mod directories, holding the digest of the seeded version
+SEEDED_MARKER = ".mod_cache"
+# Versions kept per mod, including the current one
+KEEP_VERSIONS = 2
+UNKNOWN_VERSION = "unknown"
+_VERSION = re.compile(r"""^\s*version\s*=\s*["']([^"']+)["']""", re.MULTILINE)
+_HASH_CHUNK = 1024 * 1024
+# Quoted strings and braces of Valve's KeyValues format, used by the Workshop manifest
+_KEYVALUES_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|([{}])')
+_KEYVALUES_ESCAPE = re.compile(r"\\(.)")
+
+
+def workshop_content_dir(root: str) -> str:
+    """
+    Returns the directory holding Workshop mods below a UGC or steamcmd directory.
+
+    Args:
+        root (str): The UGC directory, or the steamapps/workshop directory of steamcmd.
+
+    Returns:
+        str: The content directory, with one subdirectory per mod ID.
+    """
+    return os.path.join(root, "content", WORKSHOP_APP_ID)
+
+
+def workshop_manifest_path(root: str) -> str:
+    """
+    Returns the path of the Workshop manifest of a UGC or steamcmd directory.
+
+    Args:
+        root (str): The UGC directory, or the steamapps/workshop directory of steamcmd.
+
+    Returns:
+        str: The path of appworkshop_322330.acf, which lists the installed mods.
+    """
+    return os.path.join(root, f"appworkshop_{WORKSHOP_APP_ID}.acf")
+
+
+def read_workshop_manifest(path: str) -> dict:
+    """
+    Reads a Workshop manifest.
+
+    Args:
+        path (str): The path of the manifest.
+
+    Returns:
+        dict: The manifest's AppWorkshop section, with nested sections as dictionaries.
+            Empty if the file does not exist or cannot be parsed.
+    """
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            tokens = _KEYVALUES_TOKEN.findall(f.read())
+    except OSError:
+        return {}
+    stack = [{}]
+    key = None
+    for string, brace in tokens:
+        if brace == "{":
+            if key is None:
+                return {}
+            section = {}
+            stack[-1][key] = section
+            stack.append(section)
+            key = None
+        elif brace == "}":
+            if len(stack) == 1:
+                return {}
+            stack.pop()
+        elif key is None:
+            key = _KEYVALUES_ESCAPE.sub(r"\1", string)
+        else:
+            stack[-1][key] = _KEYVALUES_ESCAPE.sub(r"\1", string)
+            key = None
+    manifest = stack[0].get("AppWorkshop")
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def write_workshop_manifest(path: str, manifest: dict) -> None:
+    """
+    Writes a Workshop manifest.
+
+    Args:
+        path (str): The path of the manifest.
+        manifest (dict): The AppWorkshop section, with nested sections as dictionaries.
+    """
+
+    def write_section(section: dict, indent: str) -> List[str]:
+        lines = []
+        for key, value in section.items():
+            if isinstance(value, dict):
+                lines += [f'{indent}"{key}"', f"{indent}{{"]
+                lines += write_section(value, indent + "\t")
+                lines.append(f"{indent}}}")
+            else:
+                escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{indent}"{key}"\t\t"{escaped}"')
+        return lines
+
+    lines = ['"AppWorkshop"', "{"] + write_section(manifest, "\t") + ["}"]
+    _write_atomic(path, "\n".join(lines) + "\n")
+
+
+def _workshop_entry(mod_dir: str) -> Optional[dict]:
+    """
+    Returns the entries of a mod in the Workshop manifest next to its directory.
+
+    Args:
+        mod_dir (str): The mod's directory, <root>/content/322330/<mod_id>.
+
+    Returns:
+        Optional[dict]: The mod's "installed" entry and, if present, its "details" entry, or
+            None if the manifest does not list the mod.
+    """
+    mod_id = os.path.basename(mod_dir)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(mod_dir)))
+    manifest = read_workshop_manifest(workshop_manifest_path(root))
+    installed = manifest.get("WorkshopItemsInstalled", {}).get(mod_id)
+    if not isinstance(installed, dict):
+        return None
+    entry = {"installed": installed}
+    details = manifest.get("WorkshopItemDetails", {}).get(mod_id)
+    if isinstance(details, dict):
+        entry["details"] = details
+    return entry
+
+
+def read_mod_version(mod_dir: str) -> str:
+    """
+    Reads the version of a mod from its modinfo.lua.
+
+    Args:
+        mod_dir (str): The mod's directory.
+
+    Returns:
+        str: The version, usable as a directory name, or UNKNOWN_VERSION.
+    """
+    try:
+        with open(os.path.join(mod_dir, "modinfo.lua"), "r", encoding="utf-8", errors="replace") as f:
+            match = _VERSION.search(f.read())
+    except OSError:
+        return UNKNOWN_VERSION
+    if not match:
+        return UNKNOWN_VERSION
+    return re.sub(r"[^A-Za-z0-9._-]", "_", match.group(1))[:64] or UNKNOWN_VERSION
+
+
+def _file_digest(path: str) -> str:
+    """Returns the SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(mod_dir: str) -> Dict[str, str]:
+    """
+    Computes the digests of all files of a mod.
+
+    Args:
+        mod_dir (str): The mod's directory.
+
+    Returns:
+        Dict[str, str]: Relative file paths mapped to their SHA-256 digests.
+    """
+    files = {}
+    for directory, _, names in os.walk(mod_dir):
+        for name in names:
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, mod_dir).replace(os.sep, "/")
+            if relative in (MANIFEST, SEEDED_MARKER):
+                continue
+            files[relative] = _file_digest(path)
+    return files
+
+
+def manifest_digest(files: Dict[str, str]) -> str:
+    """
+    Returns a digest identifying the contents of a mod.
+
+    Args:
+        files (Dict[str, str]): The mod's file digests.
+
+    Returns:
+        str: SHA-256 digest over the sorted paths and file digests.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        digest.update(f"{path}\0{files[path]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _copy_into_place(source: str, destination: str) -> None:
+    """Copy a directory to a temporary sibling of the destination and rename it into place."""
+    parent = os.path.dirname(destination)
+    os.makedirs(parent, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+    try:
+        staged = os.path.join(temp_dir, "mod")
+        shutil.copytree(source, staged, ignore=shutil.ignore_patterns(MANIFEST, SEEDED_MARKER))
+        if os.path.exists(destination):
+            # A directory cannot be renamed over a non-empty one; move the old one aside first
+            os.rename(destination, os.path.join(temp_dir, "old"))
+        os.rename(staged, destination)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class ModCache:
+    """
+    A cache of mod versions on disk, keyed by mod ID and version.
+    """
+
+    def __init__(self, root: str = MOD_CACHE_DIR):
+        """
+        Initialize the ModCache.
+
+        Args:
+            root (str): Directory of the cache, preferably on the persistent data volume.
+        """
+        self.root = root
+        # Verification results by mod ID and version, so each version is hashed once
+        self._verified: Dict[Tuple[str, str], bool] = {}
+
+    def _mod_root(self, mod_id: str) -> str:
+        return os.path.join(self.root, mod_id)
+
+    def current_version(self, mod_id: str) -> Optional[str]:
+        """
+        Returns the version of a mod that is seeded.
+
+        Args:
+            mod_id (str): The ID of the mod.
+
+        Returns:
+            Optional[str]: The version, or None if the mod is not cached.
+        """
+        try:
+            with open(os.path.join(self._mod_root(mod_id), CURRENT), "r") as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        if not os.path.isfile(os.path.join(self._mod_root(mod_id), version, MANIFEST)):
+            return None
+        return version
+
+    def path(self, mod_id: str, version: str) -> str:
+        """Returns the directory of a cached mod version."""
+        return os.path.join(self._mod_root(mod_id), version)
+
+    def manifest(self, mod_id: str, version: Optional[str] = None) -> Optional[dict]:
+        """
+        Reads the manifest of a cached mod version.
+
+        Args:
+            mod_id (str): The ID of the mod.
+            version (str): The version, the current one by default.
+
+        Returns:
+            Optional[dict]: The manifest, or None if the version is not cached.
+        """
+        version = version or self.current_version(mod_id)
+        if not version:
+            return None
+        try:
+            with open(os.path.join(self.path(mod_id, version), MANIFEST), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, mod_id: str, source: str, time_updated: int = 0) -> str:
+        """
+        Stores a copy of a mod directory as the mod's current version.
+
+        The mod's entry in the Workshop manifest next to the source directory, if any, is kept
+        with it, so seeding can list the mod as installed.
+
+        Args:
+            mod_id (str): The ID of the mod.
+            source (str): The mod's directory.
+            time_updated (int): Unix time the mod was last updated on the Workshop, 0 if unknown.
+
+        Returns:
+            str: The version stored.
+        """
+        version = read_mod_version(source)
+        files = build_manifest(source)
+        workshop = _workshop_entry(source)
+        manifest = {
+            "mod_id": mod_id,
+            "version": version,
+            "digest": manifest_digest(files),
+            "time_updated": time_updated,
+            "stored": time.time(),
+            "files": files,
+            "workshop": workshop,
+        }
+        existing = self.manifest(mod_id, version)
+        if existing is None or existing.get("digest") != manifest["digest"]:
+            destination = self.path(mod_id, version)
+            self._verified.pop((mod_id, version), None)
+            _copy_into_place(source, destination)
+            # Written last, so a version without a manifest is never seeded
+            _write_atomic(os.path.join(destination, MANIFEST), json.dumps(manifest))
+        elif (time_updated and existing.get("time_updated") != time_updated) or (
+            workshop and existing.get("workshop") != workshop
+        ):
+            existing["time_updated"] = time_updated or existing.get("time_updated", 0)
+            existing["workshop"] = workshop or existing.get("workshop")
+            _write_atomic(os.path.join(self.path(mod_id, version), MANIFEST), json.dumps(existing))
+        _write_atomic(os.path.join(self._mod_root(mod_id), CURRENT), version)
+        self._prune(mod_id, version)
+        return version
+
+    def _prune(self, mod_id: str, current: str) -> None:
+        """Remove the oldest versions of a mod beyond KEEP_VERSIONS."""
+        mod_root = self._mod_root(mod_id)
+        versions = [
+            name
+            for name in os.listdir(mod_root)
+            if name != current and os.path.isdir(os.path.join(mod_root, name)) and not name.startswith(".")
+        ]
+        versions.sort(key=lambda name: os.path.getmtime(os.path.join(mod_root, name)), reverse=True)
+        for name in versions[KEEP_VERSIONS - 1:]:
+            shutil.rmtree(os.path.join(mod_root, name), ignore_errors=True)
+
+    def verified(self, mod_id: str, version: Optional[str] = None) -> bool:
+        """
+        Checks a cached mod version against its manifest, once per ModCache.
+
+        Args:
+            mod_id (str): The ID of the mod.
+            version (str): The version, the current one by default.
+
+        Returns:
+            bool: The result of verify() for the version, computed on the first call.
+        """
+        version = version or self.current_version(mod_id)
+        if not version:
+            return False
+        key = (mod_id, version)
+        if key not in self._verified:
+            self._verified[key] = self.verify(mod_id, version)
+        return self._verified[key]
+
+    def verify(self, mod_id: str, version: Optional[str] = None) -> bool:
+        """
+        Checks a cached mod version against its manifest.
+
+        Args:
+            mod_id (str): The ID of the mod.
+            version (str): The version, the current one by default.
+
+        Returns:
+            bool: True if every file is present, unchanged, and no files were added.
+        """
+        version = version or self.current_version(mod_id)
+        manifest = self.manifest(mod_id, version)
+        if manifest is None:
+            return False
+        try:
+            return build_manifest(self.path(mod_id, version)) == manifest["files"]
+        except OSError:
+            return False
+
+    def seed(self, mod_id: str, target: str) -> bool:
+        """
+        Copies the current version of a mod into a mod directory.
+
+        Args:
+            mod_id (str): The ID of the mod.
+            target (str): The directory to place the mod in, as target/<mod_id>.
+
+        Returns:
+            bool: True if the mod was copied, False if it was already there or not cached,
+                or failed verification.
+        """
+        manifest = self.manifest(mod_id)
+        if manifest is None:
+            return False
+        destination = os.path.join(target, mod_id)
+        marker = os.path.join(destination, SEEDED_MARKER)
+        try:
+            with open(marker, "r") as f:
+                if f.read().strip() == manifest["digest"]:
+                    return False
+        except OSError:
+            pass
+        if not self.verified(mod_id, manifest["version"]):
+            logger.error(f"Cached mod {mod_id} {manifest['version']} is corrupt, not seeding it")
+            return False
+        _copy_into_place(self.path(mod_id, manifest["version"]), destination)
+        _write_atomic(marker, manifest["digest"])
+        return True
+
+
+def _write_atomic(path: str, content: str) -> None:
+    """Write a small file through a temporary file and rename it into place."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def workshop_update_times(mod_ids: List[str]) -> Dict[str, int]:
+    """
+    Looks up when mods were last updated on the Workshop.
+
+    Args:
+        mod_ids (List[str]): IDs of the mods.
+
+    Returns:
+        Dict[str, int]: Mod IDs mapped to the Unix time of their last update. Empty if the
+            Workshop could not be reached.
+    """
+    try:
+        try:
+            from common.fetch_mod_info import fetch_published_file_details
+        except ImportError:
+            from fetch_mod_info import fetch_published_file_details
+        details = fetch_published_file_details(mod_ids, retries=2)
+    except Exception as e:
+        logger.warning(f"Could not check the Workshop for mod updates: {e}")
+        return {}
+    return {mod_id: int(item.get("time_updated") or 0) for mod_id, item in details.items()}
+
+
+def download_mods(mod_ids: List[str], directory: str, steamcmd: str = STEAMCMD) -> str:
+    """
+    Downloads mods with steamcmd.
+
+    Args:
+        mod_ids (List[str]): IDs of the mods to download.
+        directory (str): steamcmd's install directory for the download.
+        steamcmd (str): Path of steamcmd.sh.
+
+    Returns:
+        str: The directory holding the downloaded mods, one subdirectory per mod ID.
+    """
+    command = [steamcmd, "+force_install_dir", directory, "+login", "anonymous"]
+    for mod_id in mod_ids:
+        command += ["+workshop_download_item", WORKSHOP_APP_ID, mod_id, "validate"]
+    command.append("+quit")
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    if result.returncode != 0:
+        logger.error(f"steamcmd exited with {result.returncode}: {result.stdout[-2000:]}")
+    return workshop_content_dir(os.path.join(directory, "steamapps", "workshop"))
+
+
+def _find_mod(mod_id: str, sources: Iterable[str]) -> Optional[str]:
+    """Returns the first source directory holding a mod with a modinfo.lua."""
+    for source in sources:
+        path = os.path.join(source, mod_id)
+        if os.path.isfile(os.path.join(path, "modinfo.lua")):
+            return path
+    return None
+
+
+def _outdated(
+    cache: ModCache, mod_ids: List[str], check_updates: bool
+) -> Tuple[List[str], Dict[str, int]]:
+    """Returns the mods that are not cached, fail verification or were updated since, and the update times."""
+    updated = workshop_update_times(mod_ids) if check_updates and mod_ids else {}
+    outdated = []
+    for mod_id in mod_ids:
+        manifest = cache.manifest(mod_id)
+        if manifest is None or not cache.verified(mod_id):
+            outdated.append(mod_id)
+        elif updated.get(mod_id, 0) > manifest.get("time_updated", 0):
+            outdated.append(mod_id)
+    return outdated, updated
+
+
+def prefetch(
+    mod_ids: List[str],
+    cache: ModCache,
+    sources: Iterable[str] = (),
+    steamcmd: Optional[str] = STEAMCMD,
+    check_updates: bool = True,
+) -> Dict[str, str]:
+    """
+    Fills the cache with every mod that is missing from it or outdated.
+
+    Mods are copied from the first source directory that holds them. Mods not found there
+    are downloaded with steamcmd, in one run.
+
+    Args:
+        mod_ids (List[str]): IDs of the mods to cache.
+        cache (ModCache): The cache to fill.
+        sources (Iterable[str]): Directories holding already downloaded mods by ID.
+        steamcmd (Optional[str]): Path of steamcmd.sh, or None to not download.
+        check_updates (bool): Look up Workshop update times to refresh outdated mods.
+
+    Returns:
+        Dict[str, str]: Mod IDs mapped to the versions stored.
+    """
+    outdated, updated = _outdated(cache, mod_ids, check_updates)
+    stored = {}
+    missing = []
+    for mod_id in outdated:
+        manifest = cache.manifest(mod_id)
+        source = _find_mod(mod_id, sources)
+        # A local copy older than the Workshop's would only be cached again
+        if source and not (manifest and updated.get(mod_id, 0) > manifest.get("time_updated", 0)):
+            stored[mod_id] = cache.store(mod_id, source, updated.get(mod_id, 0))
+        else:
+            missing.append(mod_id)
+
+    if missing and steamcmd:
+        with tempfile.TemporaryDirectory(dir=cache.root, prefix=".download-") as directory:
+            content = download_mods(missing, directory, steamcmd)
+            for mod_id in missing:
+                source = _find_mod(mod_id, [content])
+                if source:
+                    stored[mod_id] = cache.store(mod_id, source, updated.get(mod_id, 0))
+    for mod_id in missing:
+        if mod_id not in stored:
+            logger.warning(f"Mod {mod_id} could not be cached")
+    return stored
+
+
+def seed(
+    mod_ids: List[str], cache: ModCache, target: str, workshop_manifest: Optional[str] = None
+) -> List[str]:
+    """
+    Copies the cached version of every mod into a mod directory.
+
+    Args:
+        mod_ids (List[str]): IDs of the mods to seed.
+        cache (ModCache): The cache.
+        target (str): The directory to place the mods in.
+        workshop_manifest (Optional[str]): Workshop manifest to list the seeded mods in, with
+            the entries kept from their source, or None to leave it alone.
+
+    Returns:
+        List[str]: IDs of the mods that were copied.
+    """
+    seeded = [mod_id for mod_id in mod_ids if cache.seed(mod_id, target)]
+    if workshop_manifest:
+        _list_seeded_mods(mod_ids, cache, target, workshop_manifest)
+    return seeded
+
+
+def _list_seeded_mods(mod_ids: List[str], cache: ModCache, target: str, path: str) -> None:
+    """Add the Workshop manifest entries of the mods seeded in target to a Workshop manifest."""
+    manifest = read_workshop_manifest(path) or {
+        "appid": WORKSHOP_APP_ID,
+        "SizeOnDisk": "0",
+        "NeedsUpdate": "0",
+        "NeedsDownload": "0",
+        "TimeLastUpdated": "0",
+        "TimeLastAppRan": "0",
+    }
+    original = json.dumps(manifest, sort_keys=True)
+    installed = manifest.setdefault("WorkshopItemsInstalled", {})
+    details = manifest.setdefault("WorkshopItemDetails", {})
+    for mod_id in mod_ids:
+        cached = cache.manifest(mod_id)
+        if not cached or not cached.get("workshop"):
+            continue
+        try:
+            with open(os.path.join(target, mod_id, SEEDED_MARKER), "r") as f:
+                if f.read().strip() != cached["digest"]:
+                    continue
+        except OSError:
+            continue
+        installed[mod_id] = cached["workshop"]["installed"]
+        if "details" in cached["workshop"]:
+            details[mod_id] = cached["workshop"]["details"]
+    if installed:
+        sizes = [entry.get("size", "0") for entry in installed.values() if isinstance(entry, dict)]
+        manifest["SizeOnDisk"] = str(sum(int(size) for size in sizes if str(size).isdigit()))
+    if json.dumps(manifest, sort_keys=True) != original:
+        write_workshop_manifest(path, manifest)
+
+
+def main() -> None:
+    """
+    Main entry point for prefetching mods into the cache and seeding them.
+    """
+    parser = argparse.ArgumentParser(description="DST mod download cache")
+    parser.add_argument(
+        "actions",
+        nargs="+",
+        choices=("prefetch", "seed"),
+        help="Fill the cache and/or seed the mod directory from it, in the order given",
+    )
+    parser.add_argument("--cache", default=MOD_CACHE_DIR, help=f"Cache directory (default: {MOD_CACHE_DIR})")
+    parser.add_argument(
+        "--ugc-directory",
+        default=UGC_DIRECTORY,
+        help=f"The shards' UGC directory, seeded and used as a prefetch source (default: {UGC_DIRECTORY})",
+    )
+    parser.add_argument("--steamcmd", default=STEAMCMD, help=f"Path of steamcmd.sh (default: {STEAMCMD})")
+    parser.add_argument("--no-download", action="store_true", help="Only cache mods found in the UGC directory")
+    parser.add_argument("--no-update-check", action="store_true", help="Do not check the Workshop for updated mods")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    mod_ids = list(dict.fromkeys(mod_id for mod_id, _ in get_installed_mods()))
+    cache = ModCache(args.cache)
+    os.makedirs(cache.root, exist_ok=True)
+    content = workshop_content_dir(args.ugc_directory)
+    # One cache for all actions, so each mod is verified once
+    for action in args.actions:
+        started = time.monotonic()
+        if action == "prefetch":
+            stored = prefetch(
+                mod_ids,
+                cache,
+                sources=[content],
+                steamcmd=None if args.no_download else args.steamcmd,
+                check_updates=not args.no_update_check,
+            )
+            elapsed = time.monotonic() - started
+            logger.info(f"Cached {len(stored)} of {len(mod_ids)} mods in {elapsed:.1f}s")
+        else:
+            seeded = seed(mod_ids, cache, content, workshop_manifest_path(args.ugc_directory))
+            elapsed = time.monotonic() - started
+            logger.info(f"Seeded {len(seeded)} of {len(mod_ids)} mods in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
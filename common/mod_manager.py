@@ -2,14 +2,21 @@
 Module: mod_manager.py
 Description: Manages adding, removing, and listing mods for the server setup. 
 Uses Steam Workshop to fetch mod details and manages the dedicated server mod setup file.
+
+Both mod files are loaded once per operation into a ModConfig, changed in memory and written
+back together, each replaced atomically through a temporary file.
 """
 
-import time
+import errno
+import os
 import sys
-from queue import Queue
+import tempfile
+import threading
 
 MOD_FILE_PATH = "/home/steam/dst-dedicated/mods/dedicated_server_mods_setup.lua"
 MOD_SETTINGS_PATH = "/home/steam/dst-dedicated/mods/modsettings.lua"
+# Errors replacing a file after which it is overwritten in place instead
+IN_PLACE_ERRORS = (errno.EBUSY, errno.EXDEV, errno.EACCES, errno.EPERM, errno.EROFS)
 
 
 def read_file(file_path):
@@ -33,14 +40,45 @@ def read_file(file_path):
         return []
 
 
+def _replace_file(file_path, lines):
+    """Writes the lines to a temporary file next to the file and renames it over the file."""
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(file_path)), prefix=".mods-"
+    )
+    try:
+        with os.fdopen(fd, "w") as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+        if os.path.exists(file_path):
+            os.chmod(temp_path, os.stat(file_path).st_mode & 0o7777)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
 def write_file(file_path, lines):
     """
     Writes the given lines to the specified file.
 
+    The lines are written to a temporary file that then replaces the file, so an interrupted
+    write never leaves a truncated file. Files that cannot be replaced, such as single files
+    bind-mounted into a container, are overwritten in place.
+
     Args:
         file_path (str): Path to the file to write.
         lines (list): List of lines to write to the file.
     """
+    try:
+        _replace_file(file_path, lines)
+        return
+    except OSError as e:
+        if e.errno not in IN_PLACE_ERRORS:
+            print(f"Error writing to {file_path}: {e}")
+            return
+
     try:
         with open(file_path, "w") as file:
             file.writelines(lines)
@@ -86,6 +124,25 @@ def write_mod_settings(mod_lines):
     write_file(MOD_SETTINGS_PATH, mod_lines)
 
 
+def parse_mod_setup_line(line):
+    """
+    Parses a ServerModSetup line of the mods setup file.
+
+    Args:
+        line (str): A line of the mods setup file.
+
+    Returns:
+        tuple: The mod ID and comment, or None if the line does not set up a mod.
+    """
+    if not line.strip().startswith("ServerModSetup"):
+        return None
+    parts = line.split('"')
+    if len(parts) < 2:
+        return None
+    comment = line.split("--")[-1].strip() if "--" in line else ""
+    return parts[1], comment
+
+
 def get_installed_mods():
     """
     Retrieves the list of installed mods from the mods setup file.
@@ -93,20 +150,310 @@ def get_installed_mods():
     Returns:
         list: List of tuples with mod ID and comment.
     """
-    lines = read_mod_file()
     mods = []
 
-    for line in lines:
-        if line.strip().startswith("ServerModSetup"):
-            parts = line.split('"')
-            if len(parts) > 1:
-                mod_id = parts[1]
-                comment = line.split("--")[-1].strip() if "--" in line else ""
-                mods.append((mod_id, comment))
+    for line in read_mod_file():
+        mod = parse_mod_setup_line(line)
+        if mod:
+            mods.append(mod)
 
     return mods
 
 
+class InstalledModsRegistry:
+    """
+    A cache of the installed mods, parsed from the mods setup file only when it changes.
+
+    The file is checked with a single stat() per lookup; it is read and parsed again only
+    when its modification time, size or inode changed, so atomic replacements are noticed.
+    A registry is safe to share between threads.
+    """
+
+    def __init__(self, path=None):
+        """
+        Initialize the InstalledModsRegistry.
+
+        Args:
+            path (str): Path of the mods setup file, MOD_FILE_PATH by default.
+        """
+        self.path = path
+        self.loads = 0
+        self._key = None
+        self._mods = ()
+        self._by_id = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Parse the file again if it changed since it was last parsed."""
+        path = self.path or MOD_FILE_PATH
+        try:
+            stat = os.stat(path)
+            key = (path, stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except OSError:
+            key = (path, None)
+        if key == self._key:
+            return
+        with self._lock:
+            if key == self._key:
+                return
+            lines = read_file(path) if key[1] is not None else []
+            mods = tuple(filter(None, map(parse_mod_setup_line, lines)))
+            self._by_id = {mod_id: comment for mod_id, comment in mods}
+            self._mods = mods
+            self._key = key
+            self.loads += 1
+
+    def mods(self):
+        """
+        Returns the installed mods in file order.
+
+        Returns:
+            tuple: Tuples with mod ID and comment.
+        """
+        self._refresh()
+        return self._mods
+
+    def get(self, mod_id):
+        """
+        Returns the comment of an installed mod.
+
+        Args:
+            mod_id (str): The ID of the mod.
+
+        Returns:
+            str: The mod's comment, or None if it is not installed.
+        """
+        self._refresh()
+        return self._by_id.get(mod_id)
+
+    def __contains__(self, mod_id):
+        """Return True if the mod is installed."""
+        self._refresh()
+        return mod_id in self._by_id
+
+    def invalidate(self):
+        """Parse the file again on the next lookup."""
+        with self._lock:
+            self._key = None
+
+
+# Shared by all callers in a process, such as the log monitor's handlers
+installed_mods_registry = InstalledModsRegistry()
+
+
+class _LineIndex:
+    """
+    The lines of a file with an index of the lines belonging to each mod.
+
+    Removed lines are blanked out rather than deleted, so indices stay valid and each change
+    takes constant time. New mods are kept in order and written after the anchor line.
+    """
+
+    def __init__(self, lines, anchor, before_anchor=False):
+        """
+        Initialize the _LineIndex.
+
+        Args:
+            lines (list): The file's lines.
+            anchor (int): Index of the line new lines are placed next to, or None to append them.
+            before_anchor (bool): Place new lines before the anchor line instead of after it.
+        """
+        self.lines = lines
+        self.anchor = anchor
+        self.before_anchor = before_anchor
+        self.mods = {}
+        self.new = {}
+        self.changed = False
+
+    def add(self, mod_id, index):
+        """Index an existing line of a mod."""
+        self.mods.setdefault(mod_id, []).append(index)
+
+    def __contains__(self, mod_id):
+        return mod_id in self.mods or mod_id in self.new
+
+    def set(self, mod_id, line):
+        """Replace the lines of a mod with one line, or add it if the mod is new."""
+        indices = self.mods.get(mod_id)
+        if indices:
+            self.lines[indices[0]] = line
+            for index in indices[1:]:
+                self.lines[index] = None
+            self.mods[mod_id] = indices[:1]
+        else:
+            self.new[mod_id] = line
+        self.changed = True
+
+    def remove(self, mod_id):
+        """Remove the lines of a mod, returning True if there were any."""
+        removed = self.new.pop(mod_id, None) is not None
+        for index in self.mods.pop(mod_id, ()):
+            self.lines[index] = None
+            removed = True
+        self.changed = self.changed or removed
+        return removed
+
+    def render(self):
+        """Return the file's lines with all changes applied."""
+        output = []
+        for index, line in enumerate(self.lines):
+            if index == self.anchor and self.before_anchor:
+                output.extend(self.new.values())
+            if line is not None:
+                output.append(line)
+            if index == self.anchor and not self.before_anchor:
+                output.extend(self.new.values())
+        if self.anchor is None:
+            output.extend(self.new.values())
+        return output
+
+
+class ModConfig:
+    """
+    An in-memory model of the mods setup file and the mod settings file.
+
+    Load it with ModConfig.load(), change mods with set_mod() and remove_mod(), and write both
+    files with save(). Used as a context manager, it is saved when the block completes and
+    discarded if the block raises, so a failed operation leaves both files untouched.
+    """
+
+    def __init__(self, mod_lines, settings_lines, mod_file=None, settings_file=None):
+        """
+        Initialize the ModConfig from the lines of both files.
+
+        Args:
+            mod_lines (list): Lines of the mods setup file.
+            settings_lines (list): Lines of the mod settings file.
+            mod_file (str): Path of the mods setup file.
+            settings_file (str): Path of the mod settings file.
+        """
+        self.mod_file = mod_file
+        self.settings_file = settings_file
+        self.setup = self._index_setup(list(mod_lines))
+        self.settings = self._index_settings(list(settings_lines))
+
+    @classmethod
+    def load(cls, mod_file=None, settings_file=None):
+        """
+        Reads both mod files.
+
+        Args:
+            mod_file (str): Path of the mods setup file, MOD_FILE_PATH by default.
+            settings_file (str): Path of the mod settings file, MOD_SETTINGS_PATH by default.
+
+        Returns:
+            ModConfig: The loaded model.
+        """
+        mod_file = mod_file or MOD_FILE_PATH
+        settings_file = settings_file or MOD_SETTINGS_PATH
+        return cls(read_file(mod_file), read_file(settings_file), mod_file, settings_file)
+
+    @staticmethod
+    def _index_setup(lines):
+        """Index the ServerModSetup lines; new mods go after the last one."""
+        anchor = None
+        mods = []
+        for index, line in enumerate(lines):
+            mod = parse_mod_setup_line(line)
+            if mod:
+                mods.append((mod[0], index))
+            if "ServerModSetup" in line and not line.strip().startswith("--"):
+                anchor = index
+        setup = _LineIndex(lines, anchor)
+        for mod_id, index in mods:
+            setup.add(mod_id, index)
+        return setup
+
+    @staticmethod
+    def _index_settings(lines):
+        """Index the workshop entries of the settings table; new mods go before its closing brace."""
+        anchor = None
+        entries = []
+        in_table = False
+        for index, line in enumerate(lines):
+            stripped = line.strip()
+            if stripped.startswith("return {"):
+                in_table = True
+            elif stripped.startswith('["workshop-'):
+                entries.append((stripped.split('"]')[0][len('["workshop-'):], index))
+            elif stripped == "}":
+                anchor = index
+        if anchor is None:
+            if not in_table:
+                lines.append("return {\n")
+            lines.append("}\n")
+            anchor = len(lines) - 1
+        settings = _LineIndex(lines, anchor, before_anchor=True)
+        for mod_id, index in entries:
+            settings.add(mod_id, index)
+        return settings
+
+    def __contains__(self, mod_id):
+        """Return True if the mod is in the mod setup file."""
+        return mod_id in self.setup
+
+    def __enter__(self):
+        """Return the configuration to edit in a with block."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Save the files if the with block did not raise."""
+        if exc_type is None:
+            self.save()
+        return False
+
+    def installed_mods(self):
+        """
+        Returns the installed mods in file order.
+
+        Returns:
+            list: List of tuples with mod ID and comment.
+        """
+        mods = []
+        for line in self.setup.render():
+            mod = parse_mod_setup_line(line)
+            if mod:
+                mods.append(mod)
+        return mods
+
+    def set_mod(self, mod_id, title, summary):
+        """
+        Adds a mod to both files, or updates its lines if it is already installed.
+
+        Args:
+            mod_id (str): The ID of the mod.
+            title (str): The title of the mod.
+            summary (str): A summary of the mod's description.
+        """
+        self.setup.set(mod_id, f'ServerModSetup("{mod_id}") -- {title}: {summary}\n')
+        self.settings.set(
+            mod_id, f'  ["workshop-{mod_id}"] = {{ enabled = true }}, -- {title}\n'
+        )
+
+    def remove_mod(self, mod_id):
+        """
+        Removes a mod from both files.
+
+        Args:
+            mod_id (str): The ID of the mod.
+
+        Returns:
+            tuple: Whether the mod was removed from the mods setup file and from the mod settings file.
+        """
+        return self.setup.remove(mod_id), self.settings.remove(mod_id)
+
+    def save(self):
+        """Writes the files that changed. Each file is replaced atomically."""
+        if self.setup.changed:
+            mod_lines = self.setup.render()
+            write_file(self.mod_file, mod_lines)
+            self.setup = self._index_setup(mod_lines)
+        if self.settings.changed:
+            settings_lines = self.settings.render()
+            write_file(self.settings_file, settings_lines)
+            self.settings = self._index_settings(settings_lines)
+
+
 def insert_mod(mod_id, title, summary):
     """
     Inserts or updates a mod in both the mods setup file and mod settings file.
@@ -116,77 +463,53 @@ def insert_mod(mod_id, title, summary):
         title (str): The title of the mod.
         summary (str): A summary of the mod's description.
     """
-    # Update dedicated_server_mods_setup.lua
-    lines = read_mod_file()
-    new_line = f'ServerModSetup("{mod_id}") -- {title}: {summary}\n'
-    inserted = False
-
-    for i in range(len(lines) - 1, -1, -1):
-        if "ServerModSetup" in lines[i] and not lines[i].strip().startswith("--"):
-            lines.insert(i + 1, new_line)
-            inserted = True
-            break
-
-    if not inserted:
-        lines.append(new_line)
-
-    write_mod_file(lines)
+    with ModConfig.load() as config:
+        config.set_mod(mod_id, title, summary)
     print(f"Mod {mod_id} added or updated in {MOD_FILE_PATH}.")
-
-    # Update modsettings.lua
-    mod_settings, all_lines = read_mod_settings()
-    mod_key = f'["workshop-{mod_id}"]'
-    new_setting_line = f"  {mod_key} = {{ enabled = true }}, -- {title}\n"
-    all_lines = [line for line in all_lines if not line.strip().startswith(mod_key)]
-
-    for i in range(len(all_lines) - 1, -1, -1):
-        if all_lines[i].strip() == "}":
-            all_lines.insert(i, new_setting_line)
-            break
-
-    write_mod_settings(all_lines)
     print(f"Mod {mod_id} added or updated in {MOD_SETTINGS_PATH}.")
 
 
-def add_mods(mod_ids, delay=0.75):
+def add_mods(mod_ids, max_workers=None):
     """
     Adds the specified mods by their IDs, fetching information and updating files.
 
+    The Workshop information of all mods is fetched concurrently, then both files are
+    updated in memory and written once.
+
     Args:
         mod_ids (list): List of mod IDs to add.
-        delay (float): Delay in seconds between processing mods.
+        max_workers (int): Maximum number of concurrent Workshop requests.
     """
     try:
-        from fetch_mod_info import fetch_mod_description, summarize_description
+        try:
+            from common.fetch_mod_info import (
+                MAX_WORKERS,
+                fetch_mod_descriptions,
+                summarize_description,
+            )
+        except ImportError:
+            from fetch_mod_info import (
+                MAX_WORKERS,
+                fetch_mod_descriptions,
+                summarize_description,
+            )
     except ImportError:
         print(
             "Error: Unable to import fetch_mod_info. Make sure it's in the same directory."
         )
         return
 
-    mod_queue = Queue()
-    for mod_id in mod_ids:
-        mod_queue.put(mod_id)
+    mods = fetch_mod_descriptions(mod_ids, max_workers=max_workers or MAX_WORKERS)
 
-    while not mod_queue.empty():
-        mod_id = mod_queue.get()
-        installed_mods = get_installed_mods()
-
-        if any(mod[0] == mod_id for mod in installed_mods):
-            print(f"Mod {mod_id} already exists. Updating information...")
-            remove_mods([mod_id])
-
-        try:
-            title, description = fetch_mod_description(mod_id)
+    with ModConfig.load() as config:
+        for mod_id, (title, description) in mods.items():
+            if mod_id in config:
+                print(f"Mod {mod_id} already exists. Updating information...")
             summary = summarize_description(description)
-            insert_mod(mod_id, title, summary)
+            config.set_mod(mod_id, title, summary)
             print(
                 f"Mod {mod_id} added/updated successfully with title: {title} and summary: {summary}"
             )
-        except Exception as e:
-            print(f"Error adding/updating mod {mod_id}: {e}")
-
-        time.sleep(delay)
 
 
 def remove_mods(mod_ids):
@@ -196,31 +519,13 @@ def remove_mods(mod_ids):
     Args:
         mod_ids (list): List of mod IDs to remove.
     """
-    lines = read_mod_file()
-    modified_lines = []
-    modified = False
-
-    for line in lines:
-        if not any(f'ServerModSetup("{mod_id}")' in line for mod_id in mod_ids):
-            modified_lines.append(line)
-        else:
-            modified = True
-            mod_id = [mid for mid in mod_ids if f'ServerModSetup("{mid}")' in line][0]
-            print(f"Mod {mod_id} removed from {MOD_FILE_PATH}.")
-
-    if modified:
-        write_mod_file(modified_lines)
-
-    mod_settings, all_lines = read_mod_settings()
-    for mod_id in mod_ids:
-        mod_key = f'["workshop-{mod_id}"]'
-        if mod_key in mod_settings:
-            all_lines = [
-                line for line in all_lines if not line.strip().startswith(mod_key)
-            ]
-            print(f"Mod {mod_id} removed from {MOD_SETTINGS_PATH}.")
-
-    write_mod_settings(all_lines)
+    with ModConfig.load() as config:
+        for mod_id in mod_ids:
+            from_setup, from_settings = config.remove_mod(mod_id)
+            if from_setup:
+                print(f"Mod {mod_id} removed from {MOD_FILE_PATH}.")
+            if from_settings:
+                print(f"Mod {mod_id} removed from {MOD_SETTINGS_PATH}.")
 
 
 def list_installed_mods():
@@ -3,14 +3,15 @@ Player Utilities Module
 
 This module provides utility functions for extracting player information from log lines
 in a Don't Starve Together (DST) dedicated server. It uses Grok patterns to parse log lines
-and extract relevant information such as player IDs, names, and characters.
+and extract relevant information such as player IDs, names, and characters. The patterns
+are compiled on first use through common.grok_cache.
 
 The module includes functions for handling player join, leave, and spawn events.
 """
 
 import logging
 from typing import Tuple, Optional
-from pygrok import Grok
+from common.grok_cache import CachedGrok
 from common.shared_state import Player
 
 logger = logging.getLogger(__name__)
@@ -31,9 +32,9 @@ PLAYER_LEAVE_PATTERN = r"(?:\[Shard\] )?\(%{WORD:player_id}\)(?: %{USERNAME:play
 PLAYER_SPAWN_PATTERN = r"Spawn request: %{WORD:character} from %{USERNAME:player_name}"
 
 # Create grok instances
-player_join_grok = Grok(PLAYER_JOIN_PATTERN, custom_patterns=custom_patterns)
-player_leave_grok = Grok(PLAYER_LEAVE_PATTERN, custom_patterns=custom_patterns)
-player_spawn_grok = Grok(PLAYER_SPAWN_PATTERN, custom_patterns=custom_patterns)
+player_join_grok = CachedGrok(PLAYER_JOIN_PATTERN, custom_patterns=custom_patterns)
+player_leave_grok = CachedGrok(PLAYER_LEAVE_PATTERN, custom_patterns=custom_patterns)
+player_spawn_grok = CachedGrok(PLAYER_SPAWN_PATTERN, custom_patterns=custom_patterns)
 
 
 def extract_player_info_from_join(
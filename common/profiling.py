@@ -0,0 +1,323 @@
+"""
+Profiling Module
+
+This module provides a PipelineProfiler class that measures where the log monitor spends
+its time, and can be switched on and off while the monitor is running. A single shared
+instance, profiler, is used by the pipeline.
+
+While enabled, the profiler records per-stage timings of the pipeline:
+
+- read: reading new data from the log file
+- split: finding the complete lines in the data read
+- match: searching the data for registered keywords
+- parse: decoding matching lines and parsing them into records
+- handler: running handlers, also broken down per handler
+
+In addition it profiles the Python code of the running threads, either by sampling their
+stacks at a fixed interval, or deterministically with cProfile. When profiling is stopped,
+a report is written to the profile directory.
+
+Stage timings are only recorded while the profiler is enabled; when disabled, the pipeline
+pays a single attribute check per chunk read or handler call.
+"""
+
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("sampling", "cprofile", "stages")
+
+DEFAULT_PROFILE_DIR = "/tmp/dst-log-monitor-profiles"
+
+T = TypeVar("T")
+
+
+class StageStats:
+    """
+    Accumulates the time spent in one pipeline stage.
+
+    Each stage is only recorded from a single thread, so no locking is needed.
+    """
+
+    __slots__ = ("calls", "total", "longest")
+
+    def __init__(self):
+        """Initialize the StageStats with no calls recorded."""
+        self.calls = 0
+        self.total = 0.0
+        self.longest = 0.0
+
+    def add(self, seconds: float) -> None:
+        """
+        Record one call of the stage.
+
+        Args:
+            seconds (float): How long the call took.
+        """
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.longest:
+            self.longest = seconds
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of all other threads on a background thread.
+
+    Samples are counted as collapsed stacks ("thread;module:function;..."), the input
+    format of flame graph tools.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Initialize the StackSampler.
+
+        Args:
+            interval (float): Seconds between samples.
+        """
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="profile-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        """Take samples until stopped."""
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                    stack.append(f"{module}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def format(self) -> str:
+        """
+        Format the samples as collapsed stacks.
+
+        Returns:
+            str: One "stack count" line per distinct stack, most frequent first.
+        """
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.samples.most_common()
+        )
+
+
+class PipelineProfiler:
+    """
+    Records pipeline stage timings and profiles the monitor's threads on demand.
+    """
+
+    def __init__(self):
+        """Initialize the PipelineProfiler in the disabled state."""
+        self.enabled = False
+        self.mode = "sampling"
+        self.profile_dir = DEFAULT_PROFILE_DIR
+        self.stages: Dict[str, StageStats] = {}
+        self.started: Optional[float] = None
+        self._sampler: Optional[StackSampler] = None
+        self._cprofile_active = False
+        self._thread_state = threading.local()
+        self._lock = threading.Lock()
+
+    def configure(self, mode: str = "sampling", profile_dir: Optional[str] = None) -> None:
+        """
+        Set how the next profiling run profiles code and where reports are written.
+
+        Args:
+            mode (str): One of PROFILE_MODES.
+            profile_dir (Optional[str]): Directory reports are written to.
+
+        Raises:
+            ValueError: If the mode is unknown.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        if profile_dir:
+            self.profile_dir = profile_dir
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Record the time spent in a stage. Only call this while the profiler is enabled.
+
+        Args:
+            stage (str): Name of the stage.
+            seconds (float): How long the stage took.
+        """
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages.setdefault(stage, StageStats())
+        stats.add(seconds)
+
+    def timed(self, stage: str, items: Iterable[T]) -> Iterator[T]:
+        """
+        Yield the items of an iterable, recording the time spent producing each as a stage.
+
+        Args:
+            stage (str): Name of the stage.
+            items (Iterable[T]): The items, typically produced lazily.
+
+        Yields:
+            T: The items of the iterable.
+        """
+        iterator = iter(items)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.record(stage, time.perf_counter() - started)
+                return
+            self.record(stage, time.perf_counter() - started)
+            yield item
+
+    def start(self) -> None:
+        """Start recording stage timings and profiling code."""
+        with self._lock:
+            if self.enabled:
+                return
+            self.stages = {}
+            self.started = time.time()
+            if self.mode == "sampling":
+                self._sampler = StackSampler()
+                self._sampler.start()
+            elif self.mode == "cprofile":
+                self._cprofile_active = True
+            self.enabled = True
+        logger.info(f"Profiling started ({self.mode})")
+
+    def stop(self) -> List[str]:
+        """
+        Stop profiling and write the report.
+
+        Returns:
+            List[str]: Paths of the files written.
+        """
+        with self._lock:
+            if not self.enabled:
+                return []
+            self.enabled = False
+            self._cprofile_active = False
+            paths = [self._write("stages", self.format())]
+            if self._sampler is not None:
+                self._sampler.stop()
+                paths.append(self._write("samples", self._sampler.format()))
+                self._sampler = None
+        logger.info(f"Profiling stopped, report written to {', '.join(paths)}")
+        if self.mode == "cprofile":
+            logger.info(
+                "cProfile output is written by each pipeline thread when it next handles data"
+            )
+        return paths
+
+    def toggle(self) -> None:
+        """Start profiling if it is stopped, otherwise stop it and write the report."""
+        if self.enabled:
+            self.stop()
+        else:
+            self.start()
+
+    def sync_thread(self) -> None:
+        """
+        Start or stop deterministic profiling of the calling thread.
+
+        cProfile can only profile the thread that enables it, so pipeline threads call
+        this at the start of each unit of work. When profiling stops, each thread writes
+        its own cProfile output here.
+        """
+        profile = getattr(self._thread_state, "profile", None)
+        if self._cprofile_active:
+            if profile is None:
+                profile = cProfile.Profile()
+                self._thread_state.profile = profile
+                profile.enable()
+        elif profile is not None:
+            profile.disable()
+            self._thread_state.profile = None
+            name = threading.current_thread().name
+            path = self._path(f"cprofile-{name}", "pstats")
+            try:
+                profile.dump_stats(path)
+                logger.info(f"cProfile output for thread {name} written to {path}")
+            except OSError as e:
+                logger.error(f"Could not write cProfile output: {str(e)}")
+
+    def format(self) -> str:
+        """
+        Format the stage timings.
+
+        Returns:
+            str: A table with the calls, total, mean and longest time of each stage.
+        """
+        elapsed = time.time() - self.started if self.started else 0.0
+        lines = [
+            f"Profiled for {elapsed:.1f} s",
+            f"{'stage':<60} {'calls':>10} {'total ms':>12} {'mean us':>10} {'max us':>10}",
+        ]
+        for stage, stats in sorted(
+            self.stages.items(), key=lambda item: item[1].total, reverse=True
+        ):
+            mean = stats.total / stats.calls if stats.calls else 0.0
+            lines.append(
+                f"{stage:<60} {stats.calls:>10} {stats.total * 1000:>12.1f} "
+                f"{mean * 1e6:>10.1f} {stats.longest * 1e6:>10.1f}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def _path(self, kind: str, extension: str) -> str:
+        """Return a time-stamped path in the profile directory."""
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started or time.time()))
+        return os.path.join(self.profile_dir, f"{kind}-{stamp}.{extension}")
+
+    def _write(self, kind: str, content: str) -> str:
+        """
+        Write a report file to the profile directory.
+
+        Args:
+            kind (str): Kind of report, used in the file name.
+            content (str): The report.
+
+        Returns:
+            str: The path written, or an explanation if writing failed.
+        """
+        path = self._path(kind, "txt")
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+        except OSError as e:
+            logger.error(f"Could not write profile report {path}: {str(e)}")
+            return f"(failed: {path})"
+        return path
+
+
+profiler = PipelineProfiler()
@@ -0,0 +1,421 @@
+"""
+Roster Snapshot Module
+
+This module publishes the player list and shard status of the log monitor in a small
+memory-mapped file, so other local processes, such as the health server, can read them
+without any IPC round trip. Besides the player list, the status includes the idle stage of
+the shard as reported by the IdleManager, when it became idle and its last resume latency.
+
+The file starts with a fixed header followed by a compact binary payload:
+
+    offset  size  field
+    0       4     magic b"DSTR"
+    4       2     layout version
+    6       2     reserved
+    8       8     sequence number (seqlock)
+    16      8     Unix time of the last update
+    24      4     payload length
+    28      ...   payload
+
+The RosterSnapshotWriter is the only writer. It makes the sequence number odd, writes the
+payload, and makes it even again. A RosterSnapshotReader reads the sequence number, decodes
+the payload in place through a memoryview of the mapping and reads the sequence number
+again; if it was odd or has changed, the decoded snapshot may be torn and it tries again.
+Only the decoded strings are copied out of the mapping. Readers map the file once, so a read
+makes no system calls, and if the sequence number has not changed since the last read, the
+previously decoded snapshot is returned without touching the payload.
+
+The writer reuses an existing file rather than replacing it, so readers that mapped it
+before the log monitor restarted keep seeing updates.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import NamedTuple, Optional, Tuple, Union
+
+from common.event_stream import SAVE_COMPLETE, SHARD_IDLE, SHARD_RESUMED, SHARD_UP, ServerEvent
+from common.shared_state import SharedState, shared_state
+
+logger = logging.getLogger(__name__)
+
+ROSTER_SNAPSHOT = os.environ.get("DST_ROSTER_SNAPSHOT", "/dev/shm/dst-log-monitor/roster")
+
+MAGIC = b"DSTR"
+LAYOUT_VERSION = 2
+_HEADER = struct.Struct("<4sHHQdI")
+_SEQUENCE = struct.Struct("<Q")
+_SEQUENCE_OFFSET = 8
+_UPDATE = struct.Struct("<dI")
+_UPDATE_OFFSET = 16
+# Shard up, roster version, events published, last save time, player count
+_STATUS = struct.Struct("<?IQdH")
+# Idle since, last resume latency; followed by the idle stage
+_IDLE = struct.Struct("<dd")
+DEFAULT_CAPACITY = 64 * 1024
+# Attempts at reading a consistent snapshot before giving up
+READ_RETRIES = 100
+
+Buffer = Union[bytes, memoryview]
+
+
+class RosterStatus(NamedTuple):
+    """
+    The player list and shard status as published by the log monitor.
+
+    Attributes:
+        sequence (int): Sequence number of the snapshot, increasing with every update.
+        updated (float): Unix time of the update.
+        shard (str): Name of the shard the monitor watches.
+        shard_up (bool): True once the shard has come up.
+        roster_version (int): Version of the SharedState roster snapshot.
+        events (int): Number of events published by the monitor.
+        last_save (float): Unix time of the last completed save, 0 if none was seen.
+        players (Tuple[Tuple[str, str, str], ...]): ID, name and character of each online player.
+        idle_stage (str): Idle stage of the shard, empty if no IdleManager reported one.
+        idle_since (float): Unix time since which the shard has been without players, 0 if it has players.
+        resume_latency (float): Seconds the shard took to unpause after the last player joined, 0 if not measured.
+    """
+
+    sequence: int
+    updated: float
+    shard: str
+    shard_up: bool
+    roster_version: int
+    events: int
+    last_save: float
+    players: Tuple[Tuple[str, str, str], ...]
+    idle_stage: str = ""
+    idle_since: float = 0.0
+    resume_latency: float = 0.0
+
+    @property
+    def player_count(self) -> int:
+        """Number of players online."""
+        return len(self.players)
+
+    def to_dict(self) -> dict:
+        """
+        Convert the snapshot to a JSON-serializable dictionary.
+
+        Returns:
+            dict: The snapshot's fields, with players as dictionaries.
+        """
+        data = self._asdict()
+        data["player_count"] = self.player_count
+        data["players"] = [
+            {"id": player_id, "name": name, "character": character}
+            for player_id, name, character in self.players
+        ]
+        return data
+
+
+def _pack_string(value: str) -> bytes:
+    """Encode a string with a one-byte length prefix, truncating it to 255 bytes."""
+    data = value.encode("utf-8")[:255]
+    return bytes((len(data),)) + data
+
+
+def _unpack_string(payload: Buffer, offset: int) -> Tuple[str, int]:
+    """Decode a length-prefixed string, returning it and the offset after it."""
+    length = payload[offset]
+    end = offset + 1 + length
+    if end > len(payload):
+        raise IndexError("string runs past the end of the payload")
+    return str(payload[offset + 1:end], "utf-8", "replace"), end
+
+
+def encode_payload(
+    shard: str,
+    shard_up: bool,
+    roster_version: int,
+    events: int,
+    last_save: float,
+    players,
+    idle_stage: str = "",
+    idle_since: float = 0.0,
+    resume_latency: float = 0.0,
+) -> bytes:
+    """
+    Encode the snapshot payload.
+
+    Args:
+        shard (str): Name of the shard.
+        shard_up (bool): Whether the shard is up.
+        roster_version (int): Version of the roster.
+        events (int): Number of events published.
+        last_save (float): Unix time of the last save, 0 if none.
+        players: Iterable of (id, name, character) tuples.
+        idle_stage (str): Idle stage of the shard.
+        idle_since (float): Unix time since which the shard has been without players, 0 if it has players.
+        resume_latency (float): Last resume latency in seconds, 0 if none.
+
+    Returns:
+        bytes: The payload.
+    """
+    players = list(players)
+    parts = [
+        _pack_string(shard),
+        _STATUS.pack(shard_up, roster_version, events, last_save, len(players)),
+        _IDLE.pack(idle_since, resume_latency),
+        _pack_string(idle_stage),
+    ]
+    for player in players:
+        parts.extend(_pack_string(field) for field in player)
+    return b"".join(parts)
+
+
+def decode_payload(sequence: int, updated: float, payload: Buffer) -> RosterStatus:
+    """
+    Decode a snapshot payload.
+
+    Args:
+        sequence (int): The snapshot's sequence number.
+        updated (float): The snapshot's update time.
+        payload (Buffer): The payload, e.g. a memoryview of the mapped file.
+
+    Returns:
+        RosterStatus: The decoded snapshot.
+
+    Raises:
+        IndexError: If a string runs past the end of the payload.
+        struct.error: If the payload is too short.
+    """
+    shard, offset = _unpack_string(payload, 0)
+    shard_up, roster_version, events, last_save, count = _STATUS.unpack_from(payload, offset)
+    offset += _STATUS.size
+    idle_since, resume_latency = _IDLE.unpack_from(payload, offset)
+    idle_stage, offset = _unpack_string(payload, offset + _IDLE.size)
+    players = []
+    for _ in range(count):
+        player_id, offset = _unpack_string(payload, offset)
+        name, offset = _unpack_string(payload, offset)
+        character, offset = _unpack_string(payload, offset)
+        players.append((player_id, name, character))
+    return RosterStatus(
+        sequence,
+        updated,
+        shard,
+        shard_up,
+        roster_version,
+        events,
+        last_save,
+        tuple(players),
+        idle_stage,
+        idle_since,
+        resume_latency,
+    )
+
+
+class RosterSnapshotWriter:
+    """
+    Writes the player list and shard status to the snapshot file on every event.
+    """
+
+    def __init__(
+        self,
+        path: str = ROSTER_SNAPSHOT,
+        shard: str = "",
+        state: SharedState = shared_state,
+        capacity: int = DEFAULT_CAPACITY,
+    ):
+        """
+        Initialize the RosterSnapshotWriter.
+
+        Args:
+            path (str): Path of the snapshot file, preferably on a tmpfs such as /dev/shm.
+            shard (str): Name of the shard the monitor watches.
+            state (SharedState): The player state whose snapshot is published.
+            capacity (int): Size of the snapshot file in bytes.
+        """
+        self.path = path
+        self.shard = shard
+        self.state = state
+        self.capacity = capacity
+        self.shard_up = False
+        self.last_save = 0.0
+        self.idle_stage = ""
+        self.idle_since = 0.0
+        self.resume_latency = 0.0
+        self.events = 0
+        self.writes = 0
+        self.dropped = 0
+        self._sequence = 0
+        self._map: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, event: ServerEvent) -> None:
+        """
+        Update the shard status from an event and write a new snapshot. Used as an EventPublisher subscriber.
+
+        Args:
+            event (ServerEvent): The published event.
+        """
+        self.events += 1
+        if event.type == SHARD_UP:
+            self.shard_up = True
+        elif event.type == SAVE_COMPLETE:
+            self.last_save = event.time
+        elif event.type == SHARD_IDLE:
+            self.idle_stage = event.data["stage"]
+            self.idle_since = event.data["idle_since"]
+        elif event.type == SHARD_RESUMED:
+            self.resume_latency = event.data["resume_latency"]
+        self.write()
+
+    def start(self) -> None:
+        """Map the snapshot file, creating it if needed, and write the current state."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != self.capacity:
+                os.ftruncate(fd, self.capacity)
+            self._map = mmap.mmap(fd, self.capacity)
+        finally:
+            os.close(fd)
+        magic, layout, _, sequence, _, _ = _HEADER.unpack_from(self._map, 0)
+        if magic == MAGIC and layout == LAYOUT_VERSION:
+            # Continue the previous writer's sequence so readers notice the new state
+            self._sequence = sequence + (sequence & 1)
+        else:
+            _HEADER.pack_into(self._map, 0, MAGIC, LAYOUT_VERSION, 0, 0, 0.0, 0)
+        self.write()
+
+    def stop(self) -> None:
+        """Write a final snapshot and unmap the file. The file is kept for readers."""
+        if self._map is None:
+            return
+        self.write()
+        with self._lock:
+            self._map.close()
+            self._map = None
+
+    def write(self) -> None:
+        """Write a snapshot of the current player list and shard status."""
+        roster = self.state.snapshot
+        payload = encode_payload(
+            self.shard,
+            self.shard_up,
+            roster.version,
+            self.events,
+            self.last_save,
+            ((player.id, player.name, player.character) for player in roster.players.values()),
+            self.idle_stage,
+            self.idle_since,
+            self.resume_latency,
+        )
+        with self._lock:
+            if self._map is None:
+                return
+            if _HEADER.size + len(payload) > self.capacity:
+                self.dropped += 1
+                logger.error(f"Roster snapshot of {len(payload)} bytes does not fit in {self.path}")
+                return
+            self._sequence += 1
+            _SEQUENCE.pack_into(self._map, _SEQUENCE_OFFSET, self._sequence)
+            self._map[_HEADER.size:_HEADER.size + len(payload)] = payload
+            _UPDATE.pack_into(self._map, _UPDATE_OFFSET, time.time(), len(payload))
+            self._sequence += 1
+            _SEQUENCE.pack_into(self._map, _SEQUENCE_OFFSET, self._sequence)
+            self.writes += 1
+
+
+class RosterSnapshotReader:
+    """
+    Reads the snapshot file written by a RosterSnapshotWriter in another process.
+    """
+
+    def __init__(self, path: str = ROSTER_SNAPSHOT):
+        """
+        Initialize the RosterSnapshotReader. The file is mapped on the first read.
+
+        Args:
+            path (str): Path of the snapshot file.
+        """
+        self.path = path
+        self.torn_reads = 0
+        self._map: Optional[mmap.mmap] = None
+        self._cached: Optional[RosterStatus] = None
+
+    def read(self) -> Optional[RosterStatus]:
+        """
+        Read the current snapshot.
+
+        Returns:
+            Optional[RosterStatus]: The snapshot, or None if no valid snapshot has been written.
+        """
+        if self._map is None and not self._open():
+            return None
+        mapped = self._map
+        for _ in range(READ_RETRIES):
+            sequence = _SEQUENCE.unpack_from(mapped, _SEQUENCE_OFFSET)[0]
+            if sequence & 1:
+                self.torn_reads += 1
+                time.sleep(0)
+                continue
+            if self._cached is not None and self._cached.sequence == sequence:
+                return self._cached
+            updated, length = _UPDATE.unpack_from(mapped, _UPDATE_OFFSET)
+            status = self._decode(sequence, updated, length) if length else None
+            if _SEQUENCE.unpack_from(mapped, _SEQUENCE_OFFSET)[0] != sequence:
+                self.torn_reads += 1
+                continue
+            if not length:
+                return None
+            if status is None:
+                logger.error(f"Invalid roster snapshot in {self.path}")
+                return None
+            self._cached = status
+            return self._cached
+        return self._cached
+
+    def _decode(self, sequence: int, updated: float, length: int) -> Optional[RosterStatus]:
+        """
+        Decode the payload in place. The result is only valid if the sequence number is unchanged afterwards.
+
+        Args:
+            sequence (int): The sequence number read before decoding.
+            updated (float): The update time read before decoding.
+            length (int): The payload length read before decoding.
+
+        Returns:
+            Optional[RosterStatus]: The decoded snapshot, or None if the payload could not be decoded.
+        """
+        end = _HEADER.size + min(length, len(self._map) - _HEADER.size)
+        # Released before returning, or the mapping could not be closed
+        with memoryview(self._map)[_HEADER.size:end] as payload:
+            try:
+                return decode_payload(sequence, updated, payload)
+            except (IndexError, struct.error):
+                return None
+
+    def close(self) -> None:
+        """Unmap the file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _open(self) -> bool:
+        """
+        Map the snapshot file if it exists and is valid.
+
+        Returns:
+            bool: True if the file was mapped.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return False
+        if len(mapped) < _HEADER.size or mapped[:4] != MAGIC:
+            mapped.close()
+            return False
+        if _HEADER.unpack_from(mapped, 0)[1] != LAYOUT_VERSION:
+            logger.error(f"Unsupported roster snapshot layout in {self.path}")
+            mapped.close()
+            return False
+        self._map = mapped
+        return True
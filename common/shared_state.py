@@ -4,10 +4,15 @@ Shared State Module
 This module provides a SharedState class for managing the shared state of players
 in a Don't Starve Together (DST) dedicated server. It includes functionality for
 tracking player information, authentication, and game events.
+
+Every change to the player list also publishes an immutable RosterSnapshot, which other
+threads, such as an admin API, can read without taking a lock.
 """
 
 from collections import deque
-from typing import Dict, Deque, Optional
+from dataclasses import replace
+from types import MappingProxyType
+from typing import Dict, Deque, Iterable, Mapping, NamedTuple, Optional
 import logging
 import threading
 from common.player import Player, validate_username
@@ -15,6 +20,24 @@ from common.player import Player, validate_username
 logger = logging.getLogger(__name__)
 
 
+class RosterSnapshot(NamedTuple):
+    """
+    An immutable copy of the player list.
+
+    Attributes:
+        version (int): Number of the snapshot, increasing with every change.
+        players (Mapping[str, Player]): Copies of the players by ID. They must not be modified.
+        by_name (Mapping[str, Player]): The same players by name.
+    """
+
+    version: int
+    players: Mapping[str, Player]
+    by_name: Mapping[str, Player]
+
+
+EMPTY_ROSTER = RosterSnapshot(0, MappingProxyType({}), MappingProxyType({}))
+
+
 class SharedState:
     """
     Manages the shared state of players in a DST dedicated server.
@@ -28,6 +51,7 @@ class SharedState:
         self.players: Dict[str, Player] = {}
         self.recent_authentications: Deque[str] = deque(maxlen=10)
         self.auth_lock = threading.Lock()
+        self.snapshot: RosterSnapshot = EMPTY_ROSTER
 
     def sync_player_state(self, player: Player, character: str = "") -> None:
         """
@@ -49,14 +73,17 @@ class SharedState:
                 existing_player.character = character
             existing_player.authenticated = player.authenticated
             logger.info(
-                f"Updated player: ({player.id}) {existing_player.name} <{player.character}>"
+                "Updated player: (%s) %s <%s>",
+                player.id,
+                existing_player.name,
+                player.character,
             )
         else:
             if character:
                 player.character = character
             self.players[player.id] = player
             logger.info(
-                f"Added new player: ({player.id}) {player.name} <{player.character}>"
+                "Added new player: (%s) %s <%s>", player.id, player.name, player.character
             )
 
         self.output_player_list()
@@ -176,8 +203,40 @@ class SharedState:
         """
         return self.players.get(player_id)
 
+    def replace_players(self, players: Iterable[Player]) -> None:
+        """
+        Replace the whole player list, e.g. with a roster reported by another process.
+
+        Args:
+            players (Iterable[Player]): The players currently online.
+        """
+        self.players = {player.id: player for player in players}
+        self.output_player_list()
+
+    def update_snapshot(self) -> RosterSnapshot:
+        """
+        Publish a new snapshot of the player list.
+
+        Called after every change; call it after changing players directly as well.
+
+        Returns:
+            RosterSnapshot: The new snapshot.
+        """
+        players = {player_id: replace(player) for player_id, player in self.players.items()}
+        snapshot = RosterSnapshot(
+            self.snapshot.version + 1,
+            MappingProxyType(players),
+            MappingProxyType({player.name: player for player in players.values()}),
+        )
+        # A single attribute assignment, so readers see either the old or the new snapshot
+        self.snapshot = snapshot
+        return snapshot
+
     def output_player_list(self):
-        """Log the current list of players."""
+        """Publish a snapshot of the player list and log it."""
+        self.update_snapshot()
+        if not logger.isEnabledFor(logging.INFO):
+            return
         if self.players:
             player_info = ", ".join(
                 [
@@ -185,7 +244,7 @@ class SharedState:
                     for player in self.players.values()
                 ]
             )
-            logger.info(f"Current players: {player_info}")
+            logger.info("Current players: %s", player_info)
         else:
             logger.info("No players currently online.")
 
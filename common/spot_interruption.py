@@ -0,0 +1,262 @@
+"""
+Spot Interruption Module
+
+This module provides a SpotInterruptionWatcher that polls the EC2 instance metadata service
+for a spot interruption notice. The shards run on spot capacity, which EC2 may reclaim with a
+two-minute notice; without a save, everything since the last autosave would be lost.
+
+On a notice the watcher announces the shutdown in game, saves the world with c_save() and
+waits for the save sequence detected by the save event handler, which publishes a
+SAVE_COMPLETE event. Once the save is complete the file system is synced, and the time from
+the notice to the durable save is published in an INTERRUPTION_SAVED event. If no save
+completes in time, c_save() is issued again until the instance is due to be reclaimed.
+
+The metadata service is queried with IMDSv2 session tokens. Its URL can be pointed at a
+local stand-in for tests with the DST_METADATA_URL environment variable.
+"""
+
+import calendar
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, Optional
+
+from common.event_stream import (
+    INTERRUPTION_SAVED,
+    SAVE_COMPLETE,
+    SPOT_INTERRUPTION,
+    EventPublisher,
+    ServerEvent,
+    event_publisher,
+)
+from common.game_commands import GameCommandExecutor
+
+logger = logging.getLogger(__name__)
+
+METADATA_URL = os.environ.get("DST_METADATA_URL", "http://169.254.169.254")
+TOKEN_PATH = "/latest/api/token"
+INSTANCE_ACTION_PATH = "/latest/meta-data/spot/instance-action"
+# Lifetime of a metadata session token in seconds
+TOKEN_TTL = 21600
+# Seconds between checks for an interruption notice, as recommended by AWS
+POLL_INTERVAL = 5.0
+REQUEST_TIMEOUT = 2.0
+# Seconds between an interruption notice and the instance being reclaimed
+INTERRUPTION_WINDOW = 120
+# Seconds to wait for a save to complete before issuing c_save() again
+SAVE_RETRY = 30
+
+# The metadata service is link-local, so requests never go through a proxy
+_opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+def parse_action_time(value: str) -> Optional[float]:
+    """
+    Parse the time of an instance action, e.g. "2017-09-18T08:22:00Z".
+
+    Args:
+        value (str): The time in ISO 8601 format, in UTC.
+
+    Returns:
+        Optional[float]: The Unix time, or None if it cannot be parsed.
+    """
+    try:
+        return float(calendar.timegm(time.strptime(value, "%Y-%m-%dT%H:%M:%SZ")))
+    except (TypeError, ValueError):
+        return None
+
+
+class SpotInterruptionWatcher:
+    """
+    Polls for a spot interruption notice and saves the world before the instance is reclaimed.
+
+    Also used as an EventPublisher subscriber, to learn when a save has completed.
+    """
+
+    def __init__(
+        self,
+        url: str = METADATA_URL,
+        shard: str = "",
+        executor: Optional[GameCommandExecutor] = None,
+        publisher: EventPublisher = event_publisher,
+        poll_interval: float = POLL_INTERVAL,
+        save_retry: float = SAVE_RETRY,
+    ):
+        """
+        Initialize the SpotInterruptionWatcher.
+
+        Args:
+            url (str): Base URL of the instance metadata service.
+            shard (str): Name of the shard, included in the published events.
+            executor (Optional[GameCommandExecutor]): Executor used for announcements and saves.
+            publisher (EventPublisher): Publisher of the save events and the interruption events.
+            poll_interval (float): Seconds between checks for a notice.
+            save_retry (float): Seconds to wait for a save to complete before saving again.
+        """
+        self.url = url.rstrip("/")
+        self.shard = shard
+        self.executor = executor or GameCommandExecutor()
+        self.publisher = publisher
+        self.poll_interval = poll_interval
+        self.save_retry = save_retry
+        self.notice: Optional[Dict[str, Any]] = None
+        self.saves = 0
+        self.time_to_durable_save: Optional[float] = None
+        self.errors = 0
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._save_requested = False
+        self._saved = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __call__(self, event: ServerEvent) -> None:
+        """
+        Note a completed save once one was requested. Used as an EventPublisher subscriber.
+
+        Args:
+            event (ServerEvent): The published event.
+        """
+        if event.type == SAVE_COMPLETE and self._save_requested:
+            self._saved.set()
+
+    def start(self) -> None:
+        """Subscribe to save events and start polling on a background thread."""
+        self.publisher.subscribe(self)
+        self._thread = threading.Thread(target=self._run, name="spot-interruption", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching for spot interruption notices at {self.url}")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop polling. A save that is in progress is waited for, up to the timeout.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for the background thread.
+        """
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.publisher.unsubscribe(self)
+
+    def check(self) -> Optional[Dict[str, Any]]:
+        """
+        Ask the metadata service for an interruption notice.
+
+        Returns:
+            Optional[Dict[str, Any]]: The notice, e.g. {"action": "terminate", "time": "..."},
+            or None if there is none.
+
+        Raises:
+            OSError: If the metadata service cannot be reached.
+            ValueError: If the notice is not valid JSON.
+        """
+        for attempt in range(2):
+            try:
+                body = self._request(
+                    "GET", INSTANCE_ACTION_PATH, {"X-aws-ec2-metadata-token": self._session_token()}
+                )
+            except urllib.error.HTTPError as e:
+                if e.code == 404:
+                    return None
+                if e.code != 401 or attempt:
+                    raise
+                # The token expired early, e.g. because the instance was stopped and started
+                self._token = None
+                continue
+            return json.loads(body)
+        return None
+
+    def handle_notice(self, notice: Dict[str, Any]) -> None:
+        """
+        Announce the shutdown and save the world until a save is durable or time runs out.
+
+        Args:
+            notice (Dict[str, Any]): The interruption notice.
+        """
+        noticed_at = time.monotonic()
+        now = time.time()
+        action_time = parse_action_time(notice.get("time")) or now + INTERRUPTION_WINDOW
+        self.notice = notice
+        remaining = max(action_time - now, 0.0)
+        logger.warning(f"Spot interruption notice: {notice.get('action')} in {remaining:.0f}s")
+        self.publisher.publish(SPOT_INTERRUPTION, shard=self.shard, action=notice.get("action"), seconds_left=remaining)
+        self.executor.send_console_message(
+            f"This server will shut down in about {remaining:.0f} seconds. Saving the world now!"
+        )
+
+        self._save_requested = True
+        while not self._saved.is_set():
+            remaining = action_time - time.time()
+            if remaining <= 0:
+                break
+            self.saves += 1
+            self.executor.save_game()
+            self._saved.wait(min(self.save_retry, remaining))
+
+        saved = self._saved.is_set()
+        if saved:
+            os.sync()
+            self.time_to_durable_save = time.monotonic() - noticed_at
+            logger.info(f"World saved {self.time_to_durable_save:.1f}s after the spot interruption notice")
+            self.executor.send_console_message("World saved. The server will be back shortly.")
+        else:
+            logger.error(f"No save completed before the instance is reclaimed ({self.saves} attempts)")
+        self.publisher.publish(
+            INTERRUPTION_SAVED,
+            shard=self.shard,
+            saved=saved,
+            saves=self.saves,
+            time_to_durable_save=self.time_to_durable_save,
+        )
+
+    def _run(self) -> None:
+        """Check for a notice every poll interval until one arrives or the watcher is stopped."""
+        while not self._stopped.is_set():
+            try:
+                notice = self.check()
+            except (OSError, ValueError) as e:
+                self.errors += 1
+                # Expected where there is no metadata service, so only logged once at info level
+                log = logger.info if self.errors == 1 else logger.debug
+                log(f"Could not check for a spot interruption notice: {str(e)}")
+                notice = None
+            if notice:
+                self.handle_notice(notice)
+                return
+            self._stopped.wait(self.poll_interval)
+
+    def _session_token(self) -> str:
+        """
+        Return an IMDSv2 session token, requesting a new one when it is about to expire.
+
+        Returns:
+            str: The token.
+        """
+        if self._token is None or time.monotonic() >= self._token_expires:
+            self._token = self._request(
+                "PUT", TOKEN_PATH, {"X-aws-ec2-metadata-token-ttl-seconds": str(TOKEN_TTL)}
+            ).decode()
+            self._token_expires = time.monotonic() + TOKEN_TTL - 60
+        return self._token
+
+    def _request(self, method: str, path: str, headers: Dict[str, str]) -> bytes:
+        """
+        Send a request to the metadata service.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The path of the resource.
+            headers (Dict[str, str]): The request headers.
+
+        Returns:
+            bytes: The response body.
+        """
+        request = urllib.request.Request(self.url + path, method=method, headers=headers)
+        with _opener.open(request, timeout=REQUEST_TIMEOUT) as response:
+            return response.read()
@@ -0,0 +1,80 @@
+"""
+Startup Module
+
+This module provides a StartupReport class that records how long each phase of the log
+monitor's startup takes, and how long each handler module took to discover or import.
+A single shared instance, startup_report, is used by the monitor and the handler loader.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """
+    Collects startup timings and formats them as a report.
+    """
+
+    def __init__(self):
+        """Initialize the StartupReport with the current time as the start."""
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self.modules: Dict[str, Tuple[str, float]] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time a startup phase.
+
+        Args:
+            name (str): Name of the phase as shown in the report.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        """
+        Record the duration of a startup phase.
+
+        Args:
+            name (str): Name of the phase as shown in the report.
+            seconds (float): Duration of the phase.
+        """
+        self.phases.append((name, seconds))
+
+    def add_module(self, module_name: str, action: str, seconds: float) -> None:
+        """
+        Record how long a handler module took to load.
+
+        Args:
+            module_name (str): Name of the handler module.
+            action (str): What was done, e.g. "imported" or "deferred".
+            seconds (float): Duration of the action.
+        """
+        self.modules[module_name] = (action, seconds)
+
+    def format(self) -> str:
+        """
+        Format the recorded timings.
+
+        Returns:
+            str: A multi-line report with one line per phase and per module.
+        """
+        lines = [
+            f"Startup took {(time.perf_counter() - self.started) * 1000:.1f} ms"
+        ]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<54} {seconds * 1000:8.1f} ms")
+        for module_name, (action, seconds) in sorted(self.modules.items()):
+            lines.append(f"  {module_name:<44} {action:<9} {seconds * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+startup_report = StartupReport()
@@ -15,16 +15,27 @@ else
     exit 1
 fi
 
+# Seed Workshop mods from the cache on the data volume, so the shards only download mods
+# that are new or were updated. Missing mods are fetched into the cache with steamcmd first.
+# Both steps run in one process, so each cached mod is verified only once, and the seeded
+# mods are listed in the UGC directory's appworkshop_322330.acf as installed.
+UGC_DIRECTORY="${DST_UGC_DIRECTORY:-${STEAMAPPDIR}/ugc_mods}"
+PYTHON="${PYTHON:-/opt/venv/bin/python3}"
+if [ -z "${DST_NO_MOD_CACHE}" ]; then
+    "${PYTHON}" "${HOME}/common/mod_cache.py" prefetch seed --ugc-directory "${UGC_DIRECTORY}" \
+        || echo "WARNING: Seeding mods from the cache failed; the shards will download them."
+fi
+
 # Change to the directory where the DST server binaries are located
 cd "${STEAMAPPDIR}/bin"
 
 # Launch the Master (Overworld) shard in a tmux session
 tmux new-session -d -s DST-dedicated -n Master \
-    "./dontstarve_dedicated_server_nullrenderer -cluster Cluster_1 -shard Master; bash -i"
+    "./dontstarve_dedicated_server_nullrenderer -cluster Cluster_1 -shard Master -ugc_directory ${UGC_DIRECTORY}; bash -i"
 
 # Launch the Cave shard in a separate tmux window
 tmux new-window -d -n Caves -t DST-dedicated: \
-    "./dontstarve_dedicated_server_nullrenderer -cluster Cluster_1 -shard Caves; bash -i"
+    "./dontstarve_dedicated_server_nullrenderer -cluster Cluster_1 -shard Caves -ugc_directory ${UGC_DIRECTORY}; bash -i"
 
 # Attach to the tmux session (optional, can be useful for debugging)
 #tmux attach-session -t DST-dedicated
@@ -11,6 +11,10 @@ This example can be used as a template for creating other custom event handlers.
 # and triggers actions based on these events.
 
 import logging
+from common.event_stream import (
+    SERVER_UNPAUSED,
+    event_publisher,
+)  # Import the event publisher to share the event with other tools
 from common.game_commands import (
     GameCommandExecutor,
 )  # Import the GameCommandExecutor to send in-game commands
@@ -38,6 +42,9 @@ def handle_server_unpaused(log_line):
     # Log the event at INFO level to track when the server unpauses.
     logger.info(f"Detected server unpause: {log_line}")
 
+    # Publish a structured event, e.g. for the JSONL event log and other subscribers.
+    event_publisher.publish(SERVER_UNPAUSED)
+
     # Send an in-game message to all connected players, notifying them that the server is unpaused.
     # This uses the GameCommandExecutor instance (executor) to send a message to the game's console.
     executor.send_console_message("Server has been unpaused!")
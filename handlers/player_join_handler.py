@@ -8,6 +8,13 @@ with the event registry.
 
 import logging
 from typing import Any
+from common.event_stream import (
+    PLAYER_JOIN,
+    PLAYER_LEAVE,
+    PLAYER_RESUME,
+    PLAYER_SPAWN,
+    event_publisher,
+)
 from common.game_commands import GameCommandExecutor
 from common.shared_state import shared_state, Player
 from common.player_utils import (
@@ -46,6 +53,7 @@ def handle_player_join(line: str) -> None:
 
     # Track the player's ID for recent authentication
     shared_state.track_authentication(player_id)
+    event_publisher.publish(PLAYER_JOIN, player_id=player_id, name=username)
 
     # Send welcome message (in-game)
     executor.send_console_message(f"{username} has joined the server!")
@@ -69,6 +77,7 @@ def handle_player_leave(line: str) -> None:
 
     # Remove the player from shared_state and get the player's name
     player_name = shared_state.remove_player(player_id)
+    event_publisher.publish(PLAYER_LEAVE, player_id=player_id, name=player_name)
 
     # Send leave message (in-game)
     executor.send_console_message(f"{player_name} has left the server!")
@@ -93,6 +102,7 @@ def handle_player_resume(line: str) -> None:
         # Send welcome back message (in-game)
         player = shared_state.get_player_by_id(player_id)
         if player:
+            event_publisher.publish(PLAYER_RESUME, player_id=player_id, name=player.name)
             executor.send_console_message(f"Welcome back {player.name}!")
     else:
         logger.warning(
@@ -118,6 +128,9 @@ def handle_player_spawn(line: str) -> None:
         if player:
             # Sync player state with the character information
             shared_state.sync_player_state(player, character=character)
+            event_publisher.publish(
+                PLAYER_SPAWN, player_id=player.id, name=player.name, character=character
+            )
 
             # Send in-game notification
             executor.send_console_message(f"{player.name} has spawned as {character}!")
@@ -8,8 +8,8 @@ the command output and updates the shared state with the current list of players
 
 import logging
 from typing import List, Any
-from pygrok import Grok
-
+from common.event_stream import ROSTER, event_publisher
+from common.grok_cache import CachedGrok
 from common.shared_state import shared_state, Player
 
 logger = logging.getLogger(__name__)
@@ -31,7 +31,7 @@ class PlayerListHandler:
     def __init__(self):
         self.waiting_for_player_list = False
         self.player_lines: List[str] = []
-        self.grok = Grok(PLAYER_LIST_PATTERN)
+        self.grok = CachedGrok(PLAYER_LIST_PATTERN)
 
     def handle_player_log_line(self, log_line: str) -> None:
         """
@@ -43,7 +43,7 @@ class PlayerListHandler:
         Args:
             log_line (str): The log line to process.
         """
-        logger.debug(f"Processing log line: {log_line}")
+        logger.debug("Processing log line: %s", log_line)
 
         if 'RemoteCommandInput: "c_listallplayers()"' in log_line:
             self._start_player_list_processing()
@@ -90,7 +90,14 @@ class PlayerListHandler:
             else:
                 logger.error(f"Failed to parse player list line: {line}")
 
-        logger.debug(f"Player list updated based on c_listallplayers() output.")
+        event_publisher.publish(
+            ROSTER,
+            players=[
+                {"id": player.id, "name": player.name, "character": player.character}
+                for player in shared_state.players.values()
+            ],
+        )
+        logger.debug("Player list updated based on c_listallplayers() output.")
         self.player_lines = []
 
 
@@ -6,6 +6,7 @@ It includes a SaveEventHandler class that processes save event log lines and sen
 """
 
 import logging
+from common.event_stream import SAVE_COMPLETE, event_publisher
 from common.game_commands import GameCommandExecutor
 from common.grouped_events import GroupedEventHandler
 
@@ -52,7 +53,8 @@ class SaveEventHandler:
         """
         logger.info(f"Save event completed. Collected {len(event_lines)} log lines.")
         for line in event_lines:
-            logger.debug(f"Save event log: {line}")
+            logger.debug("Save event log: %s", line)
+        event_publisher.publish(SAVE_COMPLETE, lines=len(event_lines))
         self.executor.send_console_message("Save sequence complete!")
 
 
@@ -7,9 +7,10 @@ It includes a ShardServerHandler class and a function to register the handler wi
 
 import logging
 from typing import List, Any
+from common.event_stream import SHARD_UP, event_publisher
 from common.game_commands import GameCommandExecutor
 from common.grouped_events import GroupedEventHandler
-from common.mod_manager import get_installed_mods
+from common.mod_manager import InstalledModsRegistry, installed_mods_registry
 
 # Set up logger for this module
 logger = logging.getLogger(__name__)
@@ -27,11 +28,15 @@ class ShardServerHandler:
     and logs information about installed mods when the server starts up.
     """
 
-    def __init__(self):
+    def __init__(self, registry: InstalledModsRegistry = installed_mods_registry):
         """
         Initialize the ShardServerHandler.
+
+        Args:
+            registry (InstalledModsRegistry): Registry the installed mods are read from.
         """
         self._executor = None
+        self.registry = registry
 
     @property
     def executor(self):
@@ -60,7 +65,10 @@ class ShardServerHandler:
         self.executor.send_console_message("Server is up and running!")
 
         # Log enabled mods
-        enabled_mods = get_installed_mods()
+        enabled_mods = self.registry.mods()
+        event_publisher.publish(
+            SHARD_UP, mods=[{"id": mod[0], "name": mod[1]} for mod in enabled_mods]
+        )
         if enabled_mods:
             mod_info = "\n".join([f"[{mod[0]}]: {mod[1]}" for mod in enabled_mods])
             logger.info(f"Installed mods:\n{mod_info}")
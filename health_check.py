@@ -1,30 +1,70 @@
-import http.server
-import socketserver
-import subprocess
-
-PORT = 8080
-
-class HealthCheckHandler(http.server.SimpleHTTPRequestHandler):
-    def do_GET(self):
-        if self.path == '/' or self.path == '/health':
-            # Check if the DST server process is running
-            try:
-                subprocess.check_output(["pgrep", "-f", "dontstarve_dedicated_server_nullrenderer"])
-                self.send_response(200)
-                self.send_header('Content-type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(b'OK')
-            except subprocess.CalledProcessError:
-                self.send_response(500)
-                self.send_header('Content-type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(b'DST server not running')
-        else:
-            self.send_response(404)
-            self.send_header('Content-type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(b'Not Found')
-
-with socketserver.TCPServer(("", PORT), HealthCheckHandler) as httpd:
-    print(f"Serving health check at port {PORT}")
-    httpd.serve_forever()
\ No newline at end of file
+"""
+DST Server Health Check
+
+This script serves the health check used by the Kubernetes probes on port 8080, streams
+live server events from the log monitor to HTTP clients as server-sent events on /events,
+and serves the admin API. See common.health_server and common.admin_api for details.
+"""
+
+import argparse
+import logging
+
+from common.admin_api import AdminApi
+from common.event_socket import EVENT_SOCKET
+from common.health_server import EVENT_HISTORY, MAX_CONNECTIONS, PORT, HealthServer
+from common.roster_snapshot import ROSTER_SNAPSHOT
+
+
+def main() -> None:
+    """
+    Main entry point for the health check script.
+
+    This function parses command-line arguments and runs the health server until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="DST Server Health Check")
+    parser.add_argument(
+        "--port", type=int, default=PORT, help=f"TCP port to listen on (default: {PORT})"
+    )
+    parser.add_argument(
+        "--event-socket",
+        default=EVENT_SOCKET,
+        help=f"The log monitor's event socket (default: {EVENT_SOCKET})",
+    )
+    parser.add_argument(
+        "--event-history",
+        type=int,
+        default=EVENT_HISTORY,
+        help="Number of recent events kept for clients resuming the event stream",
+    )
+    parser.add_argument(
+        "--roster-snapshot",
+        default=ROSTER_SNAPSHOT,
+        help=f"The log monitor's roster snapshot file (default: {ROSTER_SNAPSHOT})",
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=MAX_CONNECTIONS,
+        help=f"Connections served at once, further ones get 503 (default: {MAX_CONNECTIONS})",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+    server = HealthServer(
+        port=args.port,
+        event_socket=args.event_socket,
+        history=args.event_history,
+        roster_snapshot=args.roster_snapshot,
+        max_connections=args.max_connections,
+    )
+    AdminApi(server)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
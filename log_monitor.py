@@ -3,97 +3,256 @@ DST Server Log Monitor
 
 This module implements a log monitor for Don't Starve Together server logs.
 It watches for changes in the log file and processes new log entries.
+The log file itself is watched with inotify where available, with adaptive
+polling as a fallback. With --hot-reload, changed handler modules are
+re-imported and swapped in while the monitor keeps running.
+Sending SIGUSR1 starts or stops profiling of the pipeline, and SIGUSR2 logs
+a memory report and starts or stops tracing allocations. Events classified by the handlers are written as JSON lines
+to events/events.jsonl in the cluster directory and published on a Unix
+socket for other local tools. The player list and shard status are also kept
+in a memory-mapped roster snapshot for other processes. While the shard has
+no players, the idle manager pauses it and signals low power and scale-down
+after configurable delays. On a spot interruption notice from the instance
+metadata service, the world is saved before the node is reclaimed. On SIGTERM
+the monitor stops reading, handles the lines already written and queued within
+a deadline, and writes out pending events before it exits.
 """
 
 import os
+import signal
 import sys
+import threading
 import time
-import importlib
 import logging
 import argparse
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from typing import Optional, Sequence, Union
+
+# Imported first so the startup report includes the time spent importing the rest
+from common.startup import startup_report
 from common.event_registry import EventRegistry
+from common.event_socket import (
+    DROP_OLDEST,
+    DROP_POLICIES,
+    EVENT_SOCKET,
+    EventSocketServer,
+)
+from common.event_stream import event_publisher
+from common.game_commands import (
+    RecordingCommandSink,
+    TmuxCommandSink,
+    get_command_sink,
+    set_command_sink,
+)
+from common.ingest_queue import (
+    BACKPRESSURE_BLOCK,
+    BACKPRESSURE_POLICIES,
+    IngestQueue,
+)
+from common.grouped_events import GroupedEventHandler
+from common.hot_reload import HandlerReloader
+from common.idle_manager import IdleManager
+from common.jsonl_sink import FSYNC_INTERVAL, FSYNC_POLICIES, JsonlEventSink
+from common.line_filter import KeywordPrefilter, decode_line, last_server_time
+from common.log_watcher import create_log_watcher
+from common.log_record import (
+    LogLineParser,
+    parse_server_time,
+    read_last_server_time,
+)
+from common.bulk_ingest import BulkIngestor
+from common.log_pipeline import configure_logging, stop_logging
+from common.memory_monitor import MB, MemoryMonitor
+from common.profiling import DEFAULT_PROFILE_DIR, PROFILE_MODES, profiler
+from common.replay import LogReplayer
+from common.roster_snapshot import ROSTER_SNAPSHOT, RosterSnapshotWriter
+from common.spot_interruption import METADATA_URL, SpotInterruptionWatcher
+
+startup_report.add_phase("imports", time.perf_counter() - startup_report.started)
 
 # Constants
 LOGFILE = (
     "/home/steam/.klei/DoNotStarveTogether/Cluster_1/Master/server_log.txt"
 )
 HANDLERS_DIR = "handlers"
+SHARD_NAME = os.path.basename(os.path.dirname(LOGFILE))
+EVENT_LOG = os.path.join(
+    os.path.dirname(os.path.dirname(LOGFILE)), "events", "events.jsonl"
+)
+COMMAND_SINKS = ("tmux", "record")
+
+EventConsumer = Union[JsonlEventSink, EventSocketServer, RosterSnapshotWriter]
+
+# When more than this many bytes are unread, look at the end of the log first so
+# the ingest queue knows how far behind the lines it is about to dispatch are.
+HEAD_PROBE_THRESHOLD = 64 * 1024
+# New log data is read in chunks of at most this many bytes
+READ_CHUNK_BYTES = 1024 * 1024
+
+# Seconds to finish handling queued log lines when stopping
+DRAIN_TIMEOUT = 20.0
 
 # Global debug flag
 DEBUG_MODE = False
+# Seconds during which repeated log messages are suppressed
+LOG_DUPLICATE_WINDOW = 10.0
 
 
-class LogEventHandler(FileSystemEventHandler):
+class LogEventHandler:
     """
-    Handles file system events for the log file.
+    Handles change notifications for the log file.
 
-    This class extends FileSystemEventHandler to process modifications
-    to the monitored log file.
+    This class reads the lines appended to the monitored log file and starts
+    over from the beginning when the file was replaced or truncated.
     """
 
-    def __init__(self, logger: logging.Logger, event_registry: EventRegistry):
+    def __init__(self, logger: logging.Logger, ingest_queue: IngestQueue):
         """
         Initialize the LogEventHandler.
 
         Args:
             logger (logging.Logger): Logger instance for this handler.
-            event_registry (EventRegistry): Registry for event handlers.
+            ingest_queue (IngestQueue): Queue that dispatches lines to the event registry.
         """
         self.last_file_position = 0
+        self.log_inode = None
         self.logger = logger
-        self.event_registry = event_registry
+        self.ingest_queue = ingest_queue
+        self.parser = LogLineParser(SHARD_NAME)
+        self.prefilter = KeywordPrefilter(ingest_queue.event_registry)
+        self.initial_read = threading.Event()
 
-    def on_modified(self, event: FileSystemEvent) -> None:
+    def on_log_changed(self, rotated: bool = False) -> None:
         """
-        Handle file modification events.
+        Handle a change notification from the log watcher.
 
         Args:
-            event (FileSystemEvent): The event object representing the file system event.
+            rotated (bool): True if the log file was moved or deleted since the last notification.
         """
-        if event.src_path == LOGFILE:
-            self._process_new_log_lines()
+        profiler.sync_thread()
+        try:
+            self._process_new_log_lines(rotated)
+        finally:
+            self.initial_read.set()
 
-    def _process_new_log_lines(self) -> None:
-        """Process new lines added to the log file since last read."""
+    def _process_new_log_lines(self, rotated: bool = False) -> None:
+        """
+        Process new lines added to the log file since last read.
+
+        The log is read as raw bytes and only complete lines are consumed; a trailing
+        partial line is left for the next read.
+
+        Args:
+            rotated (bool): True if the log file may have been replaced since the last read.
+        """
         try:
-            with open(LOGFILE, "r") as f:
-                f.seek(self.last_file_position)
-                for line in f:
-                    self._process_log_line(line.strip())
-                self.last_file_position = f.tell()
+            with open(LOGFILE, "rb", buffering=0) as f:
+                stat = os.fstat(f.fileno())
+                if (
+                    rotated
+                    or stat.st_ino != self.log_inode
+                    or stat.st_size < self.last_file_position
+                ):
+                    self._start_new_log(stat)
+                self._probe_log_head(f, stat)
+                profiling = profiler.enabled
+                while True:
+                    started = time.perf_counter() if profiling else 0.0
+                    data = os.pread(f.fileno(), READ_CHUNK_BYTES, self.last_file_position)
+                    if profiling:
+                        read_done = time.perf_counter()
+                        profiler.record("read", read_done - started)
+                    end = data.rfind(b"\n") + 1
+                    if profiling:
+                        profiler.record("split", time.perf_counter() - read_done)
+                    if not end:
+                        if len(data) < READ_CHUNK_BYTES:
+                            break
+                        # A single line longer than a chunk is consumed in pieces
+                        end = len(data)
+                    self._process_buffer(data, end)
+                    self.last_file_position += end
         except IOError as e:
             self.logger.error(f"Error reading log file: {str(e)}")
 
-    def _process_log_line(self, line: str) -> None:
+    def _process_buffer(self, data: bytes, end: int) -> None:
+        """
+        Enqueue the lines of a read buffer that contain a registered keyword.
+
+        Lines without a keyword are never decoded. The parser is still advanced to the
+        buffer's last timestamp so records keep an accurate server time.
+
+        Args:
+            data (bytes): Raw log data starting at a line boundary.
+            end (int): Offset just past the last complete line in data.
+        """
+        now = time.time()
+        profiling = profiler.enabled
+        spans = self.prefilter.matching_lines(data, 0, end)
+        if profiling:
+            spans = profiler.timed("match", spans)
+        for start, stop in spans:
+            started = time.perf_counter() if profiling else 0.0
+            line = decode_line(data, start, stop)
+            if parse_server_time(line) is None:
+                self.parser.advance(last_server_time(data, 0, start), now)
+            record = self.parser.parse(line, now)
+            if profiling:
+                profiler.record("parse", time.perf_counter() - started)
+            self.ingest_queue.put(record)
+        self.parser.advance(last_server_time(data, 0, end), now)
+
+    def _start_new_log(self, stat: os.stat_result) -> None:
+        """
+        Start reading a log file from the beginning.
+
+        Args:
+            stat (os.stat_result): Status of the newly opened log file.
+        """
+        if self.log_inode is not None:
+            self.logger.info("Log file was replaced or truncated, reading it from the start")
+            self.parser.reset()
+            self.ingest_queue.reset_head()
+        self.log_inode = stat.st_ino
+        self.last_file_position = 0
+
+    def _probe_log_head(self, f, stat: os.stat_result) -> None:
         """
-        Process a single log line.
+        Find the newest timestamp in the log before a large catch-up read.
+
+        The timestamp advances the ingest queue's log head and, paired with the file's
+        modification time, anchors the shard clock so wall-clock estimates for the
+        older lines are correct from the start.
 
         Args:
-            line (str): A single line from the log file.
+            f: The open log file.
+            stat (os.stat_result): Status of the open log file.
         """
-        cleaned_line = line.split("]:", 1)[-1].strip()
-        self.event_registry.handle_log_line(cleaned_line)
+        size = stat.st_size
+        if size - self.last_file_position < HEAD_PROBE_THRESHOLD:
+            return
+        server_time = read_last_server_time(f.fileno(), size)
+        if server_time is not None:
+            self.ingest_queue.advance_head(server_time)
+            self.parser.clock.observe(server_time, stat.st_mtime)
 
 
 def setup_logging() -> logging.Logger:
     """
     Set up logging configuration.
 
+    Log records are written by a background thread, see common.log_pipeline.
+
     Returns:
         logging.Logger: Configured logger instance.
     """
     log_level = logging.DEBUG if DEBUG_MODE else logging.INFO
-    logging.basicConfig(
-        level=log_level, format="%(asctime)s - %(levelname)s - %(message)s"
-    )
+    configure_logging(level=log_level, duplicate_window=LOG_DUPLICATE_WINDOW)
     return logging.getLogger(__name__)
 
 
 def import_and_register_handlers(
-    event_registry: EventRegistry, logger: logging.Logger
-) -> None:
+    event_registry: EventRegistry, logger: logging.Logger, lazy: bool = False
+) -> HandlerReloader:
     """
     Import and register all handler modules.
 
@@ -103,63 +262,358 @@ def import_and_register_handlers(
     Args:
         event_registry (EventRegistry): Registry for event handlers.
         logger (logging.Logger): Logger instance for logging messages.
+        lazy (bool): Import each module only when a line matches one of its keywords.
+
+    Returns:
+        HandlerReloader: The loader, which can be started to reload changed handlers.
     """
     handlers_directory = os.path.join(os.path.dirname(__file__), HANDLERS_DIR)
-    logger.info(f"Searching for handlers in: {handlers_directory}")
+    reloader = HandlerReloader(
+        event_registry, handlers_directory, package=HANDLERS_DIR, lazy=lazy
+    )
+    with startup_report.phase("handlers"):
+        reloader.load_all()
+    if reloader.failures:
+        logger.error(f"{reloader.failures} handler modules failed to load")
+    return reloader
+
+
+def install_command_sink(kind: str, command_log: Optional[str] = None):
+    """
+    Install the sink that game commands issued by handlers are delivered to.
+
+    Args:
+        kind (str): "tmux" to run commands on the server, "record" to only record them.
+        command_log (Optional[str]): File that recorded commands are written to.
+
+    Returns:
+        The installed command sink.
+    """
+    if kind == "record":
+        output = open(command_log, "w", buffering=1) if command_log else None
+        sink = RecordingCommandSink(output)
+    else:
+        sink = TmuxCommandSink()
+    set_command_sink(sink)
+    return sink
+
+
+def close_command_sink(logger: logging.Logger) -> None:
+    """
+    Close the installed command sink, writing out the command log of a recording sink.
+
+    Args:
+        logger (logging.Logger): Logger instance for logging messages.
+    """
+    sink = get_command_sink()
+    if isinstance(sink, RecordingCommandSink):
+        logger.info(f"Recorded {len(sink.commands)} game commands")
+        sink.close()
+
+
+def start_event_consumers(consumers: Sequence[EventConsumer]) -> None:
+    """
+    Start the event sink, socket server and roster snapshot and subscribe them to published events.
+
+    Args:
+        consumers (Sequence[EventConsumer]): The consumers to start.
+    """
+    logger = logging.getLogger(__name__)
+    for consumer in consumers:
+        consumer.start()
+        event_publisher.subscribe(consumer)
+        logger.info(f"Publishing events to {consumer.path}")
+
+
+def stop_event_consumers(consumers: Sequence[EventConsumer]) -> None:
+    """
+    Unsubscribe the event consumers and stop them, writing out pending events.
+
+    Args:
+        consumers (Sequence[EventConsumer]): The consumers to stop.
+    """
+    logger = logging.getLogger(__name__)
+    for consumer in consumers:
+        event_publisher.unsubscribe(consumer)
+        consumer.stop()
+        if consumer.dropped:
+            logger.warning(f"{consumer.dropped} events for {consumer.path} were dropped")
+
+
+def log_memory_report(memory_monitor: MemoryMonitor) -> None:
+    """
+    Log a memory report, and start or stop tracing allocations for the next one.
+
+    Tracing started by one report is stopped by the next, so it never stays on unnoticed.
+    Tracing enabled with --tracemalloc is left on.
+
+    Args:
+        memory_monitor (MemoryMonitor): The monitor whose report is logged.
+    """
+    logger = logging.getLogger(__name__)
+    logger.info(memory_monitor.report())
+    memory_monitor.toggle_tracing()
+
 
-    for filename in os.listdir(handlers_directory):
-        if filename.endswith(".py") and filename != "__init__.py":
-            module_name = f"{HANDLERS_DIR}.{filename[:-3]}"
-            try:
-                module = importlib.import_module(module_name)
-                for name in dir(module):
-                    if name.startswith("register_"):
-                        getattr(module, name)(event_registry)
-                        logger.info(
-                            f"Registered handler: {name} from {filename}"
-                        )
-            except Exception as e:
-                logger.error(f"Error loading handler {filename}: {str(e)}")
+class ShutdownRequested(Exception):
+    """Raised in the main thread when the monitor is asked to terminate with SIGTERM."""
 
 
-def run_log_monitor() -> None:
+def request_shutdown(signum, frame) -> None:
+    """
+    Handle SIGTERM by stopping the main loop. Repeated signals are ignored while draining.
+
+    Raises:
+        ShutdownRequested: Always.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise ShutdownRequested()
+
+
+def shutdown_monitor(
+    logger: logging.Logger,
+    drain_timeout: float,
+    reloader: HandlerReloader,
+    watcher,
+    event_handler: LogEventHandler,
+    ingest_queue: IngestQueue,
+    event_consumers: Sequence[EventConsumer],
+    memory_monitor: MemoryMonitor,
+    idle_manager: Optional[IdleManager] = None,
+    spot_watcher: Optional[SpotInterruptionWatcher] = None,
+) -> None:
+    """
+    Stop the log monitor without losing log lines or events.
+
+    Reading stops after a final read of the lines written since the last one. The queued lines
+    are then handled, game commands included, and a save after a spot interruption notice is
+    waited for, together within drain_timeout seconds. Once the dispatch worker has exited,
+    grouped events that are still incomplete are published as INCOMPLETE events rather than
+    finalized, the event consumers write out their pending events and the command log is
+    closed. If the worker is still handling a line when the time is up, these steps are skipped,
+    so it never touches a grouped event, publishes to a sink or writes a command concurrently
+    with them.
+
+    Args:
+        logger (logging.Logger): Logger instance for logging messages.
+        drain_timeout (float): Seconds to finish handling queued lines and a pending save.
+        reloader (HandlerReloader): The loader of the handler modules.
+        watcher: The log watcher.
+        event_handler (LogEventHandler): The reader of the log file.
+        ingest_queue (IngestQueue): The queue of lines to be handled.
+        event_consumers (Sequence[EventConsumer]): Event sink, socket server and roster snapshot
+            that events are published to.
+        memory_monitor (MemoryMonitor): The memory monitor.
+        idle_manager (Optional[IdleManager]): Manager that pauses and scales down the shard
+            while it has no players.
+        spot_watcher (Optional[SpotInterruptionWatcher]): Watcher that saves the world on a
+            spot interruption notice.
+    """
+    started = time.monotonic()
+    deadline = started + drain_timeout
+    reloader.stop()
+    watcher.stop()
+    if event_handler.initial_read.is_set():
+        event_handler.on_log_changed()
+    worker_stopped = ingest_queue.stop(max(deadline - time.monotonic(), 0))
+    pending = ingest_queue.qsize()
+    if pending:
+        logger.warning(f"{pending} log lines were not handled within {drain_timeout:.0f}s")
+    if spot_watcher is not None:
+        spot_watcher.stop(max(deadline - time.monotonic(), 0))
+    if idle_manager is not None:
+        event_publisher.unsubscribe(idle_manager)
+        idle_manager.stop()
+    if worker_stopped:
+        GroupedEventHandler.abandon_incomplete()
+        stop_event_consumers(event_consumers)
+        close_command_sink(logger)
+    else:
+        logger.warning(
+            "A log line is still being handled, leaving incomplete grouped events, "
+            "the event consumers and the command log as they are"
+        )
+    profiler.stop()
+    memory_monitor.stop()
+    logger.info(
+        f"Log monitor stopped in {time.monotonic() - started:.2f}s, "
+        f"{ingest_queue.dispatched} of {ingest_queue.enqueued} lines handled"
+    )
+
+
+def run_replay(
+    path: str,
+    speed: float = 0.0,
+    command_sink: str = "record",
+    command_log: Optional[str] = None,
+    workers: int = 1,
+    lazy_handlers: bool = True,
+    event_consumers: Sequence[EventConsumer] = (),
+) -> None:
+    """
+    Replay an archived server log through the registered handlers.
+
+    Args:
+        path (str): Path to the archived server log.
+        speed (float): Log seconds replayed per real second, or 0 for as fast as possible.
+        command_sink (str): Where game commands issued by handlers go, see COMMAND_SINKS.
+        command_log (Optional[str]): File that recorded commands are written to.
+        workers (int): Worker processes used to parse an unpaced replay in parallel.
+        lazy_handlers (bool): Import handler modules on the first line matching their keywords.
+        event_consumers (Sequence[EventConsumer]): Event sink, socket server and roster snapshot that events are published to.
+    """
+    logger = setup_logging()
+    logger.info(f"Replaying log file: {path}")
+
+    install_command_sink(command_sink, command_log)
+    event_registry = EventRegistry()
+    import_and_register_handlers(event_registry, logger, lazy=lazy_handlers)
+    start_event_consumers(event_consumers)
+
+    try:
+        profiler.sync_thread()
+        if workers > 1 and not speed:
+            BulkIngestor(event_registry, shard=SHARD_NAME, workers=workers).ingest(path)
+        else:
+            LogReplayer(event_registry, shard=SHARD_NAME, speed=speed).replay(path)
+    finally:
+        profiler.stop()
+        profiler.sync_thread()
+        close_command_sink(logger)
+        stop_event_consumers(event_consumers)
+        stop_logging()
+
+
+def finish_startup(
+    logger: logging.Logger,
+    reloader: HandlerReloader,
+    hot_reload: bool,
+    report_startup: bool,
+    idle_manager: Optional[IdleManager],
+    spot_watcher: Optional[SpotInterruptionWatcher],
+) -> None:
+    """
+    Start what has to wait until the log has been read once, and report the startup.
+
+    Args:
+        logger (logging.Logger): Logger instance for logging messages.
+        reloader (HandlerReloader): The loader of the handler modules.
+        hot_reload (bool): Reload handler modules when their source changes.
+        report_startup (bool): Log how long each startup phase and handler module took.
+        idle_manager (Optional[IdleManager]): Manager that pauses and scales down the shard while it has no players.
+        spot_watcher (Optional[SpotInterruptionWatcher]): Watcher that saves the world on a spot interruption notice.
+    """
+    if idle_manager is not None:
+        # Only once the log has been read, so old log lines cannot pause the shard
+        idle_manager.start()
+    if spot_watcher is not None:
+        # Only once the log has been read, so old saves cannot confirm a new one
+        spot_watcher.start()
+    if report_startup:
+        logger.info(startup_report.format())
+    if hot_reload:
+        reloader.start()
+        logger.info("Hot reload of handler modules enabled")
+
+
+def run_log_monitor(
+    queue_size: int = 10000,
+    backpressure: str = BACKPRESSURE_BLOCK,
+    stale_after: float = 60,
+    hot_reload: bool = False,
+    lazy_handlers: bool = True,
+    report_startup: bool = False,
+    memory_monitor: Optional[MemoryMonitor] = None,
+    event_consumers: Sequence[EventConsumer] = (),
+    idle_manager: Optional[IdleManager] = None,
+    spot_watcher: Optional[SpotInterruptionWatcher] = None,
+    drain_timeout: float = DRAIN_TIMEOUT,
+) -> None:
     """
     Run the main log monitoring process.
 
     This function sets up logging, waits for the log file to be available,
-    imports and registers handlers, and starts the file system observer.
+    imports and registers handlers, and starts the log watcher.
+
+    Args:
+        queue_size (int): Maximum number of lines buffered between reader and handlers.
+        backpressure (str): Policy applied when the ingest queue is full.
+        stale_after (float): Seconds behind the log after which side effects are skipped.
+        hot_reload (bool): Reload handler modules when their source changes.
+        lazy_handlers (bool): Import handler modules on the first line matching their keywords.
+        report_startup (bool): Log how long each startup phase and handler module took.
+        memory_monitor (Optional[MemoryMonitor]): Monitor that samples memory use in the background.
+        event_consumers (Sequence[EventConsumer]): Event sink, socket server and roster snapshot that events are published to.
+        idle_manager (Optional[IdleManager]): Manager that pauses and scales down the shard while it has no players.
+        spot_watcher (Optional[SpotInterruptionWatcher]): Watcher that saves the world on a spot interruption notice.
+        drain_timeout (float): Seconds to finish handling queued lines and a pending save when stopping.
     """
     logger = setup_logging()
     logger.info(f"Starting log monitor for: {LOGFILE}")
 
-    while not os.path.exists(LOGFILE):
-        logger.info("Waiting for log file to be created...")
-        time.sleep(5)
+    with startup_report.phase("wait for log file"):
+        while not os.path.exists(LOGFILE):
+            logger.info("Waiting for log file to be created...")
+            time.sleep(5)
 
     if not os.access(LOGFILE, os.R_OK):
         logger.error(f"Log file is not readable: {LOGFILE}")
         sys.exit(1)
 
     event_registry = EventRegistry()
-    import_and_register_handlers(event_registry, logger)
-
-    event_handler = LogEventHandler(logger, event_registry)
-    observer = Observer()
-    observer.schedule(
-        event_handler, path=os.path.dirname(LOGFILE), recursive=False
-    )
+    reloader = import_and_register_handlers(event_registry, logger, lazy=lazy_handlers)
+    with startup_report.phase("event consumers"):
+        start_event_consumers(event_consumers)
+    if idle_manager is not None:
+        event_publisher.subscribe(idle_manager)
+
+    with startup_report.phase("ingest queue"):
+        ingest_queue = IngestQueue(
+            event_registry,
+            maxsize=queue_size,
+            backpressure=backpressure,
+            stale_after=stale_after,
+        )
+        ingest_queue.start()
+
+    with startup_report.phase("log watcher"):
+        event_handler = LogEventHandler(logger, ingest_queue)
+        watcher = create_log_watcher(LOGFILE, event_handler.on_log_changed)
+
+    signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.toggle())
+    if memory_monitor is None:
+        memory_monitor = MemoryMonitor(interval=0)
+    memory_monitor.add_probe("ingest_queue.items", lambda: ingest_queue.items)
+    signal.signal(signal.SIGUSR2, lambda signum, frame: log_memory_report(memory_monitor))
+    if memory_monitor.interval > 0:
+        memory_monitor.start()
 
     try:
-        observer.start()
-        logger.info("Log monitoring started")
+        signal.signal(signal.SIGTERM, request_shutdown)
+        with startup_report.phase("initial log read"):
+            watcher.start()
+            event_handler.initial_read.wait()
+        logger.info(f"Log monitoring started ({type(watcher).__name__})")
+        finish_startup(logger, reloader, hot_reload, report_startup, idle_manager, spot_watcher)
         while True:
             time.sleep(1)
-    except KeyboardInterrupt:
-        logger.info("Received keyboard interrupt. Stopping log monitor.")
+    except (KeyboardInterrupt, ShutdownRequested) as e:
+        reason = "keyboard interrupt" if isinstance(e, KeyboardInterrupt) else "SIGTERM"
+        logger.info(f"Received {reason}. Stopping log monitor.")
     finally:
-        observer.stop()
-        observer.join()
-        logger.info("Log monitor stopped.")
+        shutdown_monitor(
+            logger,
+            drain_timeout,
+            reloader,
+            watcher,
+            event_handler,
+            ingest_queue,
+            event_consumers,
+            memory_monitor,
+            idle_manager=idle_manager,
+            spot_watcher=spot_watcher,
+        )
+        stop_logging()
 
 
 def main() -> None:
@@ -168,15 +622,291 @@ def main() -> None:
 
     This function parses command-line arguments and starts the log monitor.
     """
-    global DEBUG_MODE
+    global DEBUG_MODE, LOG_DUPLICATE_WINDOW
     parser = argparse.ArgumentParser(description="DST Server Log Monitor")
     parser.add_argument(
         "--debug", action="store_true", help="Enable debug logging"
     )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=10000,
+        help="Maximum number of log lines buffered before backpressure applies",
+    )
+    parser.add_argument(
+        "--backpressure",
+        choices=BACKPRESSURE_POLICIES,
+        default=BACKPRESSURE_BLOCK,
+        help="What to do when the ingest queue is full",
+    )
+    parser.add_argument(
+        "--stale-after",
+        type=float,
+        default=60,
+        help="Skip announcements for events this many seconds behind the log (0 disables)",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="Replay an archived server log through the handlers and exit",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0.0,
+        help="Replay speed relative to real time, e.g. 1 for real time (default: as fast as possible)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Parse an unpaced replay with this many worker processes",
+    )
+    parser.add_argument(
+        "--command-sink",
+        choices=COMMAND_SINKS,
+        help="Where game commands go (default: tmux when monitoring, record when replaying)",
+    )
+    parser.add_argument(
+        "--command-log",
+        metavar="FILE",
+        help="Write recorded game commands to this file",
+    )
+    parser.add_argument(
+        "--hot-reload",
+        action="store_true",
+        help="Reload handler modules when their source files change",
+    )
+    parser.add_argument(
+        "--eager-handlers",
+        action="store_true",
+        help="Import all handler modules at startup instead of on their first matching line",
+    )
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="Log how long each startup phase and handler module took",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the pipeline from startup (SIGUSR1 toggles profiling at any time)",
+    )
+    parser.add_argument(
+        "--profile-mode",
+        choices=PROFILE_MODES,
+        default="sampling",
+        help="How code is profiled besides per-stage timings (default: sampling)",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default=DEFAULT_PROFILE_DIR,
+        help=f"Directory profiling reports are written to (default: {DEFAULT_PROFILE_DIR})",
+    )
+    parser.add_argument(
+        "--memory-interval",
+        type=float,
+        default=300,
+        help="Seconds between memory checks (0 disables; SIGUSR2 logs a report at any time)",
+    )
+    parser.add_argument(
+        "--memory-warning-mb",
+        type=int,
+        default=512,
+        help="Warn each time RSS grows by this many more MB since startup",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        type=int,
+        default=0,
+        metavar="FRAMES",
+        help="Trace allocations from startup, recording this many frames each",
+    )
+    parser.add_argument(
+        "--log-duplicate-window",
+        type=float,
+        default=10.0,
+        help="Suppress repeats of a log message within this many seconds (0 disables)",
+    )
+    parser.add_argument(
+        "--event-log",
+        metavar="FILE",
+        help=f"Write classified events to this JSONL file (default when monitoring: {EVENT_LOG})",
+    )
+    parser.add_argument(
+        "--no-event-log",
+        action="store_true",
+        help="Do not write classified events to a file",
+    )
+    parser.add_argument(
+        "--event-log-fsync",
+        choices=FSYNC_POLICIES,
+        default=FSYNC_INTERVAL,
+        help="When the event log is flushed to disk (default: interval)",
+    )
+    parser.add_argument(
+        "--event-log-max-mb",
+        type=int,
+        default=64,
+        help="Rotate the event log when it reaches this many MB (0 disables)",
+    )
+    parser.add_argument(
+        "--event-socket",
+        metavar="PATH",
+        help=f"Publish classified events on this Unix socket (default when monitoring: {EVENT_SOCKET})",
+    )
+    parser.add_argument(
+        "--no-event-socket",
+        action="store_true",
+        help="Do not publish classified events on a Unix socket",
+    )
+    parser.add_argument(
+        "--event-socket-buffer",
+        type=int,
+        default=1000,
+        help="Events buffered per socket consumer before the drop policy applies",
+    )
+    parser.add_argument(
+        "--event-socket-policy",
+        choices=DROP_POLICIES,
+        default=DROP_OLDEST,
+        help="Default policy for socket consumers that fall behind (default: drop-oldest)",
+    )
+    parser.add_argument(
+        "--roster-snapshot",
+        metavar="PATH",
+        help=f"Publish the player list and shard status in this memory-mapped file (default when monitoring: {ROSTER_SNAPSHOT})",
+    )
+    parser.add_argument(
+        "--no-roster-snapshot",
+        action="store_true",
+        help="Do not publish a roster snapshot",
+    )
+    parser.add_argument(
+        "--idle-pause-after",
+        type=float,
+        default=120,
+        help="Pause the server after this many seconds without players (0 disables)",
+    )
+    parser.add_argument(
+        "--idle-low-power-after",
+        type=float,
+        default=600,
+        help="Enter low power mode after this many seconds without players (0 disables)",
+    )
+    parser.add_argument(
+        "--idle-scale-down-after",
+        type=float,
+        default=1800,
+        help="Signal scale-down after this many seconds without players (0 disables)",
+    )
+    parser.add_argument(
+        "--idle-low-power-command",
+        metavar="COMMAND",
+        help="Command run on entering low power mode",
+    )
+    parser.add_argument(
+        "--idle-scale-down-command",
+        metavar="COMMAND",
+        help="Command run when scale-down is signalled",
+    )
+    parser.add_argument(
+        "--idle-resume-command",
+        metavar="COMMAND",
+        help="Command run when a player joins after low power mode or scale-down",
+    )
+    parser.add_argument(
+        "--no-idle-manager",
+        action="store_true",
+        help="Do not pause or scale down the shard while it has no players",
+    )
+    parser.add_argument(
+        "--spot-metadata-url",
+        default=METADATA_URL,
+        help=f"Instance metadata service polled for spot interruption notices (default: {METADATA_URL})",
+    )
+    parser.add_argument(
+        "--no-spot-watcher",
+        action="store_true",
+        help="Do not watch for spot interruption notices",
+    )
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=DRAIN_TIMEOUT,
+        help="Seconds to finish handling queued log lines and a pending save on SIGTERM",
+    )
     args = parser.parse_args()
     DEBUG_MODE = args.debug
-
-    run_log_monitor()
+    LOG_DUPLICATE_WINDOW = args.log_duplicate_window
+
+    profiler.configure(args.profile_mode, args.profile_dir)
+    if args.profile:
+        profiler.start()
+
+    event_consumers = []
+    event_log = args.event_log or (None if args.replay else EVENT_LOG)
+    if event_log and not args.no_event_log:
+        event_consumers.append(JsonlEventSink(
+            event_log, fsync=args.event_log_fsync, max_bytes=args.event_log_max_mb * MB
+        ))
+    event_socket = args.event_socket or (None if args.replay else EVENT_SOCKET)
+    if event_socket and not args.no_event_socket:
+        event_consumers.append(EventSocketServer(
+            event_socket, max_buffer=args.event_socket_buffer, policy=args.event_socket_policy
+        ))
+    roster_snapshot = args.roster_snapshot or (None if args.replay else ROSTER_SNAPSHOT)
+    if roster_snapshot and not args.no_roster_snapshot:
+        event_consumers.append(RosterSnapshotWriter(roster_snapshot, shard=SHARD_NAME))
+
+    if args.replay:
+        run_replay(
+            args.replay,
+            speed=args.speed,
+            command_sink=args.command_sink or "record",
+            command_log=args.command_log,
+            workers=args.workers,
+            lazy_handlers=not args.eager_handlers,
+            event_consumers=event_consumers,
+        )
+        return
+
+    memory_monitor = MemoryMonitor(
+        interval=args.memory_interval, rss_growth_warning=args.memory_warning_mb * MB
+    )
+    if args.tracemalloc:
+        memory_monitor.start_tracing(args.tracemalloc)
+
+    idle_manager = None
+    if not args.no_idle_manager:
+        idle_manager = IdleManager(
+            SHARD_NAME,
+            pause_after=args.idle_pause_after,
+            low_power_after=args.idle_low_power_after,
+            scale_down_after=args.idle_scale_down_after,
+            low_power_command=args.idle_low_power_command,
+            scale_down_command=args.idle_scale_down_command,
+            resume_command=args.idle_resume_command,
+        )
+
+    spot_watcher = None
+    if not args.no_spot_watcher:
+        spot_watcher = SpotInterruptionWatcher(args.spot_metadata_url, shard=SHARD_NAME)
+
+    install_command_sink(args.command_sink or "tmux", args.command_log)
+    run_log_monitor(
+        queue_size=args.queue_size,
+        backpressure=args.backpressure,
+        stale_after=args.stale_after,
+        hot_reload=args.hot_reload,
+        lazy_handlers=not args.eager_handlers,
+        report_startup=args.startup_report,
+        memory_monitor=memory_monitor,
+        event_consumers=event_consumers,
+        idle_manager=idle_manager,
+        spot_watcher=spot_watcher,
+        drain_timeout=args.drain_timeout,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+"""
+Test Admin API Module
+
+This module contains unit tests for the AdminApi class from the common.admin_api module.
+It verifies that the roster and single players are served from the player state kept up to
+date by events, that roster reads stay fast and consistent while events are applied, that
+every endpoint requires the admin token, and that announce and kick commands reject unsafe
+input and are sent as game commands.
+"""
+
+import http.client
+import json
+import statistics
+import threading
+import time
+import unittest
+from common.admin_api import AdminApi
+from common.event_stream import PLAYER_JOIN, PLAYER_LEAVE, PLAYER_SPAWN, ROSTER
+from common.game_commands import (
+    RecordingCommandSink,
+    get_command_sink,
+    set_command_sink,
+)
+from common.health_server import HealthServer, Request
+
+
+def event(event_type, **data):
+    """Create a decoded event."""
+    return {"type": event_type, "data": data}
+
+
+class TestAdminApi(unittest.TestCase):
+    def setUp(self):
+        """
+        Start a health server with the admin API and record game commands.
+        """
+        self.previous_sink = get_command_sink()
+        self.sink = RecordingCommandSink()
+        set_command_sink(self.sink)
+        self.server = HealthServer(port=0, host="127.0.0.1", event_socket=None, token="secret")
+        self.api = AdminApi(self.server, refresh_roster=False)
+        self.server.start()
+        self.connection = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+
+        self.api.apply_event(event(PLAYER_JOIN, player_id="KU_1", name="alice"))
+        self.api.apply_event(event(PLAYER_JOIN, player_id="KU_2", name="bob"))
+        self.api.apply_event(event(PLAYER_SPAWN, player_id="KU_1", name="alice", character="wilson"))
+
+    def tearDown(self):
+        """
+        Stop the server and restore the command sink.
+        """
+        self.connection.close()
+        self.server.stop()
+        set_command_sink(self.previous_sink)
+
+    def _request(self, method, path, body=None, token="secret"):
+        """
+        Send a request on the kept-alive connection and return the status and decoded body.
+        """
+        data = json.dumps(body).encode() if body is not None else b""
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.connection.request(method, path, body=data, headers=headers)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_roster_and_players_follow_events(self):
+        """
+        Test that reads reflect the player events applied so far.
+
+        This test verifies that:
+        1. The roster lists every online player with their character.
+        2. Players can be looked up by ID and by name.
+        3. Players who left are no longer found.
+        4. A roster event replaces the whole player list.
+        """
+        status, roster = self._request("GET", "/roster")
+        self.assertEqual(status, 200)
+        self.assertEqual(roster["count"], 2)
+        self.assertEqual(
+            {player["name"]: player["character"] for player in roster["players"]},
+            {"alice": "wilson", "bob": "unknown"},
+        )
+        self.assertEqual((self._request("GET", "/players/KU_2"))[1]["name"], "bob")
+        self.assertEqual((self._request("GET", "/players/alice"))[1]["id"], "KU_1")
+
+        self.api.apply_event(event(PLAYER_LEAVE, player_id="KU_2", name="bob"))
+        self.assertEqual((self._request("GET", "/players/bob"))[0], 404)
+
+        self.api.apply_event(event(ROSTER, players=[{"id": "KU_3", "name": "carol", "character": "wendy"}]))
+        status, roster = self._request("GET", "/roster")
+        self.assertEqual([player["name"] for player in roster["players"]], ["carol"])
+
+    def test_roster_reads_stay_fast_under_load(self):
+        """
+        Test that roster reads are answered quickly and consistently while player events stream in.
+
+        This test verifies that:
+        1. Every roster read while events are being applied is a consistent snapshot.
+        2. Snapshot versions never go backwards between reads.
+        3. The median read takes a fraction of a millisecond in the API and a few milliseconds
+           over HTTP, i.e. no read waits for the event stream or for a delayed ACK.
+        """
+        stop = threading.Event()
+        applied = []
+
+        def apply_events():
+            index = 0
+            while not stop.is_set():
+                player_id, name = f"KU_{index % 50 + 10}", f"player{index % 50}"
+                self.api.apply_event(event(PLAYER_JOIN, player_id=player_id, name=name))
+                self.api.apply_event(event(PLAYER_LEAVE, player_id=player_id))
+                applied.append(index)
+                index += 1
+                if index % 10 == 0:
+                    time.sleep(0.001)
+
+        load = threading.Thread(target=apply_events)
+        load.start()
+        self.addCleanup(load.join)
+        self.addCleanup(stop.set)
+        request = Request("GET", "/roster", {}, {}, b"")
+        http_times, api_times, versions = [], [], []
+        for _ in range(200):
+            started = time.perf_counter()
+            status, roster = self._request("GET", "/roster")
+            http_times.append(time.perf_counter() - started)
+            self.assertEqual(status, 200)
+            self.assertEqual(roster["count"], len(roster["players"]))
+            versions.append(roster["version"])
+            started = time.perf_counter()
+            self.api.handle_roster(request)
+            api_times.append(time.perf_counter() - started)
+        stop.set()
+
+        self.assertGreater(len(applied), 0)
+        self.assertEqual(versions, sorted(versions))
+        self.assertLess(statistics.median(api_times), 0.0005)
+        self.assertLess(statistics.median(http_times), 0.005)
+
+    def test_reads_require_the_token(self):
+        """
+        Test that the roster and players are not served without the right token.
+        """
+        self.assertEqual(self._request("GET", "/roster", token=None), (401, {"error": "unauthorized"}))
+        self.assertEqual(self._request("GET", "/players/alice", token="wrong")[0], 401)
+        self.server.token = ""
+        self.assertEqual(self._request("GET", "/roster")[0], 403)
+
+    def test_writes_require_the_token(self):
+        """
+        Test that writes without the right token are rejected and send nothing.
+        """
+        self.assertEqual((self._request("POST", "/announce", {"message": "hi"}, token=None))[0], 401)
+        self.assertEqual((self._request("POST", "/kick", {"player": "bob"}, token="wrong"))[0], 401)
+        self.server.token = ""
+        self.assertEqual((self._request("POST", "/announce", {"message": "hi"}))[0], 403)
+        self.assertEqual(self.sink.commands, [])
+
+    def test_announce_sends_command(self):
+        """
+        Test that announcements are sent and unsafe messages rejected.
+        """
+        self.assertEqual((self._request("POST", "/announce", {"message": "Restart soon"}))[0], 202)
+        self.assertEqual((self._request("POST", "/announce", {"message": 'x") c_shutdown("'}))[0], 400)
+        self.assertEqual((self._request("POST", "/announce", {}))[0], 400)
+        self.assertEqual(self.sink.commands, ['c_announce("Restart soon")'])
+
+    def test_kick_by_id_or_name(self):
+        """
+        Test that players are kicked by name whether given by ID or name, and unknown players are not.
+        """
+        self.assertEqual((self._request("POST", "/kick", {"player": "KU_2"}))[0], 202)
+        self.assertEqual((self._request("POST", "/kick", {"player": "alice"}))[0], 202)
+        self.assertEqual((self._request("POST", "/kick", {"player": "mallory"}))[0], 404)
+        self.assertEqual(self.sink.commands, ['TheNet:Kick("bob")', 'TheNet:Kick("alice")'])
+
+    def test_wrong_method(self):
+        """
+        Test that known paths with the wrong method are answered with 405.
+        """
+        self.connection.request("GET", "/kick")
+        self.assertEqual(self.connection.getresponse().status, 405)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Test Bulk Ingest Module
+
+This module contains unit tests for the BulkIngestor class from the common.bulk_ingest module.
+It verifies that log files are split on line boundaries and that a parallel ingest produces
+the same event stream as a sequential replay with LogReplayer.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+from common.bulk_ingest import BulkIngestor, split_ranges
+from common.event_registry import EventRegistry
+from common.replay import LogReplayer
+
+
+def build_log_lines(count):
+    """Build a DST style log with joins, spawns, untimestamped lines and noise."""
+    lines = []
+    for index in range(count):
+        stamp = f"[{index // 3600:02d}:{index // 60 % 60:02d}:{index % 60:02d}]:"
+        if index % 7 == 0:
+            lines.append(f"{stamp} Client authenticated: (KU_{index}) Player_{index}")
+        elif index % 11 == 0:
+            lines.append(f"{stamp} Spawn request: wilson from Player_{index}")
+            lines.append(f"Spawn request: continuation of {index}")
+        else:
+            lines.append(f"{stamp} Unrelated line {index}")
+    return lines
+
+
+class TestBulkIngestor(unittest.TestCase):
+    def setUp(self):
+        """
+        Write a log file large enough to be split into many ranges.
+        """
+        fd, self.path = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(fd, "w") as f:
+            f.write("\n".join(build_log_lines(500)) + "\n")
+
+    def tearDown(self):
+        """
+        Remove the log file.
+        """
+        os.remove(self.path)
+
+    def _collect(self, run):
+        """
+        Run an ingest against a fresh registry and return the dispatched records.
+        """
+        registry = EventRegistry()
+        handler = Mock()
+        registry.register_handler("Client authenticated:", handler, pass_record=True)
+        registry.register_handler("Spawn request:", handler, pass_record=True)
+        stats = run(registry)
+        return stats, [call.args[0] for call in handler.call_args_list]
+
+    def test_split_ranges_end_on_line_boundaries(self):
+        """
+        Test that byte ranges cover the whole file and end on line boundaries.
+        """
+        ranges = split_ranges(self.path, chunk_size=256)
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        self.assertGreater(len(ranges), 1)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(data))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(data[end - 1:end], b"\n")
+
+    def test_parallel_ingest_matches_sequential_replay(self):
+        """
+        Test that a parallel ingest dispatches the same records as a sequential replay.
+
+        This test verifies that:
+        1. Records are dispatched in log order across range boundaries.
+        2. Untimestamped lines inherit the server time of the previous range.
+        3. Wall-clock estimates and line counts are identical.
+        """
+        sequential_stats, sequential = self._collect(
+            lambda registry: LogReplayer(registry).replay(self.path)
+        )
+        parallel_stats, parallel = self._collect(
+            lambda registry: BulkIngestor(registry, workers=2, chunk_size=256).ingest(
+                self.path
+            )
+        )
+
+        self.assertGreater(len(sequential), 100)
+        self.assertEqual(parallel, sequential)
+        self.assertEqual(parallel_stats.lines, sequential_stats.lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
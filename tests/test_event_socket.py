@@ -0,0 +1,154 @@
+"""
+Test Event Socket Module
+
+This module contains unit tests for the EventSocketServer class from the common.event_socket
+module. It verifies that consumers only receive the topics they subscribed to, that slow
+consumers have events dropped or are disconnected according to their policy, and that drops
+are reported to the consumer.
+"""
+
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from common.event_socket import (
+    DISCONNECT,
+    DROP_NEWEST,
+    DROP_OLDEST,
+    EventSocketServer,
+    _Subscriber,
+    read_events,
+)
+from common.event_stream import PLAYER_JOIN, PLAYER_LEAVE, SAVE_COMPLETE, EventPublisher
+
+
+class TestEventSocketServer(unittest.TestCase):
+    def setUp(self):
+        """
+        Start a server subscribed to a test publisher.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.server = EventSocketServer(os.path.join(self.directory, "events.sock"))
+        self.server.start()
+        self.publisher = EventPublisher()
+        self.publisher.subscribe(self.server)
+
+    def tearDown(self):
+        """
+        Stop the server and remove its directory.
+        """
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def _wait_for_subscribers(self, count):
+        """
+        Wait until the server has processed the given number of subscriptions.
+        """
+        deadline = time.monotonic() + 5
+        while self.server.subscribers < count and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertEqual(self.server.subscribers, count)
+
+    def test_consumers_receive_subscribed_topics(self):
+        """
+        Test that each consumer receives only the event types it subscribed to.
+
+        This test verifies that:
+        1. Wildcard topics match several event types.
+        2. An empty subscription receives every event.
+        3. Events arrive in publishing order with their data.
+        """
+        players = read_events(self.server.path, ["player_*"], timeout=5)
+        everything = read_events(self.server.path, timeout=5)
+        # The generators only connect when first advanced, so wait for their first events in threads
+        first_player_event = []
+        first_event = []
+        threads = [
+            threading.Thread(target=lambda: first_player_event.append(next(players))),
+            threading.Thread(target=lambda: first_event.append(next(everything))),
+        ]
+        for thread in threads:
+            thread.start()
+        self._wait_for_subscribers(2)
+
+        self.publisher.publish(SAVE_COMPLETE, lines=[])
+        self.publisher.publish(PLAYER_JOIN, player_id="KU_1", name="p1")
+        self.publisher.publish(PLAYER_LEAVE, player_id="KU_1", name="p1")
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(first_player_event[0]["type"], PLAYER_JOIN)
+        self.assertEqual(first_player_event[0]["data"]["name"], "p1")
+        self.assertEqual(next(players)["type"], PLAYER_LEAVE)
+        self.assertEqual(first_event[0]["type"], SAVE_COMPLETE)
+        self.assertEqual(next(everything)["type"], PLAYER_JOIN)
+        players.close()
+        everything.close()
+
+    def test_invalid_subscription_is_closed(self):
+        """
+        Test that a consumer sending an unknown option is disconnected.
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(self.server.path)
+            sock.sendall(b"player_join colour=blue\n")
+            self.assertEqual(sock.recv(1024), b"")
+
+    def test_stop_removes_socket(self):
+        """
+        Test that the socket file is removed when the server stops.
+        """
+        self.server.stop()
+        self.assertFalse(os.path.exists(self.server.path))
+
+
+class TestSubscriberBuffer(unittest.TestCase):
+    def _subscriber(self, policy):
+        """
+        Create a subscriber with room for two events.
+        """
+        subscriber = _Subscriber(None, max_buffer=2, policy=policy)
+        for line in (b"1\n", b"2\n", b"3\n"):
+            subscriber.offer(line)
+        return subscriber
+
+    def test_drop_policies(self):
+        """
+        Test that a full buffer drops the oldest or newest event, or marks the consumer for disconnection.
+        """
+        self.assertEqual(list(self._subscriber(DROP_OLDEST).buffer), [b"2\n", b"3\n"])
+        self.assertEqual(list(self._subscriber(DROP_NEWEST).buffer), [b"1\n", b"2\n"])
+        self.assertTrue(self._subscriber(DISCONNECT).closing)
+
+    def test_drops_are_reported_before_the_next_events(self):
+        """
+        Test that the consumer is told how many events were dropped.
+        """
+        server = EventSocketServer("unused.sock")
+        subscriber = self._subscriber(DROP_OLDEST)
+        server._take(subscriber)
+        lines = subscriber.unsent.splitlines()
+        self.assertEqual(json.loads(lines[0]), {"type": "dropped", "count": 1})
+        self.assertEqual(lines[1:], [b"2", b"3"])
+        self.assertEqual(subscriber.dropped, 1)
+        self.assertEqual(server.delivered, 2)
+
+    def test_subscription_options(self):
+        """
+        Test that buffer sizes are capped by the server and policies can be chosen.
+        """
+        subscriber = _Subscriber(None, max_buffer=100, policy=DROP_OLDEST)
+        subscriber.subscribe("save_complete buffer=5000 policy=disconnect", max_buffer=100)
+        self.assertEqual(subscriber.max_buffer, 100)
+        self.assertEqual(subscriber.policy, DISCONNECT)
+        self.assertTrue(subscriber.wants(SAVE_COMPLETE))
+        self.assertFalse(subscriber.wants(PLAYER_JOIN))
+
+
+if __name__ == "__main__":
+    unittest.main()
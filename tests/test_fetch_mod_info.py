@@ -0,0 +1,269 @@
+"""
+Test Fetch Mod Info Module
+
+This module contains unit tests for the common.fetch_mod_info module. It runs a local
+stand-in for the Steam Workshop and verifies that mods are fetched concurrently by a bounded
+number of workers, that failed requests are retried with backoff while permanent errors are
+not, and that the rate limiter spaces out requests. It also verifies that fetched mods are
+served from the persistent cache, that stale entries are revalidated with conditional
+requests, and that mods are looked up in batches from a fake published-file-details API,
+with pages scraped only for mods the API did not return.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+from common import fetch_mod_info
+from common.fetch_mod_info import (
+    FETCH_ERROR,
+    ModInfoCache,
+    RateLimiter,
+    fetch_mod_description,
+    fetch_mod_descriptions,
+    strip_bbcode,
+)
+
+PAGE = """<html><body>
+<div class="workshopItemTitle">Mod {mod_id}</div>
+<div class="workshopItemDescription">v1.2\nDescription of mod {mod_id}</div>
+</body></html>"""
+
+
+class FakeWorkshop(BaseHTTPRequestHandler):
+    """Serves Workshop item pages, failing or delaying them as configured on the server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        mod_id = parse_qs(urlparse(self.path).query)["id"][0]
+        with server.lock:
+            server.requests.append(mod_id)
+            server.conditional += "If-None-Match" in self.headers
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            failures = server.failures.get(mod_id, 0)
+            server.failures[mod_id] = failures - 1
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+        if mod_id in server.missing:
+            self._send(404, b"Not Found")
+        elif failures > 0:
+            self._send(503, b"Unavailable")
+        elif self.headers.get("If-None-Match") == f'"{mod_id}"':
+            self._send(304, b"")
+        else:
+            self._send(200, PAGE.format(mod_id=mod_id).encode(), etag=f'"{mod_id}"')
+
+    def do_POST(self):
+        server = self.server
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        mod_ids = [form[f"publishedfileids[{index}]"][0] for index in range(int(form["itemcount"][0]))]
+        with server.lock:
+            server.batches.append(mod_ids)
+        if server.details_down:
+            self._send(500, b"Internal Server Error")
+            return
+        details = [
+            {"publishedfileid": mod_id, "result": 9}
+            if mod_id in server.missing
+            else {
+                "publishedfileid": mod_id,
+                "result": 1,
+                "title": f"Mod {mod_id}",
+                "description": f"[h1]v1.2[/h1]\n[b]Description[/b] of [url=https://example.com]mod {mod_id}[/url]",
+            }
+            for mod_id in mod_ids
+        ]
+        body = {"response": {"result": 1, "resultcount": len(details), "publishedfiledetails": details}}
+        self._send(200, json.dumps(body).encode())
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestFetchModInfo(unittest.TestCase):
+    def setUp(self):
+        """
+        Start the stand-in Workshop, disable the global rate limit, use a temporary cache and
+        scrape pages unless a test passes the details API URL.
+        """
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeWorkshop)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.conditional = 0
+        self.server.batches = []
+        self.server.details_down = False
+        self.server.active = 0
+        self.server.max_active = 0
+        self.server.failures = {}
+        self.server.missing = set()
+        self.server.delay = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,))
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/sharedfiles/filedetails/"
+        self.details_url = f"http://127.0.0.1:{self.server.server_port}/GetPublishedFileDetails/v1/"
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache_path = os.path.join(self.directory, "workshop.json")
+        for name, value in (
+            ("rate_limiter", RateLimiter(0)),
+            ("mod_cache", ModInfoCache(self.cache_path)),
+            ("DETAILS_URL", ""),
+        ):
+            patcher = patch.object(fetch_mod_info, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """
+        Stop the stand-in Workshop.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_mods_are_fetched_concurrently(self):
+        """
+        Test that several mods are fetched in parallel, bounded by the worker count.
+
+        This test verifies that:
+        1. Every mod's title and description are parsed from its page.
+        2. Results keep the order of the requested IDs, without duplicates.
+        3. No more requests run at once than there are workers.
+        4. Fetching takes about as long as the slowest batch of workers, not all requests.
+        """
+        self.server.delay = 0.1
+        mod_ids = [str(index) for index in range(12)] + ["3"]
+        started = time.monotonic()
+        mods = fetch_mod_descriptions(mod_ids, max_workers=4, url=self.url)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(list(mods), [str(index) for index in range(12)])
+        self.assertEqual(mods["7"][0], "Mod 7")
+        self.assertIn("Description of mod 7", mods["7"][1])
+        self.assertLessEqual(self.server.max_active, 4)
+        self.assertGreater(self.server.max_active, 1)
+        self.assertLess(elapsed, 12 * self.server.delay)
+
+    def test_retries_transient_errors_only(self):
+        """
+        Test that unavailable responses are retried and missing mods are not.
+        """
+        self.server.failures["1"] = 2
+        self.server.missing.add("2")
+
+        self.assertEqual(fetch_mod_description("1", url=self.url, backoff=0.01)[0], "Mod 1")
+        self.assertEqual(fetch_mod_description("2", url=self.url, backoff=0.01), (FETCH_ERROR, FETCH_ERROR))
+        self.assertEqual(self.server.requests, ["1", "1", "1", "2"])
+
+    def test_cached_mods_need_no_requests(self):
+        """
+        Test that fetched mods are served from the cache, also after reloading it from disk.
+
+        This test verifies that:
+        1. Fetching cached mods again sends no requests.
+        2. The cache file stores the summary and validators.
+        3. A new cache reading the same file serves the mods without requests.
+        4. Failed fetches are not cached.
+        """
+        self.server.missing.add("3")
+        first = fetch_mod_descriptions(["1", "2", "3"], url=self.url, backoff=0.01)
+        self.assertEqual(first["3"], (FETCH_ERROR, FETCH_ERROR))
+        self.assertEqual(fetch_mod_descriptions(["1", "2"], url=self.url), {k: first[k] for k in ("1", "2")})
+        self.assertEqual(sorted(self.server.requests), ["1", "2", "3"])
+
+        entry = ModInfoCache(self.cache_path).get("2")
+        self.assertEqual(entry["summary"], "Description of mod 2")
+        self.assertEqual(entry["etag"], '"2"')
+        self.assertIsNone(ModInfoCache(self.cache_path).get("3"))
+
+        reloaded = ModInfoCache(self.cache_path)
+        self.assertEqual(fetch_mod_description("1", url=self.url, cache=reloaded), first["1"])
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_stale_entries_are_revalidated(self):
+        """
+        Test that stale entries are revalidated with a conditional request and used on errors.
+        """
+        cache = ModInfoCache(self.cache_path, ttl=0)
+        fetched = fetch_mod_description("1", url=self.url, cache=cache)
+        self.assertEqual(fetch_mod_description("1", url=self.url, cache=cache), fetched)
+        self.assertEqual(self.server.conditional, 1)
+
+        self.server.failures["1"] = 3
+        self.assertEqual(fetch_mod_description("1", url=self.url, cache=cache, backoff=0.01), fetched)
+        self.assertEqual(len(self.server.requests), 5)
+
+    def test_details_are_fetched_in_batches(self):
+        """
+        Test that mods are looked up with one details request per batch and then cached.
+
+        This test verifies that:
+        1. All mods of a batch are requested in one POST, without scraping any page.
+        2. BBCode is stripped from the descriptions.
+        3. Batches are split at the batch size.
+        4. Mods fetched from the API are served from the cache afterwards.
+        """
+        mod_ids = [str(index) for index in range(150)]
+        mods = fetch_mod_descriptions(mod_ids, details_url=self.details_url)
+
+        self.assertEqual([len(batch) for batch in self.server.batches], [100, 50])
+        self.assertEqual(self.server.requests, [])
+        self.assertEqual(mods["42"], ("Mod 42", "v1.2\nDescription of mod 42"))
+        self.assertEqual(ModInfoCache(self.cache_path).get("42")["summary"], "Description of mod 42")
+
+        fetch_mod_descriptions(mod_ids, details_url=self.details_url)
+        self.assertEqual(len(self.server.batches), 2)
+
+    def test_pages_are_scraped_as_fallback(self):
+        """
+        Test that pages are scraped for mods missing from the API response or if the API fails.
+        """
+        self.server.missing.add("2")
+        mods = fetch_mod_descriptions(["1", "2"], details_url=self.details_url, url=self.url, backoff=0.01)
+        self.assertEqual(self.server.requests, ["2"])
+        self.assertEqual(mods["2"], (FETCH_ERROR, FETCH_ERROR))
+
+        self.server.details_down = True
+        mods = fetch_mod_descriptions(["3", "4"], details_url=self.details_url, url=self.url, retries=1)
+        self.assertEqual(sorted(self.server.requests), ["2", "3", "4"])
+        self.assertEqual(mods["4"][0], "Mod 4")
+
+    def test_strip_bbcode(self):
+        """
+        Test that BBCode tags are removed and their text is kept.
+        """
+        self.assertEqual(strip_bbcode("[list][*][b]Bold[/b] [url=https://x.y/?a=1]link[/url][/list]"), "Bold link")
+
+    def test_rate_limiter_spaces_requests(self):
+        """
+        Test that the rate limiter lets a burst through and then waits between requests.
+        """
+        limiter = RateLimiter(50, burst=2)
+        started = time.monotonic()
+        for _ in range(7):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Test Grok Cache Module
+
+This module contains unit tests for the CachedGrok class from the common.grok_cache module.
+It verifies that cached patterns match exactly like pygrok.Grok and that a warm cache on disk
+is used without expanding the pattern again.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from pygrok import Grok
+import common.grok_cache as grok_cache
+from common.grok_cache import CachedGrok
+from common.player_utils import PLAYER_LEAVE_PATTERN, custom_patterns
+from handlers.player_list_handler import PLAYER_LIST_PATTERN
+
+
+class TestCachedGrok(unittest.TestCase):
+    def setUp(self):
+        """
+        Point the grok cache at an empty temporary file.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.directory, "grok.json")
+        self.patches = [
+            patch.object(grok_cache, "GROK_CACHE_FILE", self.cache_file),
+            patch.object(grok_cache, "_expansions", None),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        """
+        Restore the grok cache and remove the temporary directory.
+        """
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.directory)
+
+    def test_matches_like_pygrok(self):
+        """
+        Test that CachedGrok returns the same fields as pygrok.Grok.
+        """
+        lines = [
+            "[Shard] (KU_Xo93QaLmG1) DST_Player disconnected from [SHDMASTER](1)",
+            "(KU_Xo93QaLmG1) disconnected from",
+            "Unrelated line",
+        ]
+        for pattern, patterns in [
+            (PLAYER_LEAVE_PATTERN, custom_patterns),
+            (PLAYER_LIST_PATTERN, {}),
+        ]:
+            cached = CachedGrok(pattern, custom_patterns=patterns)
+            original = Grok(pattern, custom_patterns=patterns)
+            for line in lines + ["[1] (KU_Xo93QaLmG1) DST Player <wilson>"]:
+                self.assertEqual(cached.match(line), original.match(line), line)
+
+    def test_typed_fields_are_converted(self):
+        """
+        Test that fields declared as int are converted like pygrok does.
+        """
+        grok = CachedGrok(r"\[%{NUMBER:index:int}\]")
+        self.assertEqual(grok.match("[12] x"), {"index": 12})
+
+    def test_warm_cache_skips_expansion(self):
+        """
+        Test that a pattern found in the cache file is not expanded again.
+
+        This test verifies that:
+        1. Expanding a pattern writes it to the cache file.
+        2. A fresh process state loads the expansion from the file instead of pygrok.
+        """
+        CachedGrok(PLAYER_LIST_PATTERN).match("[1] (KU_1) Name <wilson>")
+        with open(self.cache_file) as f:
+            self.assertEqual(len(json.load(f)), 1)
+
+        grok_cache._expansions = None
+        with patch("pygrok.Grok", side_effect=AssertionError("expanded again")):
+            match = CachedGrok(PLAYER_LIST_PATTERN).match("[1] (KU_1) Name <wilson>")
+        self.assertEqual(match["character"], "wilson")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,12 +3,15 @@ Test Grouped Event Handler Module
 
 This module contains unit tests for the GroupedEventHandler class from the common.grouped_events module.
 It verifies that the GroupedEventHandler correctly processes a sequence of log lines and calls
-the final action with the appropriate grouped event lines.
+the final action with the appropriate grouped event lines, and that incomplete events are
+published with their lines so far, without the final action, when they are abandoned.
 """
 
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 import logging
+import weakref
+from common.event_stream import INCOMPLETE, event_publisher
 from common.grouped_events import GroupedEventHandler
 
 # Set up logging for the test
@@ -58,6 +61,34 @@ class TestGroupedEventHandler(unittest.TestCase):
 
         logger.debug("Finished test_grouped_event_handling")
 
+    def test_incomplete_events_are_abandoned(self):
+        """
+        Test that abandoning publishes only events that started and did not end, without finalizing them.
+        """
+        final_action_mock = Mock()
+        events = []
+        event_publisher.subscribe(events.append)
+        self.addCleanup(event_publisher.unsubscribe, events.append)
+        # Only these handlers, so no other test's handler is abandoned
+        with patch.object(GroupedEventHandler, "instances", weakref.WeakSet()):
+            started = GroupedEventHandler("Event Start", "Event End", final_action_mock)
+            idle = GroupedEventHandler("Event Start", "Event End", final_action_mock)
+            started.handle_event_line("Event Start")
+            started.handle_event_line("Processing...")
+
+            self.assertEqual(idle.abandon(), 0)
+            self.assertEqual(events, [])
+            self.assertEqual(GroupedEventHandler.abandon_incomplete(), 1)
+            final_action_mock.assert_not_called()
+            self.assertEqual([event.type for event in events], [INCOMPLETE])
+            self.assertEqual(
+                events[0].data,
+                {"start_pattern": "Event Start", "lines": ["Event Start", "Processing..."]},
+            )
+            self.assertFalse(started.in_event)
+            self.assertEqual(started.event_lines, [])
+            self.assertEqual(GroupedEventHandler.abandon_incomplete(), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,271 @@
+"""
+Test Health Server Module
+
+This module contains unit tests for the HealthServer class from the common.health_server module.
+It verifies that health probes, the roster snapshot status and unknown paths are answered on a
+kept-alive connection, that malformed and oversized requests and connections beyond the limit
+are rejected, that events published by the log monitor are streamed as server-sent events to
+clients with the admin token, that hundreds of streams are served without a thread each, and
+that clients can resume the stream from an event ID and filter it by event type.
+"""
+
+import http.client
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from common.event_socket import EventSocketServer
+from common.event_stream import PLAYER_JOIN, PLAYER_LEAVE, SAVE_COMPLETE, EventPublisher
+from common.health_server import MAX_REQUEST_BYTES, HealthServer
+from common.player import Player
+from common.roster_snapshot import RosterSnapshotWriter
+from common.shared_state import SharedState
+
+
+def wait_until(condition, timeout=5.0):
+    """Wait until a condition is true."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition not met in time")
+        time.sleep(0.005)
+
+
+class TestHealthServer(unittest.TestCase):
+    def setUp(self):
+        """
+        Start an event socket and a health server relaying its events.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.event_socket = EventSocketServer(os.path.join(self.directory, "events.sock"))
+        self.event_socket.start()
+        self.addCleanup(self.event_socket.stop)
+        self.publisher = EventPublisher()
+        self.publisher.subscribe(self.event_socket)
+        self.server = HealthServer(
+            port=0,
+            host="127.0.0.1",
+            event_socket=self.event_socket.path,
+            # Random, so pgrep cannot match the command line of any running process
+            process_name=f"dst-server-{uuid.uuid4().hex}",
+            roster_snapshot=os.path.join(self.directory, "roster"),
+            token="secret",
+        )
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        wait_until(lambda: self.event_socket.subscribers == 1)
+
+    def _connect(self):
+        """
+        Open a kept-alive connection to the server.
+        """
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        self.addCleanup(connection.close)
+        return connection
+
+    def _get(self, connection, path, token=None):
+        """
+        Send a GET request, with the admin token if given, and return the status and body.
+        """
+        connection.request("GET", path, headers={"Authorization": f"Bearer {token}"} if token else {})
+        response = connection.getresponse()
+        return response.status, response.read()
+
+    def _send_raw(self, data):
+        """
+        Send raw bytes and return everything the server answers before closing the connection.
+        """
+        with socket.create_connection(("127.0.0.1", self.server.port), timeout=5) as sock:
+            sock.sendall(data)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+
+    def _open_stream(self, target="/events", headers=""):
+        """
+        Open an event stream with the admin token and read its response head.
+        """
+        sock = socket.create_connection(("127.0.0.1", self.server.port), timeout=5)
+        self.addCleanup(sock.close)
+        headers = f"Host: test\r\nAuthorization: Bearer secret\r\n{headers}"
+        sock.sendall(f"GET {target} HTTP/1.1\r\n{headers}\r\n".encode())
+        stream = sock.makefile("rb")
+        self.addCleanup(stream.close)
+        head = b""
+        while not head.endswith(b"\r\n\r\n"):
+            head += stream.readline()
+        self.assertIn(b"text/event-stream", head)
+        self.assertEqual(stream.readline() + stream.readline(), b"retry: 3000\n\n")
+        return stream
+
+    def _next_event(self, stream):
+        """
+        Read the next event from a stream and return its ID and type.
+        """
+        lines = []
+        while True:
+            line = stream.readline().decode().rstrip("\n")
+            if not line:
+                break
+            lines.append(line)
+        return int(lines[0][len("id: "):]), lines[1][len("event: "):]
+
+    def test_health_and_unknown_paths_on_one_connection(self):
+        """
+        Test that several requests are answered on a kept-alive connection.
+        """
+        connection = self._connect()
+        self.assertEqual(self._get(connection, "/health"), (500, b"DST server not running"))
+        sock = connection.sock
+        self.assertEqual(self._get(connection, "/unknown"), (404, b"Not Found"))
+        self.assertIs(connection.sock, sock)
+
+    def test_malformed_and_oversized_requests_are_rejected(self):
+        """
+        Test that requests the server cannot or will not read are rejected and the connection closed.
+
+        This test verifies that:
+        1. A malformed request line or Content-Length is answered with 400.
+        2. An oversized header line is answered with 431.
+        3. A body larger than MAX_REQUEST_BYTES is answered with 413 without being read.
+        4. A chunked body is answered with 411.
+        """
+        self.assertIn(b"Error code: 400", self._send_raw(b"GET / HTTP/1.1 extra\r\n\r\n"))
+        invalid_length = b"POST /health HTTP/1.1\r\nContent-Length: abc\r\n\r\n"
+        self.assertTrue(self._send_raw(invalid_length).startswith(b"HTTP/1.1 400"))
+        oversized = b"GET / HTTP/1.1\r\nX-Padding: " + b"x" * 70000 + b"\r\n\r\n"
+        self.assertTrue(self._send_raw(oversized).startswith(b"HTTP/1.1 431"))
+        too_large = f"POST /health HTTP/1.1\r\nContent-Length: {MAX_REQUEST_BYTES + 1}\r\n\r\n"
+        self.assertTrue(self._send_raw(too_large.encode()).startswith(b"HTTP/1.1 413"))
+        chunked = b"POST /health HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n0\r\n\r\n"
+        self.assertTrue(self._send_raw(chunked).startswith(b"HTTP/1.1 411"))
+
+    def test_connections_beyond_the_limit_are_rejected(self):
+        """
+        Test that connections beyond max_connections get 503 until a connection slot is free.
+        """
+        server = HealthServer(
+            port=0, host="127.0.0.1", event_socket=None, roster_snapshot=None, max_connections=2
+        )
+        server.start()
+        self.addCleanup(server.stop)
+        connections = []
+        for _ in range(2):
+            connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            self.addCleanup(connection.close)
+            self.assertEqual(self._get(connection, "/unknown")[0], 404)
+            connections.append(connection)
+
+        busy = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        self.addCleanup(busy.close)
+        busy.request("GET", "/unknown")
+        response = busy.getresponse()
+        self.assertEqual((response.status, response.getheader("Retry-After")), (503, "1"))
+        response.read()
+
+        connections[0].close()
+
+        def answered():
+            connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            self.addCleanup(connection.close)
+            return self._get(connection, "/unknown")[0] == 404
+
+        wait_until(answered)
+
+    def test_status_from_roster_snapshot(self):
+        """
+        Test that /status reports the log monitor's roster snapshot once it is written, given the token.
+        """
+        connection = self._connect()
+        self.assertEqual(self._get(connection, "/status")[0], 401)
+        self.assertEqual(self._get(connection, "/status", "secret")[0], 503)
+
+        state = SharedState()
+        state.sync_player_state(Player(id="KU_1", name="alice"))
+        snapshot = RosterSnapshotWriter(os.path.join(self.directory, "roster"), shard="Caves", state=state)
+        snapshot.start()
+        self.addCleanup(snapshot.stop)
+        status, body = self._get(connection, "/status", "secret")
+        self.assertEqual(status, 200)
+        self.assertIn(b'"shard": "Caves"', body)
+        self.assertIn(b'"player_count": 1', body)
+
+    def test_events_are_streamed(self):
+        """
+        Test that a published event reaches a connected stream with its ID and type.
+        """
+        stream = self._open_stream()
+        wait_until(lambda: self.server.streams == 1)
+        self.publisher.publish(PLAYER_JOIN, player_id="KU_1", name="p1")
+        self.assertEqual(self._next_event(stream), (1, PLAYER_JOIN))
+
+    def test_many_streams_share_one_thread(self):
+        """
+        Test that hundreds of open streams all receive an event without a thread each.
+        """
+        threads = threading.active_count()
+        streams = [self._open_stream() for _ in range(200)]
+        wait_until(lambda: self.server.streams == 200)
+        self.assertLess(threading.active_count(), threads + 5)
+
+        self.publisher.publish(SAVE_COMPLETE)
+        for stream in streams:
+            self.assertEqual(self._next_event(stream), (1, SAVE_COMPLETE))
+
+    def test_stream_requires_the_token(self):
+        """
+        Test that the event stream is refused without the right token, or without a token configured.
+        """
+        connection = self._connect()
+        self.assertEqual(self._get(connection, "/events")[0], 401)
+        connection = self._connect()
+        connection.request("GET", "/events", headers={"Authorization": "Bearer wrong"})
+        self.assertEqual(connection.getresponse().status, 401)
+        self.server.token = ""
+        connection = self._connect()
+        self.assertEqual(self._get(connection, "/events")[0], 403)
+        self.assertEqual(self.server.streams, 0)
+
+    def test_stream_resumes_after_last_event_id(self):
+        """
+        Test that a reconnecting client first receives the events it missed.
+        """
+        for event_type in (PLAYER_JOIN, SAVE_COMPLETE, PLAYER_LEAVE):
+            self.publisher.publish(event_type)
+        wait_until(lambda: self.server.history.last_id == 3)
+
+        stream = self._open_stream(headers="Last-Event-ID: 1\r\n")
+        self.assertEqual(self._next_event(stream), (2, SAVE_COMPLETE))
+        self.assertEqual(self._next_event(stream), (3, PLAYER_LEAVE))
+
+    def test_stream_filters_event_types(self):
+        """
+        Test that the types parameter restricts the stream to matching events.
+        """
+        stream = self._open_stream("/events?types=player_*")
+        wait_until(lambda: self.server.streams == 1)
+        self.publisher.publish(SAVE_COMPLETE)
+        self.publisher.publish(PLAYER_LEAVE)
+        self.assertEqual(self._next_event(stream), (2, PLAYER_LEAVE))
+
+    def test_stop_ends_open_streams(self):
+        """
+        Test that stopping the server ends the open event streams.
+        """
+        stream = self._open_stream()
+        wait_until(lambda: self.server.streams == 1)
+        self.server.stop()
+        self.assertEqual(self.server.streams, 0)
+        self.assertEqual(stream.read(), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+Test Hot Reload Module
+
+This module contains unit tests for the HandlerReloader class from the common.hot_reload module.
+It verifies that changed handler modules replace their previous handlers, that a module which
+fails to load keeps its previous handlers, that lazily loaded modules are imported on their first
+matching line, and that dispatch keeps working during a swap.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from common.event_registry import EventRegistry
+from common.hot_reload import HandlerReloader, scan_keywords
+
+HANDLER_SOURCE = """
+calls = []
+
+
+def register_greeting(event_registry):
+    event_registry.register_handler("{keyword}", lambda line: calls.append("{label}"))
+"""
+
+
+class TestHandlerReloader(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a temporary handler package with one module and load it.
+        """
+        self.root = tempfile.mkdtemp()
+        self.package = "hot_reload_test_handlers"
+        self.directory = os.path.join(self.root, self.package)
+        os.mkdir(self.directory)
+        open(os.path.join(self.directory, "__init__.py"), "w").close()
+        self.path = os.path.join(self.directory, "greeting_handler.py")
+        self._write_handler("Hello", "first")
+        sys.path.insert(0, self.root)
+
+        self.registry = EventRegistry()
+        self.registry.register_handler("Hello", lambda line: None)
+        self.reloader = HandlerReloader(self.registry, self.directory, package=self.package)
+        self.reloader.load_all()
+
+    def tearDown(self):
+        """
+        Remove the temporary package from disk and from the module cache.
+        """
+        sys.path.remove(self.root)
+        for name in list(sys.modules):
+            if name.startswith(self.package):
+                del sys.modules[name]
+        shutil.rmtree(self.root)
+
+    def _write_handler(self, keyword, label, source=HANDLER_SOURCE):
+        """
+        Write the handler module and make sure its modification time changes.
+        """
+        with open(self.path, "w") as f:
+            f.write(source.format(keyword=keyword, label=label))
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def _module(self):
+        return sys.modules[f"{self.package}.greeting_handler"]
+
+    def test_changed_module_replaces_its_handlers(self):
+        """
+        Test that reloading a module swaps its handlers and leaves other handlers alone.
+
+        This test verifies that:
+        1. An unchanged directory reloads nothing.
+        2. The old keyword is no longer handled after the module changed.
+        3. The handler registered outside the module is kept.
+        """
+        self.assertEqual(self.reloader.check(), 0)
+        self.registry.handle_log_line("Hello there")
+        self.assertEqual(self._module().calls, ["first"])
+
+        self._write_handler("Goodbye", "second version")
+        self.assertEqual(self.reloader.check(), 1)
+        self.registry.handle_log_line("Hello there")
+        self.registry.handle_log_line("Goodbye then")
+        self.assertEqual(self._module().calls, ["second version"])
+        self.assertEqual(len(self.registry.get_handlers()["Hello"]), 1)
+        self.assertEqual(self.reloader.reloads, 1)
+
+    def test_broken_module_keeps_previous_handlers(self):
+        """
+        Test that a module with a syntax error does not remove its working handlers.
+        """
+        self._write_handler("Goodbye", "broken", source="def register_broken(:\n")
+        self.reloader.check()
+        self.assertEqual(self.reloader.failures, 1)
+        self.registry.handle_log_line("Hello there")
+        self.assertEqual(self._module().calls, ["first"])
+
+    def test_removed_module_is_deregistered(self):
+        """
+        Test that deleting a handler module removes its handlers.
+        """
+        module = self._module()
+        os.remove(self.path)
+        self.assertEqual(self.reloader.check(), 1)
+        self.registry.handle_log_line("Hello there")
+        self.assertEqual(module.calls, [])
+        self.assertEqual(self.registry.owners(), [])
+
+    def test_lazy_module_is_imported_on_first_matching_line(self):
+        """
+        Test that a lazily loaded module is imported by, and receives, its first matching line.
+
+        This test verifies that:
+        1. The module is not imported while no line matches its keyword.
+        2. The line that triggers the import reaches the module's handler.
+        3. Later lines go to the real handler directly.
+        """
+        module_name = f"{self.package}.greeting_handler"
+        del sys.modules[module_name]
+        registry = EventRegistry()
+        reloader = HandlerReloader(registry, self.directory, package=self.package, lazy=True)
+        reloader.load_all()
+        self.assertNotIn(module_name, sys.modules)
+
+        registry.handle_log_line("Unrelated line")
+        self.assertNotIn(module_name, sys.modules)
+
+        registry.handle_log_line("Hello there")
+        registry.handle_log_line("Hello again")
+        self.assertEqual(self._module().calls, ["first", "first"])
+        self.assertNotIn("LazyHandler", repr(registry.get_handlers()["Hello"]))
+
+    def test_scan_keywords(self):
+        """
+        Test finding registered keywords in source, including module-level constants.
+        """
+        self.assertEqual(scan_keywords(self.path), ["Hello"])
+        self._write_handler(
+            "", "", source='KEYWORD = "Saved"\n\ndef register(r):\n    r.register_handler(KEYWORD, print)\n'
+        )
+        self.assertEqual(scan_keywords(self.path), ["Saved"])
+        self._write_handler(
+            "", "", source="def register(r, keyword):\n    r.register_handler(keyword, print)\n"
+        )
+        self.assertIsNone(scan_keywords(self.path))
+
+
+class TestReplaceHandlers(unittest.TestCase):
+    def test_dispatch_during_swaps_sees_a_complete_table(self):
+        """
+        Test that every line dispatched while handlers are swapped is handled exactly once.
+        """
+        registry = EventRegistry()
+        counts = [0, 0]
+
+        def staging_for(index):
+            staging = EventRegistry()
+            staging.register_handler("event", lambda line: counts.__setitem__(index, counts[index] + 1))
+            return staging
+
+        registry.replace_handlers("owner", staging_for(0))
+        stop = threading.Event()
+
+        def swap():
+            index = 0
+            while not stop.is_set():
+                index = 1 - index
+                registry.replace_handlers("owner", staging_for(index))
+
+        swapper = threading.Thread(target=swap)
+        swapper.start()
+        try:
+            for _ in range(2000):
+                registry.handle_log_line("event")
+        finally:
+            stop.set()
+            swapper.join()
+        self.assertEqual(sum(counts), 2000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+Test Idle Manager Module
+
+This module contains unit tests for the IdleManager class from the common.idle_manager module.
+It verifies that a shard without players is paused and enters low power mode after the
+configured delays, running the stage commands, that a player joining resumes it at once and
+the time until the server unpaused is measured, and that nothing happens before the manager
+is started or while the shard has players.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, call
+from common.event_stream import PLAYER_JOIN, PLAYER_LEAVE, SERVER_UNPAUSED, SHARD_IDLE, SHARD_RESUMED, EventPublisher
+from common.idle_manager import IDLE_ACTIVE, IDLE_EMPTY, IDLE_LOW_POWER, IDLE_PAUSED, IdleManager
+from common.player import Player
+from common.shared_state import SharedState
+
+
+def wait_until(condition, timeout=5.0):
+    """Wait until a condition is true."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition not met in time")
+        time.sleep(0.005)
+
+
+class TestIdleManager(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a player state, a publisher recording its events and a mock executor.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.state = SharedState()
+        self.publisher = EventPublisher()
+        self.events = []
+        self.publisher.subscribe(self.events.append)
+        self.executor = Mock()
+
+    def _manager(self, **kwargs):
+        manager = IdleManager(
+            "Master", state=self.state, executor=self.executor, publisher=self.publisher, **kwargs
+        )
+        self.publisher.subscribe(manager)
+        self.addCleanup(manager.stop)
+        return manager
+
+    def _hook(self, name):
+        """Return a command that writes its stage and idle seconds to a file."""
+        path = os.path.join(self.directory, name)
+        script = f"import os; open({path!r}, 'w').write(os.environ['DST_IDLE_STAGE'] + ' ' + os.environ['DST_IDLE_SECONDS'])"
+        return path, f'{sys.executable} -c "{script}"'
+
+    def _read(self, path):
+        wait_until(lambda: os.path.exists(path) and os.path.getsize(path))
+        with open(path) as f:
+            return f.read()
+
+    def _join(self):
+        self.state.sync_player_state(Player(id="KU_1", name="alice"))
+        self.publisher.publish(PLAYER_JOIN, player_id="KU_1", name="alice")
+
+    def _stages(self):
+        return [event.data["stage"] for event in self.events if event.type == SHARD_IDLE]
+
+    def test_idle_stages_and_resume(self):
+        """
+        Test that an empty shard is paused and powered down, and resumed when a player joins.
+
+        This test verifies that:
+        1. The stages are entered in order after their delays, each publishing an event.
+        2. The server is paused, and the low power command runs with the stage in its environment.
+        3. A player joining unpauses the server and runs the resume command.
+        4. The resume latency is measured when the server logs that it unpaused.
+        """
+        low_power_file, low_power_command = self._hook("low_power")
+        resume_file, resume_command = self._hook("resume")
+        manager = self._manager(
+            pause_after=0.05,
+            low_power_after=0.1,
+            scale_down_after=0,
+            low_power_command=low_power_command,
+            resume_command=resume_command,
+        )
+        manager.start()
+        # The stage is entered before its event is published
+        wait_until(lambda: len(self._stages()) == 2)
+        self.assertEqual(manager.stage, IDLE_LOW_POWER)
+        self.assertEqual(self._stages(), [IDLE_PAUSED, IDLE_LOW_POWER])
+        self.assertEqual(self.executor.set_server_paused.call_args_list, [call(True)])
+        self.assertEqual(self._read(low_power_file), "low_power 0")
+
+        self._join()
+        self.assertEqual(manager.stage, IDLE_ACTIVE)
+        self.assertEqual(self.executor.set_server_paused.call_args_list, [call(True), call(False)])
+        self.assertTrue(self._read(resume_file).startswith("active "))
+        self.assertEqual(self._stages()[-1], IDLE_ACTIVE)
+
+        time.sleep(0.02)
+        self.publisher.publish(SERVER_UNPAUSED)
+        resumed = [event for event in self.events if event.type == SHARD_RESUMED]
+        self.assertEqual(len(resumed), 1)
+        self.assertGreaterEqual(resumed[0].data["resume_latency"], 0.02)
+
+        metrics = manager.metrics()
+        self.assertEqual((metrics["pauses"], metrics["resumes"], metrics["idle_seconds"]), (1, 1, 0.0))
+        self.assertGreaterEqual(metrics["idle_seconds_total"], 0.1)
+        self.assertEqual(metrics["last_resume_latency"], resumed[0].data["resume_latency"])
+
+    def test_nothing_happens_before_start_or_with_players(self):
+        """
+        Test that stages are only entered once started and while the shard has no players.
+        """
+        manager = self._manager(pause_after=0.02, low_power_after=0, scale_down_after=0)
+        time.sleep(0.05)
+        self._join()
+        self.publisher.publish(SERVER_UNPAUSED)
+        self.assertEqual(manager.stage, IDLE_ACTIVE)
+
+        manager.start()
+        time.sleep(0.05)
+        self.assertEqual(self._stages(), [])
+        self.executor.set_server_paused.assert_not_called()
+
+        self.state.remove_player("KU_1")
+        self.publisher.publish(PLAYER_LEAVE, player_id="KU_1", name="alice")
+        self.assertEqual(self._stages(), [IDLE_EMPTY])
+        wait_until(lambda: manager.stage == IDLE_PAUSED)
+        self.assertEqual(manager.metrics()["resumes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
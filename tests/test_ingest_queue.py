@@ -0,0 +1,113 @@
+"""
+Test Ingest Queue Module
+
+This module contains unit tests for the IngestQueue class from the common.ingest_queue module.
+It verifies the backpressure policies applied when the queue is full, that stale
+records update state without triggering game commands, and that stopping reports whether the
+dispatch worker exited.
+"""
+
+import threading
+import unittest
+from unittest.mock import patch, Mock
+from common.event_registry import EventRegistry
+from common.game_commands import GameCommandExecutor
+from common.ingest_queue import (
+    IngestQueue,
+    BACKPRESSURE_DROP_OLDEST,
+    BACKPRESSURE_DROP_NEWEST,
+)
+from common.log_record import LogRecord
+
+
+def make_record(body, server_time):
+    """Build a Master shard record without a wall-clock estimate."""
+    return LogRecord(server_time, None, "Master", body)
+
+
+class TestIngestQueue(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a registry with a handler that records lines and sends a command.
+        """
+        self.seen = []
+        self.executor = GameCommandExecutor()
+        self.registry = EventRegistry()
+
+        def handle(line):
+            self.seen.append(line)
+            self.executor.send_console_message(line)
+
+        self.registry.register_handler("Event", handle)
+
+    def test_drop_oldest_backpressure(self):
+        """
+        Test that the drop-oldest policy keeps the newest lines when the queue is full.
+        """
+        queue = IngestQueue(
+            self.registry, maxsize=2, backpressure=BACKPRESSURE_DROP_OLDEST
+        )
+        for index in range(4):
+            self.assertTrue(queue.put(make_record(f"Event {index}", index)))
+
+        self.assertEqual(queue.dropped, 2)
+        self.assertEqual(queue.qsize(), 2)
+
+        with patch("common.game_commands.subprocess.run"):
+            queue.start()
+            self.assertTrue(queue.join(timeout=5))
+            queue.stop(timeout=5)
+        self.assertEqual(self.seen, ["Event 2", "Event 3"])
+
+    def test_drop_newest_backpressure(self):
+        """
+        Test that the drop-newest policy rejects lines when the queue is full.
+        """
+        queue = IngestQueue(
+            self.registry, maxsize=1, backpressure=BACKPRESSURE_DROP_NEWEST
+        )
+        self.assertTrue(queue.put(make_record("Event 0", 0)))
+        self.assertFalse(queue.put(make_record("Event 1", 1)))
+        self.assertEqual(queue.dropped, 1)
+
+    @patch("common.game_commands.subprocess.run")
+    def test_stale_events_skip_side_effects(self, mock_run: Mock):
+        """
+        Test that stale records are dispatched to handlers but their commands are skipped.
+
+        This test verifies that:
+        1. Records older than stale_after relative to the log head still reach handlers.
+        2. Commands issued while handling stale records are not sent to tmux.
+        3. Commands for fresh records are sent as usual.
+        """
+        queue = IngestQueue(self.registry, stale_after=60)
+        queue.advance_head(1000)
+        queue.put(make_record("Event old", 100))
+        queue.put(make_record("Event fresh", 990))
+
+        queue.start()
+        self.assertTrue(queue.join(timeout=5))
+        queue.stop(timeout=5)
+
+        self.assertEqual(self.seen, ["Event old", "Event fresh"])
+        self.assertEqual(queue.shed, 1)
+        mock_run.assert_called_once()
+        self.assertIn('c_announce("Event fresh")', mock_run.call_args[0][0])
+
+    def test_stop_reports_a_busy_worker(self):
+        """
+        Test that stop returns False while the worker is still handling a record, and True once it exits.
+        """
+        release = threading.Event()
+        self.registry.register_handler("Slow", lambda line: release.wait(5))
+        queue = IngestQueue(self.registry)
+        queue.put(make_record("Slow", 0))
+        queue.start()
+
+        self.assertFalse(queue.stop(timeout=0.05))
+        release.set()
+        self.assertTrue(queue.stop(timeout=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
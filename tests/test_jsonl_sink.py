@@ -0,0 +1,211 @@
+"""
+Test JSONL Sink Module
+
+This module contains unit tests for the structured event stream from the common.event_stream
+module and the JsonlEventSink class from the common.jsonl_sink module. It verifies that events
+are stamped with the log line being dispatched, that the sink writes one JSON object per line
+in batches, also once the flush interval passes, that the file is rotated by size, that the
+interval fsync does not wait for further events, that failed writes are counted as dropped and
+that pending events are written on stop.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from common.event_registry import EventRegistry
+from common.event_stream import PLAYER_JOIN, SAVE_COMPLETE, EventPublisher
+from common.game_commands import suppress_side_effects
+from common.jsonl_sink import JsonlEventSink
+from common.log_record import LogRecord
+
+
+def read_lines(path):
+    """Return the JSON objects in a file."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestEventPublisher(unittest.TestCase):
+    def test_events_are_stamped_with_the_dispatched_record(self):
+        """
+        Test that events published by a handler carry the record's time and shard.
+
+        This test verifies that:
+        1. The server time, wall-clock time and shard come from the record.
+        2. Events published during catch-up are marked stale.
+        3. Events are numbered in publishing order.
+        """
+        publisher = EventPublisher()
+        events = []
+        publisher.subscribe(events.append)
+        registry = EventRegistry()
+        registry.register_handler(
+            "Serializing", lambda line: publisher.publish(SAVE_COMPLETE, lines=[line])
+        )
+
+        record = LogRecord(90.0, 1700000000.0, "Caves", "Serializing world")
+        registry.handle_record(record)
+        with suppress_side_effects("catch-up"):
+            registry.handle_record(record)
+
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0].server_time, 90.0)
+        self.assertEqual(events[0].time, 1700000000.0)
+        self.assertEqual(events[0].shard, "Caves")
+        self.assertFalse(events[0].stale)
+        self.assertTrue(events[1].stale)
+        self.assertEqual(events[1].sequence, events[0].sequence + 1)
+
+    def test_failing_subscriber_does_not_stop_delivery(self):
+        """
+        Test that an exception in one subscriber does not affect the others.
+        """
+        publisher = EventPublisher()
+        events = []
+        publisher.subscribe(lambda event: 1 / 0)
+        publisher.subscribe(events.append)
+        publisher.publish(PLAYER_JOIN, id="KU_1", name="p1")
+        self.assertEqual(events[0].data, {"id": "KU_1", "name": "p1"})
+
+
+class TestJsonlEventSink(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a directory for the event file.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "events", "events.jsonl")
+        self.publisher = EventPublisher()
+
+    def tearDown(self):
+        """
+        Remove the event directory.
+        """
+        shutil.rmtree(self.directory)
+
+    def _start(self, **kwargs):
+        """
+        Start a sink subscribed to the test publisher.
+        """
+        sink = JsonlEventSink(self.path, **kwargs)
+        sink.start()
+        self.publisher.subscribe(sink)
+        self.addCleanup(sink.stop)
+        return sink
+
+    def test_full_batch_is_written_without_waiting(self):
+        """
+        Test that a full batch is written before the flush interval passes.
+        """
+        sink = self._start(max_batch=3, flush_interval=60, fsync="batch")
+        for index in range(3):
+            self.publisher.publish(PLAYER_JOIN, id=f"KU_{index}")
+        deadline = time.monotonic() + 5
+        while sink.written < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(sink.batches, 1)
+        events = read_lines(self.path)
+        self.assertEqual([event["data"]["id"] for event in events], ["KU_0", "KU_1", "KU_2"])
+        self.assertEqual(events[0]["type"], PLAYER_JOIN)
+
+    def test_pending_events_are_written_on_stop(self):
+        """
+        Test that events below the batch size are written when the sink stops.
+        """
+        sink = self._start(max_batch=100, flush_interval=60)
+        self.publisher.publish(SAVE_COMPLETE, lines=[])
+        self.assertEqual(sink.written, 0)
+        sink.stop()
+        self.assertEqual(len(read_lines(self.path)), 1)
+
+    def test_partial_batch_is_written_after_the_flush_interval(self):
+        """
+        Test that events below the batch size are written once the flush interval passes.
+        """
+        sink = self._start(max_batch=100, flush_interval=0.2, fsync="never")
+        self.publisher.publish(PLAYER_JOIN, id="KU_1")
+        deadline = time.monotonic() + 5
+        while sink.written < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(sink.batches, 1)
+        self.assertEqual([event["data"]["id"] for event in read_lines(self.path)], ["KU_1"])
+
+    def test_failed_write_is_counted_as_dropped(self):
+        """
+        Test that events the writer thread fails to write are counted as dropped.
+        """
+        sink = self._start(max_batch=2, flush_interval=60, fsync="never")
+        with patch.object(sink, "_write_batch", side_effect=OSError("No space left on device")):
+            self.publisher.publish(PLAYER_JOIN, id="KU_1")
+            self.publisher.publish(PLAYER_JOIN, id="KU_2")
+            deadline = time.monotonic() + 5
+            while sink.dropped < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertEqual(sink.dropped, 2)
+        self.assertEqual(sink.written, 0)
+
+    def test_interval_fsync_happens_after_the_stream_goes_quiet(self):
+        """
+        Test that events written between fsyncs are fsynced once the interval passes, even
+        when no further events arrive.
+        """
+        with patch("common.jsonl_sink.os.fsync", wraps=os.fsync) as fsync:
+            sink = self._start(max_batch=1, flush_interval=60, fsync="interval", fsync_interval=0.2)
+            deadline = time.monotonic() + 5
+            for index in range(2):
+                self.publisher.publish(PLAYER_JOIN, id=f"KU_{index}")
+                while sink.written <= index and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            self.assertEqual(fsync.call_count, 1)
+            while fsync.call_count < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            self.assertEqual(sink.written, 2)
+            self.assertEqual(fsync.call_count, 2)
+            time.sleep(0.3)
+            self.assertEqual(fsync.call_count, 2)
+
+    def test_file_is_rotated_by_size(self):
+        """
+        Test that the file is rotated before it grows past max_bytes.
+
+        This test verifies that:
+        1. Rotated files are renamed to numbered backups.
+        2. No more than the configured number of backups are kept.
+        3. No events are lost from the current file and the kept backups.
+        """
+        sink = self._start(max_batch=1, flush_interval=60, fsync="never", max_bytes=300, backups=2)
+        for index in range(20):
+            self.publisher.publish(PLAYER_JOIN, id=f"KU_{index}", name="p" * 50)
+        sink.stop()
+
+        self.assertGreater(sink.rotations, 2)
+        self.assertTrue(os.path.exists(f"{self.path}.2"))
+        self.assertFalse(os.path.exists(f"{self.path}.3"))
+        for path in (self.path, f"{self.path}.1", f"{self.path}.2"):
+            self.assertLessEqual(os.path.getsize(path), 300)
+        ids = [
+            event["data"]["id"]
+            for path in (f"{self.path}.2", f"{self.path}.1", self.path)
+            for event in read_lines(path)
+        ]
+        self.assertEqual(ids[-1], "KU_19")
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_unknown_fsync_policy_is_rejected(self):
+        """
+        Test that an unknown fsync policy raises a ValueError.
+        """
+        with self.assertRaises(ValueError):
+            JsonlEventSink(self.path, fsync="sometimes")
+
+
+if __name__ == "__main__":
+    unittest.main()
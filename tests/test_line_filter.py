@@ -0,0 +1,87 @@
+"""
+Test Line Filter Module
+
+This module contains unit tests for the KeywordPrefilter class from the common.line_filter module.
+It verifies that keyword matching on raw bytes finds exactly the lines containing a registered
+keyword, that the prefilter follows registry changes, and that invalid UTF-8 is decoded tolerantly.
+"""
+
+import unittest
+from common.event_registry import EventRegistry
+from common.line_filter import KeywordPrefilter, decode_line, last_server_time
+
+LOG_DATA = (
+    b"[00:00:01]: [Shard] Starting master server\n"
+    b"[00:00:02]: Unrelated line\n"
+    b"[00:00:03]: Client authenticated: (KU_Xo93QaLmG1) DST_\xff\xfePlayer\n"
+    b"continuation without timestamp\n"
+    b"[00:00:04]: Server Unpaused\n"
+)
+
+
+class TestKeywordPrefilter(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a registry with handlers for join and unpause events.
+        """
+        self.registry = EventRegistry()
+        self.registry.register_handler("Client authenticated:", print)
+        self.registry.register_handler("Server Unpaused", print)
+        self.prefilter = KeywordPrefilter(self.registry)
+
+    def _matching(self, data):
+        """
+        Return the decoded lines of data that the prefilter matches.
+        """
+        return [
+            decode_line(data, start, end)
+            for start, end in self.prefilter.matching_lines(data)
+        ]
+
+    def test_matching_lines(self):
+        """
+        Test that only lines containing a registered keyword are matched.
+
+        This test verifies that:
+        1. Lines without a keyword are skipped.
+        2. Invalid UTF-8 in a matching line is replaced instead of raising an error.
+        3. A final line without a trailing newline is matched.
+        """
+        lines = self._matching(LOG_DATA + b"[00:00:05]: Server Unpaused")
+        self.assertEqual(
+            lines,
+            [
+                "[00:00:03]: Client authenticated: (KU_Xo93QaLmG1) DST_��Player",
+                "[00:00:04]: Server Unpaused",
+                "[00:00:05]: Server Unpaused",
+            ],
+        )
+
+    def test_prefilter_follows_registry_changes(self):
+        """
+        Test that keywords registered or deregistered later are picked up.
+        """
+        self.registry.register_handler("[Shard] Starting master server", print)
+        self.assertEqual(len(self._matching(LOG_DATA)), 3)
+
+        self.registry.deregister_handler("Client authenticated:")
+        self.registry.deregister_handler("Server Unpaused")
+        self.assertEqual(
+            self._matching(LOG_DATA), ["[00:00:01]: [Shard] Starting master server"]
+        )
+
+    def test_last_server_time(self):
+        """
+        Test finding the last timestamp before an offset, skipping untimestamped lines.
+        """
+        continuation = LOG_DATA.index(b"continuation")
+        self.assertEqual(last_server_time(LOG_DATA, 0, continuation), 3)
+        self.assertEqual(
+            last_server_time(LOG_DATA, 0, LOG_DATA.index(b"[00:00:04]")), 3
+        )
+        self.assertEqual(last_server_time(LOG_DATA, 0, len(LOG_DATA)), 4)
+        self.assertIsNone(last_server_time(b"no timestamps here\n", 0, 19))
+
+
+if __name__ == "__main__":
+    unittest.main()
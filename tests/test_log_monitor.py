@@ -0,0 +1,112 @@
+"""
+Test Log Monitor Module
+
+This module contains an end-to-end test of the log monitor's shutdown. It runs the monitor in
+a subprocess on a temporary log file and verifies that on SIGTERM the lines written just
+before the signal are still handled, their game commands issued and their events written
+to the event log, that a save still being logged is reported as incomplete rather than
+completed, and that the monitor exits cleanly.
+"""
+
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MONITOR = """
+import sys
+import log_monitor
+from common.jsonl_sink import FSYNC_NEVER, JsonlEventSink
+log_monitor.LOGFILE = sys.argv[1]
+log_monitor.install_command_sink("record", sys.argv[3])
+log_monitor.run_log_monitor(
+    event_consumers=[JsonlEventSink(sys.argv[2], fsync=FSYNC_NEVER)], drain_timeout=5
+)
+"""
+
+
+class TestLogMonitorShutdown(unittest.TestCase):
+    def setUp(self):
+        """
+        Create the log, event log and command log paths in a temporary directory.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.log = os.path.join(self.directory, "server_log.txt")
+        self.events = os.path.join(self.directory, "events.jsonl")
+        self.commands = os.path.join(self.directory, "commands.txt")
+
+    def _append(self, *lines):
+        with open(self.log, "a") as f:
+            f.writelines(line + "\n" for line in lines)
+
+    def _commands(self):
+        if not os.path.exists(self.commands):
+            return []
+        with open(self.commands) as f:
+            return f.read().splitlines()
+
+    def test_sigterm_drains_pending_lines(self):
+        """
+        Test that SIGTERM handles the lines written before it and exits cleanly.
+
+        This test verifies that:
+        1. Lines appended right before SIGTERM are still handled, with their game commands.
+        2. Their events are written to the event log before the monitor exits.
+        3. A save that has not ended is published as incomplete, not as a completed save.
+        4. The monitor exits with status 0.
+        """
+        self._append("[00:00:01]: Client authenticated: (KU_1) alice")
+        env = dict(os.environ, DST_GROK_CACHE=os.path.join(self.directory, "grok.json"))
+        process = subprocess.Popen(
+            [sys.executable, "-c", MONITOR, self.log, self.events, self.commands],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.addCleanup(process.kill)
+        deadline = time.monotonic() + 30
+        while 'c_announce("alice has joined the server!")' not in self._commands():
+            self.assertIsNone(process.poll(), "The log monitor exited early")
+            self.assertLess(time.monotonic(), deadline, "The log monitor did not start")
+            time.sleep(0.05)
+
+        self._append(
+            "[00:00:02]: Client authenticated: (KU_2) bob",
+            "[00:00:03]: [Shard] (KU_1) alice disconnected from [SHDMASTER](1)",
+            # A save whose last line is not logged before the signal
+            "[00:00:04]: Available disk space for save files: 1000 MB",
+        )
+        process.send_signal(signal.SIGTERM)
+        self.assertEqual(process.wait(timeout=15), 0)
+
+        self.assertIn('c_announce("bob has joined the server!")', self._commands())
+        self.assertIn('c_announce("alice has left the server!")', self._commands())
+        self.assertNotIn('c_announce("Save sequence complete!")', self._commands())
+        with open(self.events) as f:
+            events = [json.loads(line) for line in f]
+        self.assertEqual(
+            [(event["type"], event["data"].get("name")) for event in events],
+            [
+                ("player_join", "alice"),
+                ("player_join", "bob"),
+                ("player_leave", "alice"),
+                ("incomplete", None),
+            ],
+        )
+        self.assertEqual(
+            events[-1]["data"]["lines"],
+            ["Available disk space for save files: 1000 MB"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
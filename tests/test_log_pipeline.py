@@ -0,0 +1,115 @@
+"""
+Test Log Pipeline Module
+
+This module contains unit tests for the background logging pipeline from the common.log_pipeline
+module. It verifies that records are written by the background writer, that repeated messages are
+suppressed and counted, that mutable arguments are formatted before they can change, and that a
+full queue drops records instead of blocking.
+"""
+
+import io
+import logging
+import queue
+import unittest
+from common.log_pipeline import (
+    DroppingQueueHandler,
+    DuplicateFilter,
+    configure_logging,
+    logging_stats,
+    stop_logging,
+)
+
+
+def make_record(message, *args):
+    """Create an INFO log record."""
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, args, None)
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDuplicateFilter(unittest.TestCase):
+    def test_repeats_within_window_are_suppressed_and_counted(self):
+        """
+        Test that repeats are dropped inside the window and counted on the next message.
+
+        This test verifies that:
+        1. The first occurrence passes and repeats within the window are dropped.
+        2. Different messages are not affected.
+        3. The first occurrence after the window reports the number of repeats.
+        """
+        clock = FakeClock()
+        log_filter = DuplicateFilter(window=10, clock=clock)
+        self.assertTrue(log_filter.filter(make_record("No players currently online.")))
+        for _ in range(3):
+            clock.now += 1
+            self.assertFalse(log_filter.filter(make_record("No players currently online.")))
+        self.assertTrue(log_filter.filter(make_record("Player %s joined", "p1")))
+        self.assertEqual(log_filter.suppressed, 3)
+
+        clock.now += 10
+        record = make_record("No players currently online.")
+        self.assertTrue(log_filter.filter(record))
+        self.assertEqual(
+            record.getMessage(), "No players currently online. (repeated 3 more times)"
+        )
+
+
+class TestDroppingQueueHandler(unittest.TestCase):
+    def test_formatting_is_deferred_only_for_immutable_arguments(self):
+        """
+        Test that records with immutable arguments are queued unformatted.
+        """
+        handler = DroppingQueueHandler(queue.Queue())
+        deferred = handler.prepare(make_record("Line: %s", "text"))
+        self.assertEqual(deferred.args, ("text",))
+
+        lines = ["first"]
+        formatted = handler.prepare(make_record("Lines: %s", lines))
+        lines.append("second")
+        self.assertEqual(formatted.getMessage(), "Lines: ['first']")
+
+    def test_full_queue_drops_records(self):
+        """
+        Test that records are dropped and counted when the queue is full.
+        """
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        handler.emit(make_record("one"))
+        handler.emit(make_record("two"))
+        self.assertEqual(handler.dropped, 1)
+
+
+class TestConfigureLogging(unittest.TestCase):
+    def tearDown(self):
+        """
+        Stop the background writer.
+        """
+        stop_logging()
+
+    def test_records_are_written_by_background_writer(self):
+        """
+        Test that logged messages reach the stream once the writer is stopped.
+        """
+        stream = io.StringIO()
+        configure_logging(level=logging.INFO, stream=stream)
+        logger = logging.getLogger("test_log_pipeline")
+        logger.debug("Hidden %s", "debug")
+        for _ in range(5):
+            logger.info("Shown %s", "info")
+        self.assertEqual(logging_stats()["dropped"], 0)
+        stop_logging()
+
+        output = stream.getvalue()
+        self.assertEqual(output.count("INFO - Shown info"), 1)
+        self.assertNotIn("Hidden", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Test Log Record Module
+
+This module contains unit tests for the log record parsing from the common.log_record module.
+It verifies timestamp parsing, wall-clock estimation from the shard clock anchor, and that
+records are passed through the EventRegistry to handlers that ask for them.
+"""
+
+import unittest
+from unittest.mock import Mock
+from common.event_registry import EventRegistry
+from common.log_record import (
+    LogLineParser,
+    LogRecord,
+    ShardClock,
+    parse_server_time,
+)
+
+
+class TestLogRecord(unittest.TestCase):
+    def test_parse_server_time(self):
+        """
+        Test parsing of the uptime prefix of DST log lines.
+
+        This test verifies that:
+        1. Hours, minutes and seconds are converted to seconds of uptime.
+        2. Uptimes of more than 99 hours are supported.
+        3. Lines without a timestamp prefix return None.
+        """
+        self.assertEqual(parse_server_time("[00:00:05]: Server Unpaused"), 5)
+        self.assertEqual(parse_server_time("[01:02:03]: Server Unpaused"), 3723)
+        self.assertEqual(parse_server_time("[120:00:00]: Server Unpaused"), 432000)
+        self.assertIsNone(parse_server_time("Server Unpaused"))
+        self.assertIsNone(parse_server_time("[Shard] Starting master server"))
+
+    def test_parser_builds_records(self):
+        """
+        Test that LogLineParser builds records with server time, wall time, shard and body.
+
+        This test verifies that:
+        1. The timestamp prefix is stripped from the body.
+        2. The wall-clock estimate is anchored at shard start.
+        3. Lines without a timestamp inherit the previous line's server time.
+        """
+        clock = ShardClock()
+        clock.observe(60, 1000.0)
+        parser = LogLineParser("Master", clock)
+
+        record = parser.parse("[00:02:00]: Spawn request: wilson from DST_Player", 2000.0)
+        self.assertEqual(
+            record,
+            LogRecord(120, 1060.0, "Master", "Spawn request: wilson from DST_Player"),
+        )
+
+        continuation = parser.parse("[1] (KU_Xo93QaLmG1) DST_Player <wilson>", 2000.0)
+        self.assertEqual(continuation.server_time, 120)
+        self.assertEqual(continuation.body, "[1] (KU_Xo93QaLmG1) DST_Player <wilson>")
+
+    def test_registry_passes_records(self):
+        """
+        Test that the registry passes records to handlers registered with pass_record.
+        """
+        registry = EventRegistry()
+        line_handler = Mock()
+        record_handler = Mock()
+        registry.register_handler("Server Unpaused", line_handler)
+        registry.register_handler("Server Unpaused", record_handler, pass_record=True)
+
+        record = LogRecord(5, None, "Master", "Server Unpaused")
+        registry.handle_record(record)
+
+        line_handler.assert_called_once_with("Server Unpaused")
+        record_handler.assert_called_once_with(record)
+        self.assertIsNone(registry.current_record())
+
+
+if __name__ == "__main__":
+    unittest.main()
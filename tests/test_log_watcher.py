@@ -0,0 +1,107 @@
+"""
+Test Log Watcher Module
+
+This module contains unit tests for the log watchers from the common.log_watcher module.
+It verifies that bursts of writes are coalesced into few callbacks, that unrelated files in
+the same directory do not wake the watcher, and that replacing the log is reported as a rotation.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from common.log_watcher import InotifyLogWatcher, PollingLogWatcher, _load_libc
+
+
+class CallbackRecorder:
+    """Collects watcher callbacks and lets tests wait for them."""
+
+    def __init__(self):
+        self.calls = []
+        self.condition = threading.Condition()
+
+    def __call__(self, rotated):
+        with self.condition:
+            self.calls.append(rotated)
+            self.condition.notify_all()
+
+    def wait_for(self, count, timeout=5):
+        """Wait until at least count callbacks were received."""
+        with self.condition:
+            return self.condition.wait_for(lambda: len(self.calls) >= count, timeout)
+
+
+class LogWatcherTests:
+    """Tests shared by the inotify and polling watchers."""
+
+    def create_watcher(self, path, on_change):
+        raise NotImplementedError
+
+    def setUp(self):
+        """
+        Create a log file in a temporary directory.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "server_log.txt")
+        with open(self.path, "w") as f:
+            f.write("[00:00:01]: Starting Up\n")
+        self.recorder = CallbackRecorder()
+        self.watcher = self.create_watcher(self.path, self.recorder)
+        self.watcher.start()
+        self.assertTrue(self.recorder.wait_for(1))
+
+    def tearDown(self):
+        """
+        Stop the watcher and remove the temporary directory.
+        """
+        self.watcher.stop()
+        shutil.rmtree(self.directory)
+
+    def test_burst_of_writes_is_coalesced(self):
+        """
+        Test that a burst of appends results in far fewer callbacks than writes.
+        """
+        with open(self.path, "a") as f:
+            for index in range(50):
+                f.write(f"[00:00:02]: Line {index}\n")
+                f.flush()
+        self.assertTrue(self.recorder.wait_for(2))
+        time.sleep(0.3)
+        self.assertLess(len(self.recorder.calls), 10)
+        self.assertEqual(self.recorder.calls[1], False)
+
+    def test_unrelated_files_do_not_wake_watcher(self):
+        """
+        Test that writing other files in the log directory causes no callbacks.
+        """
+        with open(os.path.join(self.directory, "save_file"), "w") as f:
+            f.write("x" * 1024)
+        time.sleep(0.3)
+        self.assertEqual(self.recorder.calls, [False])
+
+    def test_replaced_log_is_reported_as_rotation(self):
+        """
+        Test that moving the log away and creating a new one is reported as a rotation.
+        """
+        os.rename(self.path, self.path + ".old")
+        with open(self.path, "w") as f:
+            f.write("[00:00:01]: Starting Up\n")
+        self.assertTrue(self.recorder.wait_for(2))
+        self.assertIn(True, self.recorder.calls[1:])
+
+
+@unittest.skipIf(_load_libc() is None, "inotify is not available")
+class TestInotifyLogWatcher(LogWatcherTests, unittest.TestCase):
+    def create_watcher(self, path, on_change):
+        return InotifyLogWatcher(path, on_change)
+
+
+class TestPollingLogWatcher(LogWatcherTests, unittest.TestCase):
+    def create_watcher(self, path, on_change):
+        return PollingLogWatcher(path, on_change, min_interval=0.02, max_interval=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Test Memory Monitor Module
+
+This module contains unit tests for the MemoryMonitor class from the common.memory_monitor module.
+It verifies that monitored structures are measured, that growth warnings are logged once per
+threshold step rather than on every sample, and that reports include tracemalloc allocators.
+"""
+
+import tracemalloc
+import unittest
+from unittest.mock import patch
+from common.grouped_events import GroupedEventHandler
+from common.memory_monitor import MB, MemoryMonitor, deep_size
+from common.player import Player
+from common.shared_state import shared_state
+
+
+class TestMemoryMonitor(unittest.TestCase):
+    def setUp(self):
+        """
+        Start with an empty player list.
+        """
+        shared_state.players.clear()
+        self.monitor = MemoryMonitor(rss_growth_warning=100 * MB, structure_warning=4)
+
+    def tearDown(self):
+        """
+        Clear the player list and stop tracing allocations.
+        """
+        shared_state.players.clear()
+        tracemalloc.stop()
+
+    def _add_players(self, count):
+        """
+        Add players to the shared state.
+        """
+        for index in range(len(shared_state.players), count):
+            shared_state.players[f"KU_{index}"] = Player(id=f"KU_{index}", name=f"p{index}")
+
+    def test_structures_are_measured(self):
+        """
+        Test that the player list and grouped event lines are counted and sized.
+        """
+        self._add_players(3)
+        handler = GroupedEventHandler("start", "end", print)
+        handler.handle_event_line("start of a group")
+
+        sample = self.monitor.sample()
+        self.assertEqual(sample.structures["shared_state.players"].items, 3)
+        self.assertGreater(sample.structures["shared_state.players"].size, 3 * 100)
+        self.assertEqual(sample.structures["grouped_events.event_lines"].items, 1)
+
+    def test_deep_size_follows_containers_and_instances(self):
+        """
+        Test that deep_size includes nested containers and instance attributes.
+        """
+        small = deep_size({"a": Player(id="KU_1", name="p")})
+        large = deep_size({"a": Player(id="KU_1", name="p" * 10000)})
+        self.assertGreater(large - small, 9000)
+
+    def test_structure_warning_is_repeated_only_when_size_doubles(self):
+        """
+        Test that a growing structure is reported at the threshold and each doubling.
+
+        This test verifies that:
+        1. No warning is logged below the threshold.
+        2. One warning is logged when the threshold is reached.
+        3. The next warning is only logged once the size has doubled.
+        """
+        self._add_players(3)
+        self.assertEqual(self.monitor.check(), [])
+        self._add_players(4)
+        self.assertEqual(len(self.monitor.check()), 1)
+        self._add_players(7)
+        self.assertEqual(self.monitor.check(), [])
+        self._add_players(8)
+        self.assertEqual(len(self.monitor.check()), 1)
+
+    def test_rss_growth_warning(self):
+        """
+        Test that RSS growth is reported each time it passes another threshold step.
+        """
+        with patch("common.memory_monitor.read_rss", side_effect=[
+            50 * MB, 120 * MB, 160 * MB, 260 * MB,
+        ]):
+            self.monitor.sample()
+            self.assertEqual(self.monitor.check(), [])
+            self.assertEqual(len(self.monitor.check()), 1)
+            self.assertEqual(len(self.monitor.check()), 1)
+        self.assertEqual(self.monitor.warnings, 2)
+
+    def test_report_includes_top_allocators(self):
+        """
+        Test that the report lists allocators once tracemalloc is tracing.
+        """
+        self.assertIn("tracemalloc is not tracing", self.monitor.report())
+        self.monitor.start_tracing()
+        retained = [bytearray(1024) for _ in range(200)]
+        report = self.monitor.report()
+        self.assertIn("top allocators", report)
+        self.assertIn("test_memory_monitor.py", report)
+        self.assertEqual(len(retained), 200)
+
+    def test_toggled_tracing_is_stopped_again(self):
+        """
+        Test that toggling stops tracing it started, but leaves tracing from startup on.
+        """
+        self.assertTrue(self.monitor.toggle_tracing())
+        self.assertTrue(tracemalloc.is_tracing())
+        self.assertFalse(self.monitor.toggle_tracing())
+        self.assertFalse(tracemalloc.is_tracing())
+
+        self.monitor.start_tracing()
+        self.assertTrue(self.monitor.toggle_tracing())
+        self.assertTrue(self.monitor.toggle_tracing())
+        self.assertTrue(tracemalloc.is_tracing())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+Test Mod Cache Module
+
+This module contains unit tests for the ModCache class and the prefetch and seed functions
+from the common.mod_cache module. It verifies that mods are stored by ID and version and
+verified against their manifest, that seeding skips mods already in place and refuses
+corrupt ones, and that prefetching copies mods from local directories, downloads the rest
+with a single steamcmd run, and refreshes mods updated on the Workshop. It also verifies that
+each mod is hashed once per start and that seeded mods are listed in the Workshop manifest.
+"""
+
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+from common import mod_cache
+from common.mod_cache import ModCache, prefetch, seed, workshop_content_dir
+
+FAKE_STEAMCMD = """#!{python}
+import os, sys
+args = sys.argv[1:]
+directory = args[args.index("+force_install_dir") + 1]
+installed = []
+with open({calls!r}, "a") as f:
+    f.write(" ".join(args) + "\\n")
+for index, arg in enumerate(args):
+    if arg == "+workshop_download_item":
+        mod_dir = os.path.join(directory, "steamapps", "workshop", "content", args[index + 1], args[index + 2])
+        os.makedirs(os.path.join(mod_dir, "scripts"))
+        with open(os.path.join(mod_dir, "modinfo.lua"), "w") as f:
+            f.write('name = "Downloaded"\\nversion = "{version}"\\n')
+        with open(os.path.join(mod_dir, "scripts", "main.lua"), "w") as f:
+            f.write("-- downloaded")
+        installed.append(args[index + 2])
+entries = "".join(
+    '"%s" {{ "size" "100" "timeupdated" "1700000000" "manifest" "5%s" }}' % (mod_id, mod_id)
+    for mod_id in installed
+)
+with open(os.path.join(directory, "steamapps", "workshop", "appworkshop_322330.acf"), "w") as f:
+    f.write('"AppWorkshop" {{ "appid" "322330" "WorkshopItemsInstalled" {{ %s }} }}' % entries)
+"""
+
+
+class TestModCache(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a cache, a UGC directory to seed and a fake steamcmd in a temporary directory.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = ModCache(os.path.join(self.directory, "cache"))
+        os.makedirs(self.cache.root)
+        self.content = workshop_content_dir(os.path.join(self.directory, "ugc"))
+        self.calls = os.path.join(self.directory, "steamcmd.calls")
+        self.steamcmd = self._fake_steamcmd("1.0")
+
+    def _fake_steamcmd(self, version):
+        path = os.path.join(self.directory, "steamcmd.sh")
+        with open(path, "w") as f:
+            f.write(FAKE_STEAMCMD.format(python=sys.executable, calls=self.calls, version=version))
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+        return path
+
+    def _make_mod(self, root, mod_id, version="1.0", body="-- main"):
+        mod_dir = os.path.join(root, mod_id)
+        os.makedirs(os.path.join(mod_dir, "scripts"), exist_ok=True)
+        with open(os.path.join(mod_dir, "modinfo.lua"), "w") as f:
+            f.write(f'name = "Mod {mod_id}"\nversion = "{version}"\n')
+        with open(os.path.join(mod_dir, "scripts", "main.lua"), "w") as f:
+            f.write(body)
+        return mod_dir
+
+    def _steamcmd_runs(self):
+        if not os.path.exists(self.calls):
+            return []
+        with open(self.calls) as f:
+            return f.read().splitlines()
+
+    def test_store_verify_and_seed(self):
+        """
+        Test that a stored mod is verified and seeded once, and corrupt copies are not seeded.
+
+        This test verifies that:
+        1. Mods are stored under their version from modinfo.lua.
+        2. Seeding copies the mod and skips it once it is in place.
+        3. A cached file that changed fails verification and is not seeded.
+        """
+        source = self._make_mod(os.path.join(self.directory, "downloads"), "111", version="2.4.1")
+        self.assertEqual(self.cache.store("111", source), "2.4.1")
+        self.assertTrue(self.cache.verify("111"))
+
+        self.assertEqual(seed(["111", "222"], self.cache, self.content), ["111"])
+        with open(os.path.join(self.content, "111", "scripts", "main.lua")) as f:
+            self.assertEqual(f.read(), "-- main")
+        self.assertEqual(seed(["111"], self.cache, self.content), [])
+
+        with open(os.path.join(self.cache.path("111", "2.4.1"), "scripts", "main.lua"), "a") as f:
+            f.write("tampered")
+        self.assertFalse(self.cache.verify("111"))
+        # Verification results are kept for the cache's lifetime, i.e. until the next start
+        next_start = ModCache(self.cache.root)
+        self.assertEqual(seed(["111"], next_start, os.path.join(self.directory, "other")), [])
+
+    def test_prefetch_copies_local_mods_and_downloads_the_rest(self):
+        """
+        Test that prefetch uses local copies, downloads missing mods in one run and is then a no-op.
+        """
+        self._make_mod(self.content, "111")
+        stored = prefetch(["111", "222", "333"], self.cache, [self.content], self.steamcmd, check_updates=False)
+
+        self.assertEqual(stored, {"111": "1.0", "222": "1.0", "333": "1.0"})
+        runs = self._steamcmd_runs()
+        self.assertEqual(len(runs), 1)
+        self.assertIn("+workshop_download_item 322330 222 validate +workshop_download_item 322330 333", runs[0])
+        self.assertNotIn("111", runs[0])
+        self.assertEqual(sorted(os.listdir(self.cache.root)), ["111", "222", "333"])
+
+        self.assertEqual(prefetch(["111", "222", "333"], self.cache, [self.content], self.steamcmd, check_updates=False), {})
+        self.assertEqual(len(self._steamcmd_runs()), 1)
+
+    def test_prefetch_refreshes_updated_mods(self):
+        """
+        Test that a mod updated on the Workshop since it was cached is downloaded again.
+        """
+        source = self._make_mod(os.path.join(self.directory, "downloads"), "111")
+        self.cache.store("111", source, time_updated=100)
+        self._fake_steamcmd("1.1")
+
+        with patch.object(mod_cache, "workshop_update_times", return_value={"111": 100}):
+            self.assertEqual(prefetch(["111"], self.cache, [], self.steamcmd), {})
+        with patch.object(mod_cache, "workshop_update_times", return_value={"111": 200}):
+            self.assertEqual(prefetch(["111"], self.cache, [], self.steamcmd), {"111": "1.1"})
+
+        self.assertEqual(self.cache.manifest("111")["time_updated"], 200)
+        self.assertTrue(os.path.isdir(self.cache.path("111", "1.0")))
+        self.assertEqual(seed(["111"], self.cache, self.content), ["111"])
+
+    def test_each_mod_is_verified_once_per_start(self):
+        """
+        Test that prefetch and seed with one cache hash each cached mod only once.
+        """
+        for mod_id in ("111", "222"):
+            self.cache.store(mod_id, self._make_mod(os.path.join(self.directory, "downloads"), mod_id))
+        cache = ModCache(self.cache.root)
+        with patch.object(mod_cache, "build_manifest", wraps=mod_cache.build_manifest) as build:
+            self.assertEqual(prefetch(["111", "222"], cache, [], None, check_updates=False), {})
+            self.assertEqual(seed(["111", "222"], cache, self.content), ["111", "222"])
+        self.assertEqual(build.call_count, 2)
+
+    def test_seeded_mods_are_listed_in_the_workshop_manifest(self):
+        """
+        Test that seeding lists the seeded mods in the UGC directory's Workshop manifest.
+
+        This test verifies that:
+        1. The entries steamcmd wrote for downloaded mods are kept in the cache.
+        2. Seeding adds them to the UGC directory's manifest, creating it if needed.
+        3. Entries of mods that are not seeded, e.g. ones the shards downloaded, are kept.
+        """
+        ugc = os.path.join(self.directory, "ugc")
+        path = mod_cache.workshop_manifest_path(ugc)
+        prefetch(["222"], self.cache, [], self.steamcmd, check_updates=False)
+        self.assertEqual(
+            self.cache.manifest("222")["workshop"],
+            {"installed": {"size": "100", "timeupdated": "1700000000", "manifest": "5222"}},
+        )
+
+        seed(["222"], self.cache, self.content, path)
+        manifest = mod_cache.read_workshop_manifest(path)
+        self.assertEqual(manifest["appid"], "322330")
+        self.assertEqual(manifest["WorkshopItemsInstalled"]["222"]["manifest"], "5222")
+
+        manifest["WorkshopItemsInstalled"]["333"] = {"size": "50", "timeupdated": "1", "manifest": "7"}
+        mod_cache.write_workshop_manifest(path, manifest)
+        self.assertEqual(seed(["222"], self.cache, self.content, path), [])
+        manifest = mod_cache.read_workshop_manifest(path)
+        self.assertEqual(sorted(manifest["WorkshopItemsInstalled"]), ["222", "333"])
+        self.assertEqual(manifest["SizeOnDisk"], "150")
+
+
+if __name__ == "__main__":
+    unittest.main()
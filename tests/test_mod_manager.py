@@ -0,0 +1,169 @@
+"""
+Test Mod Manager Module
+
+This module contains unit tests for the ModConfig class and the add and remove functions
+from the common.mod_manager module. It verifies that mods are added after the existing
+entries of both mod files, updated in place and removed, that both files are only written
+when a transaction completes, that files are replaced without leaving temporary files, and
+that bulk changes to hundreds of mods take a single read and write of each file. It also
+verifies that the InstalledModsRegistry parses the mods setup file only when it changes.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from common import mod_manager
+from common.mod_manager import (
+    InstalledModsRegistry,
+    ModConfig,
+    get_installed_mods,
+    remove_mods,
+)
+
+MOD_FILE = """--ServerModSetup("350811795")
+ServerModSetup("1") -- One: first
+ServerModSetup("2") -- Two: second
+-- trailing comment
+"""
+
+SETTINGS_FILE = """--ForceEnableMod("kioskmode_dst")
+return {
+  ["workshop-1"] = { enabled = true }, -- One
+  ["workshop-2"] = { enabled = true }, -- Two
+}
+"""
+
+
+class TestModManager(unittest.TestCase):
+    def setUp(self):
+        """
+        Write both mod files to a temporary directory and point the mod manager at them.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.mod_file = os.path.join(self.directory, "dedicated_server_mods_setup.lua")
+        self.settings_file = os.path.join(self.directory, "modsettings.lua")
+        self._write(self.mod_file, MOD_FILE)
+        self._write(self.settings_file, SETTINGS_FILE)
+        for name, value in (("MOD_FILE_PATH", self.mod_file), ("MOD_SETTINGS_PATH", self.settings_file)):
+            patcher = patch.object(mod_manager, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _write(self, path, content):
+        with open(path, "w") as file:
+            file.write(content)
+
+    def _read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def test_add_update_and_remove(self):
+        """
+        Test that mods are added, updated in place and removed in both files.
+
+        This test verifies that:
+        1. New mods are placed after the last ServerModSetup line and inside the settings table.
+        2. Existing mods are updated where they are.
+        3. Removed mods disappear from both files, and commented-out examples are kept.
+        """
+        with ModConfig.load() as config:
+            self.assertIn("2", config)
+            config.set_mod("3", "Three", "third")
+            config.set_mod("1", "Uno", "updated")
+            self.assertEqual(config.remove_mod("2"), (True, True))
+            self.assertEqual(config.remove_mod("9"), (False, False))
+
+        self.assertEqual(
+            self._read(self.mod_file),
+            '--ServerModSetup("350811795")\n'
+            'ServerModSetup("1") -- Uno: updated\n'
+            'ServerModSetup("3") -- Three: third\n'
+            "-- trailing comment\n",
+        )
+        self.assertEqual(
+            self._read(self.settings_file),
+            '--ForceEnableMod("kioskmode_dst")\n'
+            "return {\n"
+            '  ["workshop-1"] = { enabled = true }, -- Uno\n'
+            '  ["workshop-3"] = { enabled = true }, -- Three\n'
+            "}\n",
+        )
+        self.assertEqual(get_installed_mods(), [("1", "Uno: updated"), ("3", "Three: third")])
+        self.assertEqual(sorted(os.listdir(self.directory)), ["dedicated_server_mods_setup.lua", "modsettings.lua"])
+
+    def test_failed_transaction_writes_nothing(self):
+        """
+        Test that changes made in a block that raises are discarded.
+        """
+        with self.assertRaises(RuntimeError):
+            with ModConfig.load() as config:
+                config.set_mod("3", "Three", "third")
+                raise RuntimeError("interrupted")
+        self.assertEqual(self._read(self.mod_file), MOD_FILE)
+        self.assertEqual(self._read(self.settings_file), SETTINGS_FILE)
+
+    def test_missing_settings_file_gets_a_table(self):
+        """
+        Test that adding a mod without a settings file creates the settings table.
+        """
+        os.unlink(self.settings_file)
+        with ModConfig.load() as config:
+            config.set_mod("3", "Three", "third")
+        self.assertEqual(
+            self._read(self.settings_file),
+            'return {\n  ["workshop-3"] = { enabled = true }, -- Three\n}\n',
+        )
+
+    def test_bulk_changes_read_and_write_each_file_once(self):
+        """
+        Test that adding and removing hundreds of mods reads and writes each file once.
+        """
+        mod_ids = [str(1000 + index) for index in range(2000)]
+        with patch.object(mod_manager, "read_file", wraps=mod_manager.read_file) as read, patch.object(
+            mod_manager, "write_file", wraps=mod_manager.write_file
+        ) as write:
+            started = time.monotonic()
+            with ModConfig.load() as config:
+                for mod_id in mod_ids:
+                    config.set_mod(mod_id, f"Mod {mod_id}", "summary")
+            remove_mods(mod_ids[::2])
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(read.call_count, 4)
+        self.assertEqual(write.call_count, 4)
+        self.assertEqual(len(get_installed_mods()), 1002)
+        self.assertEqual(self._read(self.settings_file).count("workshop-"), 1002)
+        self.assertLess(elapsed, 1.0)
+
+    def test_registry_parses_only_changed_files(self):
+        """
+        Test that the registry reuses its parsed mods until the file changes.
+
+        This test verifies that:
+        1. Repeated lookups parse the file once.
+        2. Mods can be looked up by ID.
+        3. Rewriting the file, even with the same size, is noticed.
+        4. A missing file means no mods are installed.
+        """
+        registry = InstalledModsRegistry()
+        self.assertEqual(registry.mods(), (("1", "One: first"), ("2", "Two: second")))
+        self.assertEqual(registry.get("2"), "Two: second")
+        self.assertIn("1", registry)
+        self.assertNotIn("3", registry)
+        self.assertEqual(registry.loads, 1)
+
+        with ModConfig.load() as config:
+            config.set_mod("2", "Owt", "dnoces")
+        self.assertEqual(registry.get("2"), "Owt: dnoces")
+        self.assertEqual(registry.loads, 2)
+
+        os.unlink(self.mod_file)
+        self.assertEqual(registry.mods(), ())
+
+
+if __name__ == "__main__":
+    unittest.main()
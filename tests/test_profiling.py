@@ -0,0 +1,130 @@
+"""
+Test Profiling Module
+
+This module contains unit tests for the PipelineProfiler class from the common.profiling module.
+It verifies that stage timings are recorded only while profiling is enabled, that handler time is
+broken down per handler, and that stopping a run writes the stage, sampling and cProfile reports.
+"""
+
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from common.event_registry import EventRegistry
+from common.ingest_queue import IngestQueue
+from common.log_record import LogRecord
+from common.profiling import DEFAULT_PROFILE_DIR, PipelineProfiler, profiler
+
+
+def handle_save(line):
+    """Handler used to check per-handler timings."""
+    time.sleep(0.001)
+
+
+class TestPipelineProfiler(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a profile directory and a registry with one handler.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.registry = EventRegistry()
+        self.registry.register_handler("Saved", handle_save)
+
+    def tearDown(self):
+        """
+        Make sure the shared profiler is stopped and remove the profile directory.
+        """
+        profiler.stop()
+        profiler.configure("sampling", DEFAULT_PROFILE_DIR)
+        shutil.rmtree(self.directory)
+
+    def test_handler_timings_are_recorded_only_while_enabled(self):
+        """
+        Test that handler timings are recorded per handler while the profiler is enabled.
+
+        This test verifies that:
+        1. Nothing is recorded while the profiler is disabled.
+        2. The handler stage and the handler's own stage count each dispatched record.
+        3. Stopping writes the stage report.
+        """
+        queue = IngestQueue(self.registry)
+        queue.start()
+        record = LogRecord(1, None, "Master", "Saved")
+        queue.put(record)
+        queue.join()
+        self.assertEqual(profiler.stages, {})
+
+        profiler.configure("stages", self.directory)
+        profiler.start()
+        for _ in range(3):
+            queue.put(record)
+        queue.join()
+        queue.stop()
+        paths = profiler.stop()
+
+        self.assertEqual(profiler.stages["handler"].calls, 3)
+        stats = profiler.stages[f"handler:{__name__}.handle_save"]
+        self.assertEqual(stats.calls, 3)
+        self.assertGreaterEqual(stats.total, 0.003)
+        self.assertEqual(len(paths), 1)
+        with open(paths[0]) as f:
+            self.assertIn("handle_save", f.read())
+
+    def test_timed_records_each_item(self):
+        """
+        Test that timed() yields every item and records one call per item plus the end.
+        """
+        local_profiler = PipelineProfiler()
+        self.assertEqual(list(local_profiler.timed("match", iter([1, 2]))), [1, 2])
+        self.assertEqual(local_profiler.stages["match"].calls, 3)
+
+    def test_sampling_collects_stacks_of_busy_threads(self):
+        """
+        Test that the sampling profiler sees a thread spinning in a known function.
+        """
+        local_profiler = PipelineProfiler()
+        local_profiler.configure("sampling", self.directory)
+        stop = threading.Event()
+
+        def spin_in_handler():
+            while not stop.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=spin_in_handler, name="busy-worker")
+        local_profiler.start()
+        worker.start()
+        time.sleep(0.2)
+        stop.set()
+        worker.join()
+        paths = local_profiler.stop()
+
+        with open(paths[1]) as f:
+            samples = f.read()
+        self.assertIn("busy-worker;", samples)
+        self.assertIn("spin_in_handler", samples)
+
+    def test_cprofile_output_is_written_by_the_profiled_thread(self):
+        """
+        Test that a thread calling sync_thread() writes its cProfile output after a stop.
+        """
+        local_profiler = PipelineProfiler()
+        local_profiler.configure("cprofile", self.directory)
+        local_profiler.start()
+        local_profiler.sync_thread()
+        handle_save("Saved")
+        local_profiler.stop()
+        local_profiler.sync_thread()
+
+        outputs = [name for name in os.listdir(self.directory) if name.endswith(".pstats")]
+        self.assertEqual(len(outputs), 1)
+        stats = pstats.Stats(os.path.join(self.directory, outputs[0]))
+        self.assertTrue(
+            any(function[2] == "handle_save" for function in stats.stats)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
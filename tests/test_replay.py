@@ -0,0 +1,122 @@
+"""
+Test Replay Module
+
+This module contains unit tests for the LogReplayer class from the common.replay module.
+It verifies that archived logs are streamed through the EventRegistry in order, that paced
+replays wait according to the log timestamps, and that game commands can be recorded
+instead of being sent to tmux.
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+from common.event_registry import EventRegistry
+from common.game_commands import (
+    GameCommandExecutor,
+    RecordingCommandSink,
+    get_command_sink,
+    set_command_sink,
+)
+from common.replay import LogReplayer
+
+LOG_LINES = [
+    "[00:00:01]: [Shard] Starting master server",
+    "[00:00:10]: Client authenticated: (KU_Xo93QaLmG1) DST_Player",
+    "[00:00:11]: Some unrelated line",
+    "[00:00:30]: Spawn request: wilson from DST_Player",
+]
+
+
+class TestLogReplayer(unittest.TestCase):
+    def setUp(self):
+        """
+        Write an archived log file to replay.
+        """
+        fd, self.path = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(fd, "w") as f:
+            f.write("\n".join(LOG_LINES) + "\n")
+
+    def tearDown(self):
+        """
+        Remove the archived log file.
+        """
+        os.remove(self.path)
+
+    def test_replay_dispatches_records_in_order(self):
+        """
+        Test that a replay dispatches every matching record in log order.
+        """
+        registry = EventRegistry()
+        handler = Mock()
+        registry.register_handler("Client authenticated:", handler, pass_record=True)
+        registry.register_handler("Spawn request:", handler, pass_record=True)
+
+        stats = LogReplayer(registry).replay(self.path)
+
+        self.assertEqual(stats.lines, 4)
+        records = [call.args[0] for call in handler.call_args_list]
+        self.assertEqual([record.server_time for record in records], [10, 30])
+        self.assertEqual(records[1].body, "Spawn request: wilson from DST_Player")
+        self.assertEqual(records[1].wall_time, os.stat(self.path).st_mtime)
+
+    def test_scaled_replay_paces_by_log_time(self):
+        """
+        Test that a scaled replay sleeps until each line is due.
+
+        With a speed of 10, the line logged 29 seconds after the first one is due
+        2.9 seconds into the replay.
+        """
+        now = [0.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        replayer = LogReplayer(
+            EventRegistry(), speed=10, sleep=sleep, monotonic=lambda: now[0]
+        )
+        stats = replayer.replay(self.path)
+
+        self.assertAlmostEqual(stats.elapsed, 2.9)
+
+    def test_recording_command_sink(self):
+        """
+        Test that handler commands go to a recording sink during a replay.
+        """
+        executor = GameCommandExecutor()
+        registry = EventRegistry()
+        registry.register_handler(
+            "Client authenticated:",
+            lambda line: executor.send_console_message("Welcome!"),
+        )
+
+        previous_sink = get_command_sink()
+        sink = RecordingCommandSink()
+        set_command_sink(sink)
+        try:
+            LogReplayer(registry).replay(self.path)
+        finally:
+            set_command_sink(previous_sink)
+
+        self.assertEqual(sink.commands, ['c_announce("Welcome!")'])
+
+    def test_recording_command_sink_closes_its_output(self):
+        """
+        Test that closing a recording sink closes the command log it writes to.
+        """
+        output = io.StringIO()
+        sink = RecordingCommandSink(output)
+        sink.send('c_announce("Welcome!")')
+        self.assertEqual(output.getvalue(), 'c_announce("Welcome!")\n')
+
+        sink.close()
+        self.assertTrue(output.closed)
+        self.assertIsNone(sink.output)
+        sink.send("c_save()")
+        sink.close()
+        self.assertEqual(sink.commands, ['c_announce("Welcome!")', "c_save()"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Test Roster Snapshot Module
+
+This module contains unit tests for the RosterSnapshotWriter and RosterSnapshotReader classes
+from the common.roster_snapshot module. It verifies that the player list and shard status
+round-trip through the snapshot file, that unchanged snapshots are returned from the reader's
+cache, that readers never see a half-written snapshot, and that a restarted writer continues
+the sequence of the file readers already mapped.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from common.event_stream import SAVE_COMPLETE, SHARD_IDLE, SHARD_RESUMED, SHARD_UP, EventPublisher
+from common.player import Player
+from common.roster_snapshot import RosterSnapshotReader, RosterSnapshotWriter
+from common.shared_state import SharedState
+
+
+class TestRosterSnapshot(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a player state and a writer for a temporary snapshot file.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "roster")
+        self.state = SharedState()
+        self.writer = RosterSnapshotWriter(self.path, shard="Master", state=self.state)
+        self.writer.start()
+        self.reader = RosterSnapshotReader(self.path)
+
+    def tearDown(self):
+        """
+        Close the writer and reader and remove the snapshot file.
+        """
+        self.reader.close()
+        self.writer.stop()
+        shutil.rmtree(self.directory)
+
+    def test_roster_and_status_round_trip(self):
+        """
+        Test that players and shard status written on events are read back.
+
+        This test verifies that:
+        1. A snapshot is available as soon as the writer starts.
+        2. Shard up, save and idle events update the status.
+        3. The roster matches the player state.
+        """
+        self.assertEqual(self.reader.read().player_count, 0)
+
+        publisher = EventPublisher()
+        publisher.subscribe(self.writer)
+        self.state.sync_player_state(Player(id="KU_1", name="alice", character="wilson"))
+        publisher.publish(SHARD_UP, mods=[])
+        publisher.publish(SAVE_COMPLETE, lines=[])
+        publisher.publish(SHARD_IDLE, shard="Master", stage="paused", idle_since=100.0, idle_seconds=5.0)
+        publisher.publish(SHARD_RESUMED, shard="Master", resume_latency=1.5)
+
+        status = self.reader.read()
+        self.assertEqual(status.shard, "Master")
+        self.assertTrue(status.shard_up)
+        self.assertGreater(status.last_save, 0)
+        self.assertEqual(status.events, 4)
+        self.assertEqual((status.idle_stage, status.idle_since, status.resume_latency), ("paused", 100.0, 1.5))
+        self.assertEqual(status.players, (("KU_1", "alice", "wilson"),))
+        self.assertEqual(status.to_dict()["players"][0]["name"], "alice")
+
+    def test_unchanged_snapshot_is_cached(self):
+        """
+        Test that the reader returns the same object until the snapshot changes.
+        """
+        first = self.reader.read()
+        self.assertIs(self.reader.read(), first)
+        self.writer.write()
+        self.assertGreater(self.reader.read().sequence, first.sequence)
+
+    def test_missing_file_reads_none(self):
+        """
+        Test that reading a snapshot that was never written returns None.
+        """
+        reader = RosterSnapshotReader(os.path.join(self.directory, "missing"))
+        self.assertIsNone(reader.read())
+
+    def test_restarted_writer_continues_sequence(self):
+        """
+        Test that a reader mapped before a writer restart sees the new writer's snapshots.
+        """
+        before = self.reader.read()
+        self.writer.stop()
+        self.state.sync_player_state(Player(id="KU_2", name="bob"))
+        self.writer = RosterSnapshotWriter(self.path, shard="Master", state=self.state)
+        self.writer.start()
+
+        after = self.reader.read()
+        self.assertGreater(after.sequence, before.sequence)
+        self.assertEqual(after.player_count, 1)
+
+    def test_concurrent_reads_are_consistent(self):
+        """
+        Test that snapshots read while the writer is busy are never torn.
+        """
+        stop = threading.Event()
+
+        def write():
+            generation = 0
+            while not stop.is_set():
+                generation += 1
+                self.state.players = {
+                    f"KU_{index}": Player(id=f"KU_{index}", name=f"gen{generation}")
+                    for index in range(generation % 20)
+                }
+                self.state.update_snapshot()
+                self.writer.write()
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        try:
+            for _ in range(2000):
+                status = self.reader.read()
+                self.assertLessEqual(len({name for _, name, _ in status.players}), 1)
+        finally:
+            stop.set()
+            thread.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,8 @@ Test Shard Server Handler Module
 
 This module contains unit tests for the ShardServerHandler class from the handlers.shard_server_handler module.
 It verifies that the ShardServerHandler correctly processes a sequence of log lines related to a shard server start event
-and sends the appropriate console message when the server is up and running.
+and sends the appropriate console message when the server is up and running, publishing the
+installed mods from the installed mods registry.
 """
 
 import unittest
@@ -13,6 +14,7 @@ from handlers.shard_server_handler import (
     SHARD_START_PATTERN,
     SHARD_END_PATTERN,
 )
+from common.event_stream import SHARD_UP, event_publisher
 from common.grouped_events import GroupedEventHandler
 
 
@@ -64,6 +66,23 @@ class TestShardServerHandler(unittest.TestCase):
             "Server is up and running!"
         )
 
+    @patch("handlers.shard_server_handler.GameCommandExecutor")
+    def test_shard_up_publishes_registry_mods(self, MockExecutor):
+        """
+        Test that the shard up event lists the mods of the installed mods registry.
+        """
+        registry = Mock()
+        registry.mods.return_value = (("375859599", "Health Info"),)
+        events = []
+        event_publisher.subscribe(events.append)
+        self.addCleanup(event_publisher.unsubscribe, events.append)
+
+        ShardServerHandler(registry=registry).handle_shard_event([])
+
+        shard_up = [event for event in events if event.type == SHARD_UP]
+        self.assertEqual(shard_up[0].data["mods"], [{"id": "375859599", "name": "Health Info"}])
+        registry.mods.assert_called_once_with()
+
 
 if __name__ == "__main__":
     unittest.main()
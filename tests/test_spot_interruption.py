@@ -0,0 +1,138 @@
+"""
+Test Spot Interruption Module
+
+This module contains unit tests for the SpotInterruptionWatcher class from the
+common.spot_interruption module. It runs a local stand-in for the instance metadata service
+and verifies that notices are only read with a session token, that a notice leads to an
+announcement and a save confirmed by a SAVE_COMPLETE event, with the time to the durable save
+measured, and that the save is issued again until the instance is due to be reclaimed.
+"""
+
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock
+from common.event_stream import INTERRUPTION_SAVED, SAVE_COMPLETE, SPOT_INTERRUPTION, EventPublisher
+from common.spot_interruption import SpotInterruptionWatcher
+
+TOKEN = "token-1"
+
+
+class FakeMetadataService(BaseHTTPRequestHandler):
+    """Serves IMDSv2 session tokens and the spot instance action configured on the server."""
+
+    def do_PUT(self):
+        if self.path == "/latest/api/token" and self.headers.get("X-aws-ec2-metadata-token-ttl-seconds"):
+            self._send(200, TOKEN.encode())
+        else:
+            self._send(400, b"Bad Request")
+
+    def do_GET(self):
+        self.server.requests += 1
+        if self.headers.get("X-aws-ec2-metadata-token") != TOKEN:
+            self._send(401, b"Unauthorized")
+        elif self.path != "/latest/meta-data/spot/instance-action" or self.server.notice is None:
+            self._send(404, b"Not Found")
+        else:
+            self._send(200, json.dumps(self.server.notice).encode())
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def action_time(seconds):
+    """Return the instance action time the given number of seconds from now."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + seconds))
+
+
+class TestSpotInterruption(unittest.TestCase):
+    def setUp(self):
+        """
+        Start the stand-in metadata service and create a watcher polling it.
+        """
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeMetadataService)
+        self.server.daemon_threads = True
+        self.server.requests = 0
+        self.server.notice = None
+        thread = threading.Thread(target=self.server.serve_forever, args=(0.05,))
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.publisher = EventPublisher()
+        self.events = []
+        self.publisher.subscribe(self.events.append)
+        self.executor = Mock()
+        self.watcher = SpotInterruptionWatcher(
+            f"http://127.0.0.1:{self.server.server_port}/",
+            shard="Master",
+            executor=self.executor,
+            publisher=self.publisher,
+            poll_interval=0.02,
+            save_retry=0.1,
+        )
+        self.addCleanup(self.watcher.stop)
+
+    def _wait_for(self, event_type):
+        deadline = time.monotonic() + 5
+        while not any(event.type == event_type for event in self.events):
+            if time.monotonic() > deadline:
+                raise AssertionError(f"No {event_type} event")
+            time.sleep(0.005)
+        return [event for event in self.events if event.type == event_type][-1]
+
+    def test_notice_is_answered_with_a_confirmed_save(self):
+        """
+        Test that a notice leads to an announcement and a save confirmed by the save handler.
+
+        This test verifies that:
+        1. Nothing happens while there is no notice.
+        2. The notice is published with the seconds left until the instance is reclaimed.
+        3. The world is saved once, and the save is confirmed by a SAVE_COMPLETE event.
+        4. The time to the durable save is measured and published.
+        """
+        self.executor.save_game.side_effect = lambda: self.publisher.publish(SAVE_COMPLETE, lines=3)
+        self.watcher.start()
+        while self.server.requests < 2:
+            time.sleep(0.005)
+        self.assertEqual(self.events, [])
+        self.executor.save_game.assert_not_called()
+
+        self.server.notice = {"action": "terminate", "time": action_time(120)}
+        notice = self._wait_for(SPOT_INTERRUPTION)
+        self.assertEqual(notice.data["action"], "terminate")
+        self.assertGreater(notice.data["seconds_left"], 100)
+
+        saved = self._wait_for(INTERRUPTION_SAVED)
+        self.assertTrue(saved.data["saved"])
+        self.assertEqual(saved.data["saves"], 1)
+        self.assertLess(saved.data["time_to_durable_save"], 5)
+        self.assertEqual(self.watcher.time_to_durable_save, saved.data["time_to_durable_save"])
+        messages = [args[0] for args, _ in self.executor.send_console_message.call_args_list]
+        self.assertIn("Saving the world now!", messages[0])
+        self.assertEqual(messages[1], "World saved. The server will be back shortly.")
+
+    def test_save_is_retried_until_reclaimed(self):
+        """
+        Test that an unconfirmed save is issued again until the action time, then reported as failed.
+        """
+        # Action times have whole seconds, so this is between one and two seconds away
+        self.server.notice = {"action": "terminate", "time": action_time(2)}
+        self.watcher.start()
+        saved = self._wait_for(INTERRUPTION_SAVED)
+        self.assertFalse(saved.data["saved"])
+        self.assertIsNone(saved.data["time_to_durable_save"])
+        self.assertGreater(self.executor.save_game.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()